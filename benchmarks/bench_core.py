@@ -0,0 +1,245 @@
+"""Benchmarks for the db layer, calculators, export/import paths and chart preparation."""
+import asyncio
+import os
+from unittest import mock
+
+from financial_goals_tracker import async_db
+from financial_goals_tracker import columnar
+from financial_goals_tracker import db
+from financial_goals_tracker import export
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import main
+from financial_goals_tracker import milestones
+from financial_goals_tracker import portfolio
+from financial_goals_tracker import projections
+from financial_goals_tracker import statements
+from financial_goals_tracker import writer
+from suite import benchmark
+
+
+STATEMENT_ROWS = 10_000
+STATEMENT_MAPPING = statements.StatementMapping(columns={"date": "date", "amount": "amount", "fund": "fund"})
+
+
+def _largest_goal(ctx):
+    conn = db.connect_db()
+    goal_id = conn.execute("""
+        SELECT goal_id FROM contributions GROUP BY goal_id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()[0]
+    conn.close()
+    return goal_id
+
+
+@benchmark("db.fetch_goals_page", "db")
+def fetch_goals_page(ctx):
+    db.fetch_goals_page(limit=main.PAGE_SIZE)
+
+
+@benchmark("db.iter_goal_pages.all", "db")
+def iter_all_goal_pages(ctx):
+    for _ in db.iter_goal_pages(page_size=500):
+        pass
+
+
+@benchmark("db.goal_query.filtered", "db")
+def goal_query_filtered(ctx):
+    (db.GoalQuery().mode("SIP").horizon_between(3, 10).progress_between(10, 90)
+     .order_by("progress", descending=True).limit(100).fetch())
+
+
+@benchmark("db.goal_query.all.tuples", "db")
+def goal_query_tuples(ctx):
+    # Compare with db.goal_query.all.rows: the same listing as Goal rows
+    sum(goal[7] for goal in db.GoalQuery().fetch())
+
+
+@benchmark("db.goal_query.all.rows", "db")
+def goal_query_rows(ctx):
+    sum(goal.sip_amount for goal in db.GoalQuery().fetch(db.goal_row))
+
+
+@benchmark("db.fetch_portfolio_rows", "db")
+def fetch_portfolio_rows(ctx):
+    db.fetch_portfolio_rows()
+
+
+@benchmark("db.get_goal_total_contributions", "db", ops=100)
+def goal_totals(ctx):
+    for goal_id in ctx.sample_goal_ids:
+        db.get_goal_total_contributions(goal_id)
+
+
+@benchmark("db.fetch_goal_by_id", "db", ops=100)
+def goal_by_id(ctx):
+    for goal_id in ctx.sample_goal_ids:
+        db.fetch_goal_by_id(goal_id)
+
+
+@benchmark("db.fetch_contributions_page", "db", ops=100)
+def contribution_pages(ctx):
+    for goal_id in ctx.sample_goal_ids:
+        db.fetch_contributions_page(goal_id, limit=main.PAGE_SIZE)
+
+
+@benchmark("db.log_contribution", "db", ops=100, isolated=True)
+def log_contributions(ctx):
+    with db.console.capture():  # Silence the per-call success message
+        for goal_id in ctx.sample_goal_ids:
+            db.log_contribution(goal_id, 1000, "2025-01-01")
+
+
+@benchmark("writer.log_contribution", "db", ops=100, isolated=True)
+def group_commit_contributions(ctx):
+    with writer.GroupCommitWriter() as group:
+        futures = [group.log_contribution(goal_id, 1000, "2025-01-01") for goal_id in ctx.sample_goal_ids]
+        for future in futures:
+            future.result()
+
+
+@benchmark("menu.display_goals", "menu")
+def display_goals(ctx):
+    # Render the first page only, answering 'q' to the next-page prompt
+    with mock.patch.object(main.Prompt, "ask", return_value="q"), main.console.capture():
+        main.display_goals()
+
+
+@benchmark("calc.calculate_sip", "calc", ops=10_000)
+def calculate_sip(ctx):
+    for i in range(10_000):
+        goals_calculator.calculate_sip(1_000_000 + i, 10, 12)
+
+
+@benchmark("calc.project_future_values", "calc")
+def project_future_values(ctx):
+    report = ctx.cached("report", portfolio.build_report)
+    goals_calculator.project_future_values(report.totals, report.sip_amounts, report.target_amounts,
+                                           report.time_horizons, report.cagrs)
+
+
+@benchmark("calc.portfolio_report", "calc")
+def portfolio_report(ctx):
+    portfolio.build_report().summary()
+
+
+@benchmark("io.export_contributions.csv", "io")
+def export_contributions_csv(ctx):
+    export.export_contributions(os.path.join(ctx.workdir, "contributions.csv"))
+
+
+@benchmark("io.export_contributions.jsonl_gz", "io")
+def export_contributions_jsonl_gz(ctx):
+    export.export_contributions(os.path.join(ctx.workdir, "contributions.jsonl.gz"), "jsonl", compress=True)
+
+
+def _backup(ctx):
+    return db.export_all_data(os.path.join(ctx.workdir, "backups"))
+
+
+@benchmark("io.export_all_data", "io")
+def backup(ctx):
+    _backup(ctx)
+
+
+@benchmark("io.import_all_data", "io", isolated=True, setup=lambda ctx: ctx.cached("backup_dir", lambda: _backup(ctx)))
+def restore(ctx):
+    db.import_all_data(ctx.cache["backup_dir"])
+
+
+@benchmark("chart.prepare_progress_series", "chart")
+def prepare_progress_series(ctx):
+    goal_id = ctx.cached("largest_goal", lambda: _largest_goal(ctx))
+    main.prepare_progress_series(*db.fetch_contribution_series(goal_id))
+
+
+@benchmark("ledger.goal_state.largest", "ledger", ops=100)
+def ledger_state(ctx):
+    # The largest goal's journal grows with scale; snapshots keep the replayed tail short
+    goal_id = ctx.cached("largest_goal", lambda: _largest_goal(ctx))
+    for _ in range(100):
+        db.goal_ledger_state(goal_id)
+
+
+@benchmark("ledger.goal_state.largest.full_replay", "ledger", ops=100)
+def ledger_state_full_replay(ctx):
+    goal_id = ctx.cached("largest_goal", lambda: _largest_goal(ctx))
+    for _ in range(100):
+        db.goal_ledger_state(goal_id, use_snapshots=False)
+
+
+@benchmark("ledger.columnar.load", "ledger")
+def columnar_load(ctx):
+    columnar.ColumnarLedger.load()
+
+
+@benchmark("ledger.columnar.totals", "ledger", ops=100)
+def columnar_totals(ctx):
+    ledger = ctx.cached("columnar_ledger", columnar.ColumnarLedger.load)
+    for _ in range(100):
+        ledger.totals()
+
+
+def _snapshot_path(ctx):
+    return os.path.join(ctx.workdir, "ledger.snapshot")
+
+
+@benchmark("ledger.snapshot.write", "ledger")
+def snapshot_write(ctx):
+    columnar.write_snapshot(_snapshot_path(ctx))
+
+
+@benchmark("ledger.snapshot.open", "ledger", ops=100,
+           setup=lambda ctx: columnar.write_snapshot(_snapshot_path(ctx)))
+def snapshot_open(ctx):
+    conn = db.connect_db()
+    for _ in range(100):
+        columnar.open_snapshot(_snapshot_path(ctx), conn).totals()
+    conn.close()
+
+
+@benchmark("milestones.compute_all", "milestones",
+           setup=lambda ctx: columnar.write_snapshot())  # Current snapshot, so every call maps it
+def milestones_compute_all(ctx):
+    milestones.compute_milestones()
+
+
+@benchmark("milestones.goal_milestones.stored", "milestones", ops=100,
+           setup=lambda ctx: milestones.compute_milestones())
+def milestones_stored(ctx):
+    for goal_id in ctx.sample_goal_ids:
+        milestones.goal_milestones(goal_id)
+
+
+@benchmark("async_db.fetch_goal_by_id.gather", "async_db", ops=100)
+def async_db_gather(ctx):
+    async def reads():
+        async with async_db.AsyncDB(readers=1) as adb:  # One connection, so the count is deterministic
+            await asyncio.gather(*(adb.fetch_goal_by_id(goal_id) for goal_id in ctx.sample_goal_ids))
+    asyncio.run(reads())
+
+@benchmark("projections.refresh_all", "projections")
+def projections_refresh_all(ctx):
+    projections.refresh_projections()
+
+
+@benchmark("projections.goal_projection.stored", "projections", ops=100,
+           setup=lambda ctx: projections.refresh_projections())
+def projections_stored(ctx):
+    for goal_id in ctx.sample_goal_ids:
+        projections.goal_projection(goal_id)
+
+
+def _import_statement_once(ctx):
+    path = os.path.join(ctx.workdir, "statement.csv")
+    with open(path, "w") as f:
+        f.write("date,fund,amount\n")
+        for i in range(STATEMENT_ROWS):
+            f.write(f"2024-{i * 12 // STATEMENT_ROWS + 1:02d}-{i % 28 + 1:02d},Fund {i % 40},{100 + i % 997}.50\n")
+    STATEMENT_MAPPING.default_goal_id = ctx.goal_ids[0]
+    statements.import_statement(path, STATEMENT_MAPPING)
+    ctx.cache["statement"] = path
+
+
+@benchmark("io.import_statement.reimport", "io", ops=STATEMENT_ROWS, setup=_import_statement_once, isolated=True)
+def reimport_statement(ctx):
+    # Every row is already imported: parse, hash and dedupe against the unique index
+    statements.import_statement(ctx.cache["statement"], STATEMENT_MAPPING)
@@ -0,0 +1,67 @@
+"""Full-text goal search (FTS5) against the equivalent LIKE scan, at 100k goals.
+
+Search cost depends on the number of goals rather than contribution rows, so
+these benchmarks share one database of SEARCH_GOALS goals, built on first use
+and removed at exit, instead of the scale's ~1 goal per 100 rows.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from financial_goals_tracker import db
+from financial_goals_tracker import synthetic
+from suite import benchmark
+
+SEARCH_GOALS = 100_000
+# A specific goal, a name prefix plus number prefix, and a broad name matching ~10% of goals.
+# Broad queries favour LIKE, which stops after LIMIT hits while FTS ranks every match;
+# selective ones, where LIKE must scan every goal and contribution, favour FTS.
+QUERIES = ["sabbatical 1234", "car 77", "house down"]
+
+
+_search_db_path = None
+
+
+def _build():
+    workdir = tempfile.mkdtemp(prefix="fgt-bench-search-")
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+    path = os.path.join(workdir, "search.db")
+    original = db.DB_FILE
+    db.DB_FILE = path
+    try:
+        synthetic.generate(goals=SEARCH_GOALS, contributions=SEARCH_GOALS, basics_history=0)
+    finally:
+        db.DB_FILE = original
+    return path
+
+
+def prepare(ctx):
+    global _search_db_path
+    if _search_db_path is None:
+        _search_db_path = _build()
+
+
+@contextmanager
+def search_db():
+    original = db.DB_FILE
+    db.DB_FILE = _search_db_path
+    try:
+        yield
+    finally:
+        db.DB_FILE = original
+
+
+@benchmark("search.fts", "search", ops=len(QUERIES), setup=prepare)
+def search_fts(ctx):
+    with search_db():
+        for query in QUERIES:
+            db.search_goals(query)
+
+
+@benchmark("search.like", "search", ops=len(QUERIES), setup=prepare)
+def search_like(ctx):
+    with search_db():
+        for query in QUERIES:
+            db.search_goals_like(query)
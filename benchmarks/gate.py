@@ -0,0 +1,135 @@
+"""Fail when benchmarks regress against the committed baseline.
+
+Usage:
+    python benchmarks/gate.py                      # compare against benchmarks/baseline.json
+    python benchmarks/gate.py --update-baseline    # re-record the baseline after an intended change
+    python benchmarks/gate.py --update-baseline --select db.log_contribution   # re-record just these entries
+
+Every benchmark in the baseline is re-run at the baseline's scales and seed.
+Connection and statement counts must not exceed the baseline, because any
+increase means extra round trips such as an N+1 query. Median latency may
+exceed the baseline by --latency-tolerance (relative) plus --min-delta-ms
+(absolute), which absorbs timer noise on fast operations. Exit status is 1
+on any regression.
+"""
+import argparse
+import json
+import os
+import sys
+
+import suite
+from run_benchmarks import load_benchmarks
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SCALES = ["1k", "10k"]
+
+
+def key(result):
+    return f"{result['name']}@{result['scale']}"
+
+
+def merge(baseline, current, select):
+    """The baseline with the selected benchmarks' results replaced by those of current."""
+    fresh = {key(r): r for r in current["results"]}
+    results = []
+    for result in baseline["results"]:
+        if not suite.matches(result["name"], result["group"], select):
+            results.append(result)
+        elif key(result) in fresh:
+            results.append(fresh.pop(key(result)))
+    results.extend(fresh.values())
+    return dict(current, results=results)
+
+
+def compare(baseline, current, latency_tolerance, min_delta_ms):
+    """Return (regressions, notes) lists of human-readable lines."""
+    baseline_results = {key(r): r for r in baseline["results"]}
+    current_results = {key(r): r for r in current["results"]}
+    regressions, notes = [], []
+
+    for name, expected in sorted(baseline_results.items()):
+        actual = current_results.get(name)
+        if actual is None:
+            regressions.append(f"{name}: missing from current run")
+            continue
+
+        for metric in ("connections", "statements"):
+            if actual[metric] > expected[metric]:
+                regressions.append(f"{name}: {metric} {expected[metric]} -> {actual[metric]} "
+                                   f"(+{actual[metric] - expected[metric]})")
+            elif actual[metric] < expected[metric]:
+                notes.append(f"{name}: {metric} improved {expected[metric]} -> {actual[metric]}")
+
+        expected_ms, actual_ms = expected["median_s"] * 1000, actual["median_s"] * 1000
+        allowed_ms = expected_ms * (1 + latency_tolerance) + min_delta_ms
+        change = (actual_ms / expected_ms - 1) * 100 if expected_ms else 0
+        if actual_ms > allowed_ms:
+            regressions.append(f"{name}: median {expected_ms:.3f} ms -> {actual_ms:.3f} ms "
+                               f"({change:+.0f}%, allowed up to {allowed_ms:.3f} ms)")
+        elif change < -latency_tolerance * 100:
+            notes.append(f"{name}: median improved {expected_ms:.3f} ms -> {actual_ms:.3f} ms ({change:+.0f}%)")
+
+    for name in sorted(set(current_results) - set(baseline_results)):
+        notes.append(f"{name}: new benchmark, not in baseline")
+
+    return regressions, notes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--latency-tolerance", type=float, default=0.5,
+                        help="Allowed relative slowdown of the median (default: 0.5 = 50%%).")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Absolute slowdown always allowed, in ms (default: 2).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current run as the baseline.")
+    parser.add_argument("--select", action="append",
+                        help="Only run benchmarks whose name or group starts with this (repeatable). "
+                             "With --update-baseline, only their baseline entries are re-recorded.")
+    args = parser.parse_args(argv)
+
+    load_benchmarks()
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline is None and not args.update_baseline:
+        parser.error(f"no baseline at {args.baseline}; run with --update-baseline first")
+
+    scales = list(dict.fromkeys(r["scale"] for r in baseline["results"])) if baseline else DEFAULT_SCALES
+    seed = baseline["seed"] if baseline else 42
+    if args.select:
+        select = args.select
+    else:
+        select = sorted({r["name"] for r in baseline["results"]}) if baseline and not args.update_baseline else None
+
+    current = suite.run(scales, args.repeat, seed, select)
+
+    if args.update_baseline:
+        if baseline and args.select:
+            current = merge(baseline, current, args.select)
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline} ({len(current['results'])} results)")
+        return 0
+
+    if args.select:
+        baseline = dict(baseline, results=[r for r in baseline["results"]
+                                           if suite.matches(r["name"], r["group"], args.select)])
+    regressions, notes = compare(baseline, current, args.latency_tolerance, args.min_delta_ms)
+    for line in notes:
+        print(f"  note: {line}")
+    if regressions:
+        print(f"FAIL: {len(regressions)} regression(s) against {args.baseline}")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"OK: {len(current['results'])} benchmarks within tolerance of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
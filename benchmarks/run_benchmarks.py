@@ -0,0 +1,55 @@
+"""Run the benchmark suite against seeded synthetic databases.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scales 1k,100k --output results.json
+    python benchmarks/run_benchmarks.py --scales 10m --select db.,io.   # large, slow
+
+Scales are contribution row counts (1k, 10k, 100k, 1m, 10m or any number);
+each scale gets about one goal per 100 contributions. Results are written as
+JSON: environment details plus one record per benchmark and scale.
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+
+import suite
+
+
+def load_benchmarks():
+    """Import every bench_*.py module next to this script so its benchmarks register."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(here, "bench_*.py"))):
+        importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1k,100k", help="Comma-separated scales (default: 1k,100k).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--select", help="Comma-separated benchmark name or group prefixes.")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    load_benchmarks()
+    select = args.select.split(",") if args.select else None
+
+    def report(result):
+        print(f"{result['scale']:>6} {result['name']:<40} median {result['median_s'] * 1000:10.3f} ms"
+              f"  peak {result['peak_kib']:10.1f} KiB", file=sys.stderr)
+
+    results = suite.run(args.scales.split(","), args.repeat, args.seed, select, report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Benchmark registry and runner shared by run_benchmarks.py and later gates.
+
+A benchmark is a function taking a BenchContext and performing the operation
+once; register it with @benchmark. The runner builds one seeded scratch
+database per scale and times every registered benchmark against it.
+Benchmarks that write are registered with isolated=True and run against
+their own copy of it, so the others see the same data whatever runs first
+and however many repeats run.
+"""
+import contextlib
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from financial_goals_tracker import db
+from financial_goals_tracker import synthetic
+
+BENCHMARKS = []
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    func: object
+    ops: int = 1  # Operations performed per call, for per-op rates
+    max_rows: int = None  # Skip at scales with more contribution rows than this
+    setup: object = None  # Called with the context before the counted warm-up, untimed
+    isolated: bool = False  # Runs, setup included, against a copy of the scale's database
+
+
+@dataclass
+class BenchContext:
+    """A populated scratch database and handy samples for benchmarks to use."""
+
+    scale: str
+    rows: int
+    goals: int
+    workdir: str
+    goal_ids: list
+    sample_goal_ids: list = field(default_factory=list)
+    cache: dict = field(default_factory=dict)  # Per-scale setup shared between benchmarks
+
+    def cached(self, key, factory):
+        """Return cache[key], computing it with factory() on first use."""
+        if key not in self.cache:
+            self.cache[key] = factory()
+        return self.cache[key]
+
+
+def benchmark(name, group, ops=1, max_rows=None, setup=None, isolated=False):
+    """Register the decorated function as a benchmark.
+
+    setup, if given, prepares expensive fixtures outside the query counts and
+    timings. Pass isolated=True for benchmarks that change the database.
+    """
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, group, func, ops, max_rows, setup, isolated))
+        return func
+    return decorator
+
+
+def parse_scale(label):
+    """Return the contribution row count for a scale label such as '100k' or '2500'."""
+    label = label.strip().lower()
+    if label in SCALES:
+        return SCALES[label]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1:], 1)
+    return int(float(label.rstrip("km")) * multiplier)
+
+
+def goals_for_rows(rows):
+    """Goals generated for a scale: roughly 100 contributions per goal."""
+    return max(10, rows // 100)
+
+
+def build_context(scale, seed=42, workdir=None):
+    """Create and populate a scratch database for scale; returns a BenchContext.
+
+    The caller must restore db.DB_FILE and remove ctx.workdir (see run()).
+    """
+    rows = parse_scale(scale)
+    goals = goals_for_rows(rows)
+    workdir = workdir or tempfile.mkdtemp(prefix=f"fgt-bench-{scale}-")
+    db.DB_FILE = os.path.join(workdir, "bench.db")
+    goal_ids = synthetic.generate(goals=goals, contributions=rows, basics_history=min(rows, 10_000), seed=seed)
+    step = max(1, len(goal_ids) // 100)
+    return BenchContext(scale, rows, goals, workdir, goal_ids, goal_ids[::step][:100])
+
+
+@contextlib.contextmanager
+def database_copy(ctx, name):
+    """Point db.DB_FILE at a scratch copy of the scale's database while active, then remove it."""
+    shared = db.DB_FILE
+    copy = os.path.join(ctx.workdir, f"{name}.db")
+    shutil.copyfile(shared, copy)
+    db.DB_FILE = copy
+    try:
+        yield copy
+    finally:
+        db.DB_FILE = shared
+        os.remove(copy)
+
+
+class QueryCounter:
+    """Count connections opened and statements run while active.
+
+    Attaches a SQLite trace callback to every connection db.connect_db() opens.
+    Statements are counted as trace events, so each row of an executemany()
+    and each trigger body also counts; the totals are deterministic for a
+    given seed, which is what regression checks need.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.statements = 0
+        self.by_statement = {}
+
+    def _trace(self, sql):
+        self.statements += 1
+        key = " ".join(sql.split())[:80]
+        self.by_statement[key] = self.by_statement.get(key, 0) + 1
+
+    def _hook(self, conn):
+        self.connections += 1
+        conn.set_trace_callback(self._trace)
+
+    def __enter__(self):
+        db.add_connection_hook(self._hook)
+        return self
+
+    def __exit__(self, *exc):
+        db.remove_connection_hook(self._hook)
+
+
+def time_benchmark(bench, ctx, repeat):
+    """Call bench repeat times and return a result dict with timings in seconds.
+
+    One extra untimed call runs first under a QueryCounter and tracemalloc; it
+    doubles as warm-up. peak_kib is the most Python memory it held at once.
+    """
+    if bench.isolated:
+        with database_copy(ctx, bench.name):
+            return _time_benchmark(bench, ctx, repeat)
+    return _time_benchmark(bench, ctx, repeat)
+
+
+def _time_benchmark(bench, ctx, repeat):
+    if bench.setup:
+        bench.setup(ctx)
+    tracemalloc.start()
+    try:
+        with QueryCounter() as counter:
+            bench.func(ctx)
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bench.func(ctx)
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "name": bench.name,
+        "group": bench.group,
+        "scale": ctx.scale,
+        "rows": ctx.rows,
+        "goals": ctx.goals,
+        "repeat": repeat,
+        "ops": bench.ops,
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "ops_per_s": bench.ops / median if median else None,
+        "connections": counter.connections,
+        "statements": counter.statements,
+        "peak_kib": round(peak_kib, 1),
+    }
+
+
+def environment():
+    """Describe the machine and library versions the results came from."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def matches(name, group, select):
+    """Whether a benchmark is included by select, a list of name or group prefixes (None includes all)."""
+    return not select or any(name.startswith(prefix) or group.startswith(prefix) for prefix in select)
+
+
+def run(scales, repeat=3, seed=42, select=None, progress=None):
+    """Run registered benchmarks at each scale and return the results document.
+
+    select, if given, is a list of name or group prefixes to include.
+    progress, if given, is called with each result as it is produced.
+    """
+    original_db_file = db.DB_FILE
+    results = []
+    try:
+        for scale in scales:
+            setup_start = time.perf_counter()
+            ctx = build_context(scale, seed)
+            setup_s = time.perf_counter() - setup_start
+            try:
+                for bench in BENCHMARKS:
+                    if not matches(bench.name, bench.group, select):
+                        continue
+                    if bench.max_rows is not None and ctx.rows > bench.max_rows:
+                        continue
+                    result = time_benchmark(bench, ctx, repeat)
+                    result["setup_s"] = setup_s
+                    results.append(result)
+                    if progress:
+                        progress(result)
+            finally:
+                shutil.rmtree(ctx.workdir, ignore_errors=True)
+    finally:
+        db.DB_FILE = original_db_file
+    return {"environment": environment(), "seed": seed, "repeat": repeat, "results": results}
@@ -0,0 +1,102 @@
+"""Load-test the local goals API and report requests/sec and latency percentiles.
+
+Usage:
+    financial-tracker serve &
+    python scripts/load_test.py --concurrency 32 --duration 10 /goals /portfolio /goals/1/projection
+
+Each client keeps one HTTP/1.1 keep-alive connection open and cycles through
+the given paths. With --etag, clients replay the last ETag they saw via
+If-None-Match, measuring the 304 fast path.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+
+async def _request(reader, writer, host, path, etag=None):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length, response_etag = 0, None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "etag":
+            response_etag = value.strip()
+    if length and status != 304:
+        await reader.readexactly(length)
+    return status, response_etag
+
+
+async def _client(host, port, paths, deadline, use_etag, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            status, etag = await _request(reader, writer, host, path, etags.get(path) if use_etag else None)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if etag:
+                etags[path] = etag
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, paths, concurrency, duration, use_etag=False):
+    """Run the load test and return a results dict."""
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, paths, deadline, use_etag, latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0,
+            "p50": round(percentile(0.50), 3),
+            "p99": round(percentile(0.99), 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0,
+        },
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=["/goals"], help="Request paths to cycle through.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run.")
+    parser.add_argument("--etag", action="store_true", help="Send If-None-Match with the last ETag seen.")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_load_test(args.host, args.port, args.paths, args.concurrency,
+                                        args.duration, args.etag))
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
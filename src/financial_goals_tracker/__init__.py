@@ -1,12 +1,27 @@
 """Financial Goals Tracker package."""
 
 # Import all submodules
+from . import metrics
 from . import db
+from . import async_db
 from . import goals_calculator
 from . import investment_recommendation
+from . import portfolio
+from . import export
+from . import server
+from . import scheduler
+from . import columnar
+from . import milestones
+from . import projections
+from . import pipeline
+from . import statements
+from . import synthetic
+from . import instrumentation
+from . import writer
 
 # Import main last to avoid circular imports
 from . import main
+from . import cli
 
 __version__ = "0.1.0"
-__all__ = ['db', 'goals_calculator', 'investment_recommendation', 'main']
+__all__ = ['metrics', 'db', 'async_db', 'goals_calculator', 'investment_recommendation', 'portfolio', 'export', 'server', 'scheduler', 'columnar', 'milestones', 'projections', 'pipeline', 'statements', 'synthetic', 'instrumentation', 'writer', 'main', 'cli']
@@ -0,0 +1,179 @@
+"""Asyncio facade over the db module, for embedding the tracker in async services.
+
+AsyncDB has a coroutine for each function of the db API listed in READS and
+WRITES. Each one takes the same arguments as its db function, plus an
+optional timeout in seconds:
+
+    async with AsyncDB() as adb:
+        goals = await adb.fetch_goals_page(limit=20, timeout=2)
+        await adb.log_contribution(goal_id, 5000, "2024-06-01")
+
+Reads run on a bounded pool of threads, each holding its own connection,
+which is passed as conn to every READS function. Writes run one at a time,
+in the order they were made, on a single write thread. Reads run in
+parallel with writes and with each other, and writes never wait on one
+another's locks. At most max_pending calls are handed to the threads at
+once; further calls wait on the event loop.
+
+log_contribution() is queued on a writer.GroupCommitWriter instead, so
+contributions logged concurrently are committed together, and returns the
+new contribution's ID once its batch has committed. The write thread still
+queues them in order: a write made after a contribution runs only once that
+contribution has committed.
+
+Cancelling a call, or letting its timeout expire, withdraws it if it hasn't
+started. A read that has started is interrupted (sqlite3 interrupt) and
+raises in its thread. A write that has started runs to completion, so the
+data is never left half written; only the wait for it is abandoned.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from financial_goals_tracker import db
+from financial_goals_tracker import writer
+
+DEFAULT_READERS = 4
+DEFAULT_MAX_PENDING = 64  # Calls handed to the threads at once; the rest wait on the event loop
+
+# db functions run on the read threads; each takes a conn argument
+READS = (
+    "count_goals", "fetch_goals", "fetch_all_goals", "fetch_goal_by_id", "goal_exists", "get_goal_progress",
+    "get_goal_total_contributions", "fetch_contributions", "fetch_all_contributions", "fetch_contribution_series",
+    "fetch_goals_page", "fetch_contributions_page",
+    "fetch_portfolio_rows", "fetch_ledger_events", "goal_ledger_state", "verify_contribution_totals",
+    "fetch_milestone_inputs", "fetch_goal_milestones", "fetch_projection_inputs", "fetch_projection",
+    "search_goals", "search_goals_like", "fx_rate", "convert_amount", "get_data_version", "fetch_basics",
+    "get_basics_status",
+)
+
+# db functions run, one at a time, on the write thread
+WRITES = (
+    "insert_goal", "update_goal", "patch_goals", "patch_goal", "delete_goal", "correct_contribution",
+    "reverse_contribution", "rebuild_contribution_totals", "load_fx_rates",
+    "store_goal_milestones", "store_projections", "update_basic", "update_basic_amount", "import_all_data",
+)
+
+
+class AsyncDB:
+    """Run db functions from coroutines on a bounded read pool and a serialized write lane.
+
+    Use it as an async context manager, or call close() when done.
+    """
+
+    def __init__(self, readers=DEFAULT_READERS, max_pending=DEFAULT_MAX_PENDING, timeout=None):
+        self.timeout = timeout  # Default for calls that don't pass one; None waits indefinitely
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="fgt-db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fgt-db-write")
+        self._group_commit = None  # Started by the first log_contribution(), on the write thread
+        self._batched = []  # Group-commit futures not yet resolved; only touched on the write thread
+        self._pending = asyncio.Semaphore(max_pending)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Wait for running calls to finish, then stop the threads and close their connections."""
+        await asyncio.to_thread(self._shutdown)
+
+    def _shutdown(self):
+        self._readers.shutdown(wait=True, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+        if self._group_commit is not None:
+            self._group_commit.close()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def _connection(self):
+        """The calling read thread's connection, opened on its first call."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = db.connect_db(check_same_thread=False)  # close() runs on the loop's thread
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run_read(self, func, *args, timeout=None, **kwargs):
+        """Run func(*args, **kwargs) on a read thread, passing its connection as conn if func takes one."""
+        takes_conn = "conn" in inspect.signature(func).parameters and "conn" not in kwargs
+        state = {"conn": None, "cancelled": False}  # The connection while func runs, for cancellation to interrupt
+        lock = threading.Lock()
+
+        def call():
+            conn = self._connection()
+            with lock:
+                if state["cancelled"]:
+                    return None  # Picked up just as it was cancelled; the result would be dropped anyway
+                state["conn"] = conn
+            try:
+                return func(*args, **kwargs, **({"conn": conn} if takes_conn else {}))
+            finally:
+                with lock:
+                    state["conn"] = None
+                if conn.in_transaction:
+                    conn.rollback()
+
+        try:
+            return await self._submit(self._readers, call, timeout)
+        except (asyncio.CancelledError, TimeoutError):
+            with lock:
+                state["cancelled"] = True
+                if state["conn"] is not None:
+                    state["conn"].interrupt()
+            raise
+
+    async def run_write(self, func, *args, timeout=None, **kwargs):
+        """Queue func(*args, **kwargs) on the write thread, behind every write queued before it."""
+        def call():
+            concurrent.futures.wait(self._batched)  # Contributions queued earlier commit first
+            return func(*args, **kwargs)
+
+        return await self._submit(self._writer, call, timeout)
+
+    async def log_contribution(self, goal_id, amount, date, fund_name=None, nav=None, currency=None, timeout=None):
+        """Log a contribution through group commit (see db.log_contribution()); returns its contribution ID."""
+        def queue():
+            if self._group_commit is None:
+                self._group_commit = writer.GroupCommitWriter()
+            self._batched = [future for future in self._batched if not future.done()]
+            future = self._group_commit.log_contribution(goal_id, amount, date, fund_name, nav, currency)
+            self._batched.append(future)
+            return future
+
+        timeout = self.timeout if timeout is None else timeout
+        async with asyncio.timeout(timeout):
+            future = await self._submit(self._writer, queue, None)
+            return await asyncio.wrap_future(future)
+
+    async def _submit(self, executor, call, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        async with asyncio.timeout(timeout):
+            async with self._pending:
+                # Cancelling the wrapping future withdraws the call if no thread has picked it up
+                return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+def _mirror(name, run):
+    func = getattr(db, name)
+
+    @functools.wraps(func)
+    async def method(self, *args, **kwargs):
+        return await run(self, func, *args, **kwargs)
+    return method
+
+
+for _name in READS:
+    setattr(AsyncDB, _name, _mirror(_name, AsyncDB.run_read))
+for _name in WRITES:
+    setattr(AsyncDB, _name, _mirror(_name, AsyncDB.run_write))
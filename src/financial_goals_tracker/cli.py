@@ -0,0 +1,358 @@
+import csv
+import json
+import os
+import sys
+
+import click
+
+from financial_goals_tracker import columnar
+from financial_goals_tracker import db
+from financial_goals_tracker import export
+from financial_goals_tracker import instrumentation
+from financial_goals_tracker import main as menus
+from financial_goals_tracker import metrics
+from financial_goals_tracker import milestones
+from financial_goals_tracker import portfolio
+from financial_goals_tracker import projections
+from financial_goals_tracker import scheduler
+from financial_goals_tracker import server
+from financial_goals_tracker import statements
+
+
+@click.group(invoke_without_command=True)
+@click.pass_context
+def cli(ctx):
+    """Financial Goals Tracker. Starts the interactive menu when no command is given."""
+    db.initialize_db()  # Ensure DB is set up
+    if ctx.invoked_subcommand is not None:
+        metrics.ACTIONS.labels("cli", ctx.invoked_subcommand).inc()
+    if ctx.invoked_subcommand is None:
+        projections.enable_background_rebuild()
+        menus.main_menu()
+
+
+@cli.command("goals")
+@click.option("--mode", "modes", multiple=True, type=click.Choice(["SIP", "Lumpsum", "Lumpsum + SIP"]),
+              help="Investment mode to include (repeatable).")
+@click.option("--name", help="Only goals whose name contains this text.")
+@click.option("--min-years", type=int, help="Minimum time horizon (years).")
+@click.option("--max-years", type=int, help="Maximum time horizon (years).")
+@click.option("--min-progress", type=float, help="Minimum progress (%).")
+@click.option("--max-progress", type=float, help="Maximum progress (%).")
+@click.option("--min-cagr", type=float, help="Minimum expected CAGR (%).")
+@click.option("--max-cagr", type=float, help="Maximum expected CAGR (%).")
+@click.option("--sort", "sort_key", type=click.Choice(list(db.GoalQuery.SORT_KEYS)), default="created",
+              show_default=True)
+@click.option("--asc", is_flag=True, help="Sort ascending instead of descending.")
+@click.option("--limit", type=int, help="Return at most this many goals.")
+@click.option("--csv", "as_csv", is_flag=True, help="Write CSV to stdout instead of a table.")
+def goals_command(modes, name, min_years, max_years, min_progress, max_progress,
+                  min_cagr, max_cagr, sort_key, asc, limit, as_csv):
+    """List goals matching the given filters."""
+    query = (db.GoalQuery()
+             .mode(*modes)
+             .name_contains(name)
+             .horizon_between(min_years, max_years)
+             .progress_between(min_progress, max_progress)
+             .cagr_between(min_cagr, max_cagr)
+             .order_by(sort_key, descending=not asc))
+    if limit is not None:
+        query.limit(limit)
+
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(export.GOAL_HEADERS)
+        for page in query.iter_pages():
+            writer.writerows(page)
+        return
+
+    goals = query.fetch(db.goal_row)
+    if not goals:
+        menus.console.print("[yellow]No goals match these filters.[/yellow]")
+        return
+    menus.console.print(menus.goals_table(goals, "Matching Goals"))
+
+
+@cli.command("search")
+@click.argument("text", nargs=-1, required=True)
+@click.option("--limit", type=int, default=20, show_default=True)
+@click.option("--exact", is_flag=True, help="Match whole words only (default: word prefixes).")
+def search_command(text, limit, exact):
+    """Full-text search over goal names, notes and contribution fund names."""
+    text = " ".join(text)
+    results = db.search_goals(text, limit=limit, prefix=not exact)
+    if not results:
+        menus.console.print(f"[yellow]No goals match '{text}'.[/yellow]")
+        return
+    menus.console.print(menus.search_results_table(results, f"Goals matching '{text}'"))
+
+
+@cli.command("ledger")
+@click.argument("goal_id", type=int)
+@click.option("--events/--state-only", "show_events", default=True, help="List the journal too.")
+def ledger_command(goal_id, show_events):
+    """Show a goal's state rebuilt from its ledger journal."""
+    state = db.goal_ledger_state(goal_id)
+    if state is None:
+        raise click.BadParameter(f"goal {goal_id} not found", param_hint="GOAL_ID")
+    click.echo(f"Goal {goal_id}: total {state['total']:,.2f}, units {state['units']:,.4f}, "
+               f"progress {state['progress']:.2f}% ({state['events']} events, {state['tail']} since last snapshot)")
+    if show_events:
+        for event_id, event_type, contribution_id, amount, units, field, old, new, recorded_at in \
+                db.fetch_ledger_events(goal_id):
+            detail = f"{field}: {old} -> {new}" if field else (f"reason: {new}" if new else "")
+            target = f" #{contribution_id}" if contribution_id else ""
+            click.echo(f"{event_id:>8} {recorded_at} {event_type}{target} {amount:+,.2f} {detail}".rstrip())
+
+
+@cli.command("milestones")
+@click.argument("goal_id", type=int, required=False)
+def milestones_command(goal_id):
+    """Recompute every goal's milestone dates, or show one goal's."""
+    if goal_id is None:
+        click.echo(f"Computed milestones for {milestones.compute_milestones()} goal(s).")
+        return
+    if not db.goal_exists(goal_id):
+        raise click.BadParameter(f"goal {goal_id} not found", param_hint="GOAL_ID")
+    for milestone, amount, crossed_on, projected_on in milestones.goal_milestones(goal_id):
+        when = f"crossed {crossed_on}" if crossed_on else (f"projected {projected_on}" if projected_on else "not projected")
+        click.echo(f"{milestone:>4}% {amount:>15,.2f}  {when}")
+
+
+@cli.command("snapshot")
+@click.option("--path", type=click.Path(dir_okay=False), help="Snapshot file (default: next to the database).")
+@click.option("--check", is_flag=True, help="Only report whether the snapshot is current.")
+def snapshot_command(path, check):
+    """Write the memory-mapped ledger snapshot used for analytics."""
+    path = path or columnar.default_snapshot_path()
+    if check:
+        version, current = columnar.snapshot_version(path), db.get_data_version()
+        state = "missing" if version is None else ("current" if version == current else "stale")
+        click.echo(f"{path}: {state} (database version {current})")
+        return
+    version = columnar.write_snapshot(path)
+    ledger = columnar.open_snapshot(path)
+    size = os.path.getsize(path)
+    click.echo(f"Wrote {path}: {len(ledger or ()):,} contributions, {size:,} bytes, version {version}.")
+
+
+@cli.command("correct")
+@click.argument("contribution_id", type=int)
+@click.option("--amount", type=float)
+@click.option("--date", "date_", type=click.DateTime(formats=["%Y-%m-%d"]))
+@click.option("--fund", "fund_name")
+@click.option("--nav", type=float)
+def correct_command(contribution_id, amount, date_, fund_name, nav):
+    """Correct a logged contribution; the change is journaled."""
+    try:
+        delta = db.correct_contribution(contribution_id, amount, date_.strftime("%Y-%m-%d") if date_ else None,
+                                        fund_name, nav)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="CONTRIBUTION_ID")
+    click.echo(f"Corrected contribution {contribution_id} ({delta:+,.2f}).")
+
+
+@cli.command("reverse")
+@click.argument("contribution_id", type=int)
+@click.option("--reason", help="Recorded with the reversal event.")
+def reverse_command(contribution_id, reason):
+    """Reverse a logged contribution; the reversal is journaled."""
+    try:
+        db.reverse_contribution(contribution_id, reason)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="CONTRIBUTION_ID")
+    click.echo(f"Reversed contribution {contribution_id}.")
+
+
+@cli.command("replan")
+@click.option("--goal", "goal_ids", type=int, multiple=True, help="Goal ID to re-plan (repeatable; default: all).")
+@click.option("--cagr", type=float, help="New expected CAGR (%).")
+@click.option("--years", "time_horizon", type=int, help="New time horizon (years).")
+@click.option("--mode", "investment_mode", type=click.Choice(list(db.INVESTMENT_MODES)), help="New investment mode.")
+def replan_command(goal_ids, cagr, time_horizon, investment_mode):
+    """Re-plan goals in one transaction, recomputing their SIP/lumpsum."""
+    changes = {field: value for field, value in (("cagr", cagr), ("time_horizon", time_horizon),
+                                                 ("investment_mode", investment_mode)) if value is not None}
+    try:
+        patched = db.patch_goals(list(goal_ids) or None, changes, replan=True)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    for goal_id, fields in sorted(patched.items()):
+        click.echo(f"{goal_id:>6} " + ", ".join(f"{field}={value}" for field, value in fields.items()))
+    click.echo(f"Re-planned {len(patched)} goal(s).")
+
+
+@cli.command("fx-load")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def fx_load_command(path):
+    """Load exchange rates from a CSV file with date, ccy and rate columns."""
+    try:
+        loaded = db.load_fx_rates(path)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PATH")
+    click.echo(f"Loaded {loaded} rate(s) ({db.BASE_CURRENCY} per unit of each currency).")
+
+
+@cli.command("import-statement")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--config", "config_path", required=True, type=click.Path(exists=True, dir_okay=False),
+              help="JSON column mapping and fund-to-goal rules.")
+@click.option("--errors", "errors_path", type=click.Path(dir_okay=False),
+              help="Write rows that could not be imported to this CSV file.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=statements.DEFAULT_BATCH_SIZE, show_default=True,
+              help="Rows per transaction.")
+@click.option("--dry-run", is_flag=True, help="Parse and validate every row without importing.")
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Processes to parse and validate rows in (quoted fields must not contain line breaks).")
+def import_statement_command(path, config_path, errors_path, batch_size, dry_run, workers):
+    """Import contributions from a broker or bank CSV statement; rows already imported are skipped."""
+    try:
+        mapping = statements.StatementMapping.load(config_path)
+    except (ValueError, json.JSONDecodeError) as e:
+        raise click.BadParameter(str(e), param_hint="--config")
+
+    def progress(result):
+        click.echo(f"{result.rows:,} rows read, {result.imported:,} imported "
+                   f"({result.rows_per_second:,.0f} rows/s)", err=True)
+
+    try:
+        result = statements.import_statement(path, mapping, errors_path, batch_size, dry_run, progress, workers)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PATH")
+    verb = "validated" if dry_run else "imported"
+    click.echo(f"{result.rows:,} rows in {result.elapsed_s:.1f}s: {result.imported:,} {verb}, "
+               f"{result.duplicates:,} already imported, {result.errors:,} error(s).")
+    for stage, stats in result.stages.items():
+        click.echo(f"  {stage}: {stats.rows:,} rows in {stats.busy_s:.1f}s busy ({stats.rows_per_second:,.0f} rows/s), "
+                   f"{stats.waited_s:.1f}s waiting")
+    if result.errors and errors_path:
+        click.echo(f"Rows with errors written to {errors_path}")
+
+
+@cli.command("report")
+@click.option("--json", "json_path", type=click.Path(dir_okay=False), help="Also write the report as JSON.")
+@click.option("--csv", "csv_path", type=click.Path(dir_okay=False), help="Also write per-goal rows as CSV.")
+@click.option("--goals/--summary-only", "show_goals", default=False, help="Print the per-goal table too.")
+@click.option("--currency", default=db.BASE_CURRENCY, show_default=True,
+              help="Report amounts in this currency, at today's rates.")
+def report_command(json_path, csv_path, show_goals, currency):
+    """Print the portfolio health report."""
+    try:
+        report = portfolio.build_report(currency=db.currency_code(currency))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--currency")
+    menus.console.print(menus.portfolio_report_table(report))
+    if show_goals and len(report):
+        menus.console.print(menus.portfolio_goals_table(report.records(), currency=report.currency))
+    if json_path:
+        portfolio.export_json(report, json_path)
+    if csv_path:
+        portfolio.export_csv(report, csv_path)
+
+
+
+@cli.command("export")
+@click.option("--format", "fmt", type=click.Choice(export.EXPORT_FORMATS), default="csv", show_default=True)
+@click.option("--gzip", "compress", is_flag=True, help="Compress the output files.")
+@click.option("--goal", "goal_ids", type=int, multiple=True, help="Goal ID to export (repeatable).")
+@click.option("--from", "start_date", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Earliest contribution date (YYYY-MM-DD).")
+@click.option("--to", "end_date", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Latest contribution date (YYYY-MM-DD).")
+@click.option("--output-dir", type=click.Path(file_okay=False), default=".", show_default=True)
+def export_command(fmt, compress, goal_ids, start_date, end_date, output_dir):
+    """Stream goals and contributions to export files."""
+    os.makedirs(output_dir, exist_ok=True)
+    goals_path = os.path.join(output_dir, export.export_path("goals_export", fmt, compress))
+    contributions_path = os.path.join(output_dir, export.export_path("contributions_export", fmt, compress))
+
+    def report(label):
+        return lambda done, total: click.echo(f"\r{label}: {done:,}/{total:,} rows", nl=False, err=True)
+
+    goals_count = export.export_goals(goals_path, fmt, compress, goal_ids or None, progress=report("goals"))
+    click.echo(err=True)
+    contributions_count = export.export_contributions(contributions_path, fmt, compress, goal_ids or None,
+                                                      start_date, end_date, progress=report("contributions"))
+    click.echo(err=True)
+    click.echo(f"{goals_count} goals -> {goals_path}")
+    click.echo(f"{contributions_count} contributions -> {contributions_path}")
+
+
+
+@cli.command("serve")
+@click.option("--host", default=server.DEFAULT_HOST, show_default=True, help="Loopback address to bind.")
+@click.option("--port", type=int, default=server.DEFAULT_PORT, show_default=True)
+@click.option("--workers", type=int, default=server.DEFAULT_WORKERS, show_default=True,
+              help="Database worker threads (and pooled connections).")
+def serve_command(host, port, workers):
+    """Serve goals, contributions, progress and projections as JSON on localhost."""
+    if not server.is_loopback(host):
+        raise click.BadParameter("only loopback addresses are allowed", param_hint="--host")
+    click.echo(f"Serving on http://{host}:{port} (Ctrl+C to stop)")
+    server.run(host, port, workers)
+
+
+
+@cli.command("sip-run")
+@click.option("--as-of", "as_of", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Catch up to this date instead of today.")
+@click.option("--dry-run", is_flag=True, help="List the instalments that would be logged.")
+@click.option("--daemon", is_flag=True, help="Keep running, catching up every --interval seconds.")
+@click.option("--interval", type=int, default=scheduler.DEFAULT_INTERVAL, show_default=True)
+def sip_run_command(as_of, dry_run, daemon, interval):
+    """Log missed monthly SIP contributions for every SIP goal."""
+    if daemon:
+        scheduler.run_daemon(interval)
+        return
+
+    logged = scheduler.run_catch_up(as_of.date() if as_of else None, dry_run=dry_run)
+    for goal_id, amount, due_date in logged if dry_run else []:
+        click.echo(f"goal {goal_id}: {amount:,.2f} on {due_date}")
+    verb = "Would log" if dry_run else "Logged"
+    click.echo(f"{verb} {len(logged)} SIP contributions across {len({row[0] for row in logged})} goals.")
+
+
+@cli.command("db-stats")
+@click.option("--file", "stats_path", type=click.Path(dir_okay=False),
+              default=lambda: os.environ.get(instrumentation.ENV_STATS_FILE, instrumentation.DEFAULT_STATS_FILE),
+              show_default=instrumentation.DEFAULT_STATS_FILE, help="Stats file written by instrumented runs.")
+@click.option("--top", type=int, default=20, show_default=True, help="Statements to show, by total time.")
+@click.option("--json", "as_json", is_flag=True, help="Print the raw stats as JSON.")
+@click.option("--reset", is_flag=True, help="Delete the stats file.")
+def db_stats_command(stats_path, top, as_json, reset):
+    """Show per-statement query stats and the slow-query log (collected with FGT_DB_STATS=1)."""
+    if reset:
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+        click.echo(f"Removed {stats_path}")
+        return
+
+    stats = instrumentation.merge(instrumentation.load_stats(stats_path), instrumentation.snapshot())
+    if as_json:
+        click.echo(json.dumps(stats, indent=2))
+        return
+    if not stats["statements"]:
+        menus.console.print(f"[yellow]No query stats in {stats_path}. "
+                            f"Run with {instrumentation.ENV_ENABLED}=1 to collect them.[/yellow]")
+        return
+    menus.console.print(menus.query_stats_table(stats, top))
+    for entry in stats["slow_queries"][-top:]:
+        menus.console.print(f"[red]{entry['elapsed_ms']:.1f} ms[/red] at {entry['at']}: {entry['sql']}")
+        for step in entry["plan"] or []:
+            menus.console.print(f"    [dim]{step}[/dim]")
+
+
+@cli.command("metrics")
+@click.option("--textfile", type=click.Path(dir_okay=False),
+              help="Write atomically to this file (for the node_exporter textfile collector) instead of stdout.")
+def metrics_command(textfile):
+    """Print the tracker's metrics in the Prometheus text format."""
+    if textfile:
+        metrics.write_textfile(textfile)
+        click.echo(f"Metrics written to {textfile}")
+    else:
+        click.echo(metrics.render(), nl=False)
+
+
+if __name__ == "__main__":
+    cli()
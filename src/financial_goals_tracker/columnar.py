@@ -0,0 +1,252 @@
+"""Columnar in-memory copy of the contributions ledger, for analytics.
+
+A ColumnarLedger holds one NumPy column per field (goal ID, day number,
+amount in the goal's currency and NAV), 8 bytes each, so a contribution
+costs 32 bytes instead of a tuple of Python objects. Rows are sorted by goal
+and day. An offset index gives each goal's rows as one contiguous slice, so
+per-goal work is a slice rather than a scan or a filter, and whole-ledger
+group-by-goal sums are one np.add.reduceat().
+
+    ledger = ColumnarLedger.load()
+    goal_ids, totals = ledger.totals()
+    days, running_total = ledger.cumulative(goal_id)
+    last_year = ledger.between("2024-01-01", "2024-12-31")
+
+A ledger can also be written to a snapshot file (write_snapshot()) and opened
+again with mmap (open_snapshot()), in which case its columns are read-only
+views of the file's pages: opening costs a header read however large the
+ledger is, and the OS pages data in as it is used. The file is stamped with
+db.get_data_version(), and a snapshot whose stamp no longer matches the
+database is stale. load_snapshot() rewrites stale snapshots.
+
+The file is little-endian, and every section is 8-byte aligned:
+
+    header    SNAPSHOT_HEADER, padded to SNAPSHOT_HEADER_SIZE bytes
+    columns   goal_ids, days (int64), amounts, navs (float64): rows values each
+    goals     goal IDs (int64), one per goal with contributions
+    offsets   row offsets (int64), goals + 1 of them
+"""
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+from financial_goals_tracker import db
+
+COLUMN_DTYPES = (np.dtype("<i8"), np.dtype("<i8"), np.dtype("<f8"), np.dtype("<f8"))  # goal_ids, days, amounts, navs
+
+SNAPSHOT_MAGIC = b"FGTLEDGR"
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_HEADER = struct.Struct("<8sIIqqq")  # magic, format, reserved, data version, rows, goals
+SNAPSHOT_HEADER_SIZE = 64
+
+
+def _fill(columns, chunks):
+    """Copy (goal_id, day, amount, nav) row chunks into columns, in order."""
+    filled = 0
+    for chunk in chunks:
+        rows = np.array(chunk, dtype=np.float64)  # Exact for IDs and day numbers below 2**53
+        for index, column in enumerate(columns):
+            column[filled:filled + len(chunk)] = rows[:, index]
+        filled += len(chunk)
+
+
+@dataclass
+class ColumnarLedger:
+    """Contributions as parallel NumPy columns, sorted by goal and day."""
+
+    goal_ids: np.ndarray  # int64
+    days: np.ndarray  # int64 day numbers (see db.day_number)
+    amounts: np.ndarray  # float64, in the goal's currency
+    navs: np.ndarray  # float64, 0 when none was recorded
+    goals: np.ndarray = None  # Distinct goal IDs, ascending (computed when not given)
+    offsets: np.ndarray = None  # goals[i]'s rows are offsets[i]:offsets[i + 1]
+
+    def __post_init__(self):
+        if self.goals is not None and self.offsets is not None:
+            return
+        starts = np.flatnonzero(np.diff(self.goal_ids)) + 1
+        self.goals = self.goal_ids[np.concatenate(([0], starts))] if len(self) else np.zeros(0, dtype=np.int64)
+        self.offsets = np.concatenate(([0], starts, [len(self)])) if len(self) else np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def load(cls, goal_ids=None, chunk_size=db.LEDGER_CHUNK_ROWS, conn=None):
+        """Load the contributions of goal_ids (default: all) from the database, chunk by chunk.
+
+        Columns are allocated once from the row count, and each chunk of rows
+        is copied in and dropped, so loading never holds more than one chunk
+        of Python tuples.
+        """
+        chunks = db.iter_ledger_chunks(goal_ids, chunk_size, conn)
+        count = next(chunks)
+        columns = [np.empty(count, dtype=dtype) for dtype in COLUMN_DTYPES]
+        _fill(columns, chunks)
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.goal_ids)
+
+    @property
+    def nbytes(self):
+        """Memory held by the columns and the goal index."""
+        return sum(array.nbytes for array in (self.goal_ids, self.days, self.amounts, self.navs,
+                                              self.goals, self.offsets))
+
+    def span(self, goal_id):
+        """Return (start, end): goal_id's rows are start:end in every column (0, 0 when it has none)."""
+        index = np.searchsorted(self.goals, goal_id)
+        if index < len(self.goals) and self.goals[index] == goal_id:
+            return int(self.offsets[index]), int(self.offsets[index + 1])
+        return 0, 0
+
+    def goal(self, goal_id):
+        """Return one goal's rows as a ledger of views into these columns (no copy)."""
+        start, end = self.span(goal_id)
+        return ColumnarLedger(self.goal_ids[start:end], self.days[start:end], self.amounts[start:end],
+                              self.navs[start:end])
+
+    def totals(self):
+        """Return (goal IDs, total contributed) arrays, one entry per goal with contributions."""
+        if not len(self):
+            return self.goals, np.zeros(0)
+        return self.goals, np.add.reduceat(self.amounts, self.offsets[:-1])
+
+    def total(self, goal_id):
+        start, end = self.span(goal_id)
+        return float(self.amounts[start:end].sum())
+
+    def daily(self, goal_id):
+        """Return a goal's contributions summed per day as (datetime64[D] days, amounts) arrays."""
+        start, end = self.span(goal_id)
+        days, amounts = self.days[start:end], self.amounts[start:end]
+        if not len(days):
+            return days.astype("datetime64[D]"), amounts
+        firsts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+        return days[firsts].astype("datetime64[D]"), np.add.reduceat(amounts, firsts)
+
+    def cumulative(self, goal_id):
+        """Return a goal's running total at the end of each day it received contributions."""
+        days, amounts = self.daily(goal_id)
+        return days, np.cumsum(amounts)
+
+    def between(self, start=None, end=None):
+        """Return the rows dated from start to end inclusive (dates or YYYY-MM-DD strings) as a new ledger."""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.days >= db.day_number(start)
+        if end is not None:
+            mask &= self.days <= db.day_number(end)
+        return ColumnarLedger(self.goal_ids[mask], self.days[mask], self.amounts[mask], self.navs[mask])
+
+
+def default_snapshot_path():
+    """The snapshot file next to the database: db.DB_FILE + ".ledger"."""
+    return db.DB_FILE + ".ledger"
+
+
+def _column_views(buffer, rows, start=SNAPSHOT_HEADER_SIZE):
+    return [np.frombuffer(buffer, dtype=dtype, count=rows, offset=start + index * 8 * rows)
+            for index, dtype in enumerate(COLUMN_DTYPES)]
+
+
+def write_snapshot(path=None, chunk_size=db.LEDGER_CHUNK_ROWS, conn=None):
+    """Write every contribution to a snapshot file at path; returns the data version it is stamped with.
+
+    Rows stream from the database straight into the mapped file, one chunk at
+    a time, so writing needs no more memory than a chunk however large the
+    ledger is. The file is written beside path and renamed over it at the
+    end, so readers see either the old snapshot or the new one.
+    """
+    path = path or default_snapshot_path()
+    should_close = conn is None
+    if should_close:
+        conn = db.connect_db()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    began = not conn.in_transaction
+    try:
+        if began:
+            conn.execute("BEGIN")  # The stamp and the rows come from one read transaction
+        version = db.get_data_version(conn)
+        chunks = db.iter_ledger_chunks(chunk_size=chunk_size, conn=conn)
+        rows = next(chunks)
+        with open(temp_path, "w+b") as f:
+            f.truncate(SNAPSHOT_HEADER_SIZE + 32 * rows)
+            with mmap.mmap(f.fileno(), 0) as buffer:
+                columns = _column_views(buffer, rows)
+                _fill(columns, chunks)
+                ledger = ColumnarLedger(*columns)
+                goals, offsets = ledger.goals.astype("<i8"), ledger.offsets.astype("<i8")
+                del ledger, columns  # The map can't close while arrays still point into it
+            f.seek(0, os.SEEK_END)
+            f.write(goals.tobytes())
+            f.write(offsets.tobytes())
+            f.seek(0)
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, 0, version, rows, len(goals)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return version
+    finally:
+        if began:
+            conn.rollback()
+        if should_close:
+            conn.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def snapshot_version(path=None):
+    """Return the data version path was stamped with, or None if it is missing or not a snapshot."""
+    try:
+        with open(path or default_snapshot_path(), "rb") as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version_format, _, version, _, _ = SNAPSHOT_HEADER.unpack(header)
+    return version if (magic, version_format) == (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT) else None
+
+
+def open_snapshot(path=None, conn=None):
+    """Map the snapshot at path and return it as a read-only ColumnarLedger, or None if it is missing or stale.
+
+    No data is copied: the columns and the goal index are NumPy views of the
+    mapped file, which stays mapped while any of them is in use. Raises
+    ValueError if the file is not a snapshot or is truncated.
+    """
+    path = path or default_snapshot_path()
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size < SNAPSHOT_HEADER_SIZE:
+            raise ValueError(f"{path}: not a ledger snapshot")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version_format, _, version, rows, goals = SNAPSHOT_HEADER.unpack_from(buffer)
+    if (magic, version_format) != (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT):
+        raise ValueError(f"{path}: not a ledger snapshot")
+    index_start = SNAPSHOT_HEADER_SIZE + 32 * rows
+    if size != index_start + 8 * (2 * goals + 1):
+        raise ValueError(f"{path}: truncated ledger snapshot")
+    if version != db.get_data_version(conn):
+        return None
+    index = np.frombuffer(buffer, dtype="<i8", count=2 * goals + 1, offset=index_start)
+    return ColumnarLedger(*_column_views(buffer, rows), goals=index[:goals], offsets=index[goals:])
+
+
+def load_snapshot(path=None, conn=None):
+    """Return the ledger from the snapshot at path, writing it first if it is missing or stale.
+
+    If the database changes again before the new snapshot can be opened, the
+    ledger is loaded into memory instead.
+    """
+    ledger = open_snapshot(path, conn)
+    if ledger is None:
+        write_snapshot(path, conn=conn)
+        ledger = open_snapshot(path, conn)
+    return ledger if ledger is not None else ColumnarLedger.load(conn=conn)
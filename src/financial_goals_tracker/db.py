@@ -1,23 +1,331 @@
+import bisect
+import json
+import math
 import sqlite3
-from datetime import datetime
+from datetime import date as date_type, datetime
+from typing import NamedTuple
 import os
+import pathlib
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from rich.console import Console
 import csv
+import numpy as np
+
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import metrics
 
 console = Console()
 
 DB_FILE = "financial_goals.db"
 
-def connect_db():
+# Progress (%) as a SQL expression; GoalQuery must use this exact text so the
+# expression index on goals is usable
+PROGRESS_EXPR = "CASE WHEN target_amount > 0 THEN contributions_total * 100.0 / target_amount ELSE 0 END"
+
+# Tables whose changes bump the data_version counter
+VERSIONED_TABLES = ("goals", "contributions", "financial_basics", "fx_rates")
+
+# Column weights for bm25() over goal_search (goal_name, notes, funds); names rank highest
+SEARCH_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Control characters wrapped around search hits; unlike brackets they can't occur in goal names or notes
+HIT_START, HIT_END = "\x02", "\x03"
+
+# Ledger events per goal between snapshots; bounds the tail a state rebuild reads
+SNAPSHOT_INTERVAL = 256
+
+# Fund units bought by a contribution (0 when no NAV was recorded)
+UNITS_EXPR = "CASE WHEN nav > 0 THEN amount / nav ELSE 0 END"
+
+# Rows per fetchmany() when loading contributions into a columnar.ColumnarLedger
+LEDGER_CHUNK_ROWS = 65536
+
+# Day numbers count days since 1970-01-01, the epoch of NumPy's datetime64[D]
+EPOCH = date_type(1970, 1, 1)
+
+def day_number_sql(column):
+    """SQL expression for a YYYY-MM-DD column's day number; NULL if it isn't a valid date."""
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+def day_number(value):
+    """Return the day number of a date, datetime or YYYY-MM-DD string."""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date_type):
+        value = date_type.fromisoformat(str(value)[:10])
+    return (value - EPOCH).days
+
+INVESTMENT_MODES = ("SIP", "Lumpsum", "Lumpsum + SIP")
+
+# Currency portfolio totals are reported in; fx_rates holds every other currency's rate in it
+BASE_CURRENCY = "INR"
+
+# Goal fields that change the required SIP/lumpsum (see patch_goals)
+PLAN_INPUTS = ("target_amount", "time_horizon", "cagr", "investment_mode")
+
+# Entries kept by the read-through cache of goal rows, contribution totals and basics
+READ_CACHE_SIZE = 1024
+
+# Rows kept in goal_projections; the oldest computed are evicted beyond this
+PROJECTION_CACHE_ROWS = 4096
+
+# Callables run on every new connection (tracing, instrumentation)
+_connection_hooks = []
+
+# Callables run with the goal IDs a write changed, after it commits (see commit_goal_writes)
+_goal_write_hooks = []
+
+# sqlite3.Connection subclass used by connect_db(); see set_connection_factory()
+_connection_factory = sqlite3.Connection
+
+def set_connection_factory(factory):
+    """Use a sqlite3.Connection subclass for new connections (None restores the default)."""
+    global _connection_factory
+    _connection_factory = factory or sqlite3.Connection
+
+def add_connection_hook(hook):
+    """Call hook(conn) on every connection connect_db() opens from now on."""
+    _connection_hooks.append(hook)
+
+def remove_connection_hook(hook):
+    """Stop calling a hook registered with add_connection_hook()."""
+    if hook in _connection_hooks:
+        _connection_hooks.remove(hook)
+
+def add_goal_write_hook(hook):
+    """Call hook(goal_ids) after every committed write to goals or their contributions."""
+    _goal_write_hooks.append(hook)
+
+def remove_goal_write_hook(hook):
+    """Stop calling a hook registered with add_goal_write_hook()."""
+    if hook in _goal_write_hooks:
+        _goal_write_hooks.remove(hook)
+
+def connect_db(check_same_thread=True):
     """Establish a database connection and return the connection object."""
-    return sqlite3.connect(DB_FILE)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=check_same_thread, factory=_connection_factory)
+    metrics.DB_CONNECTIONS.inc()
+    for hook in _connection_hooks:
+        hook(conn)
+    return conn
+
+def count_goals(conn=None):
+    """Return the number of stored goals."""
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM goals").fetchone()[0]
+    finally:
+        if should_close:
+            conn.close()
+
+def _count_goals_for_metrics():
+    """count_goals() on a plain read-only connection, so collecting the gauge isn't counted as a connection."""
+    conn = sqlite3.connect(f"{pathlib.Path(DB_FILE).absolute().as_uri()}?mode=ro", uri=True)
+    try:
+        return count_goals(conn)
+    finally:
+        conn.close()
+
+metrics.GOALS.set_function(_count_goals_for_metrics)
+
+class ConnectionPool:
+    """A fixed-size pool of connections that may be used from any thread.
+
+    Use acquire() as a context manager; it blocks while every connection is in use.
+    """
+
+    def __init__(self, size=4):
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(connect_db(check_same_thread=False))
+
+    @contextmanager
+    def acquire(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._connections.put(conn)
+
+    def close(self):
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+class ReadCache:
+    """Bounded LRU read-through cache for small, hot lookups: goal rows, totals and basics.
+
+    get(key, load) returns the cached value for key, or calls load() and
+    caches its result. Entries are kept correct in two ways:
+
+    - Write functions here commit with commit(conn, keys), which drops exactly
+      the keys their change affects.
+    - Every lookup first runs PRAGMA data_version on a persistent connection.
+      The value changes whenever another connection commits, so a commit made
+      anywhere else (another process, or a writer here that doesn't invalidate)
+      flushes the whole cache. commit() tells its own commit apart from anyone
+      else's with the data_version counter (see initialize_db()), which it
+      reads while its transaction still holds the write lock.
+
+    The cache is safe to use from several threads, and follows DB_FILE.
+    """
+
+    def __init__(self, maxsize=READ_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = self.invalidations = self.flushes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_file = None
+        self._watcher = None
+        self._seen = None  # PRAGMA data_version on the watcher at the last check
+        self._generation = 0  # Bumped by every invalidation, so a load racing one isn't stored
+        self._epoch = 0  # Bumped by every flush; see epoch()
+
+    def _check(self, wait=True):
+        """Flush if another connection committed since the last check. Call with the lock held.
+
+        With wait=False, a locked database raises sqlite3.OperationalError at once.
+        """
+        if self._db_file != DB_FILE:
+            self._close()
+            self._db_file = DB_FILE
+            self._watcher = sqlite3.connect(DB_FILE, check_same_thread=False)
+        if not wait:
+            self._watcher.execute("PRAGMA busy_timeout = 0")
+        try:
+            seen = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            if not wait:
+                self._watcher.execute("PRAGMA busy_timeout = 5000")  # sqlite3.connect()'s default
+        if seen != self._seen:
+            self._flush(counted=self._seen is not None)
+            self._seen = seen
+
+    def _flush(self, counted=True):
+        if self._entries and counted:
+            self.flushes += 1
+            metrics.READ_CACHE_FLUSHES.inc()
+        self._entries.clear()
+        self._generation += 1
+        self._epoch += 1
+
+    def _close(self):
+        if self._watcher is not None:
+            self._watcher.close()
+        self._db_file = self._watcher = self._seen = None
+        self._entries.clear()
+        self._generation += 1
+        self._epoch += 1
+
+    def get(self, key, load):
+        """Return the value cached for key, loading and caching it on a miss."""
+        with self._lock:
+            self._check()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value, generation = self._entries[key], None
+            else:
+                self.misses += 1
+                generation = self._generation
+        if generation is None:
+            metrics.READ_CACHE_LOOKUPS.labels("hit").inc()
+            return value
+        metrics.READ_CACHE_LOOKUPS.labels("miss").inc()
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = value
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def epoch(self):
+        """Return a number that changes whenever the cache is flushed, e.g. for a commit made elsewhere.
+
+        Caches kept outside this one compare it to tell whether they may be
+        stale. Returns None if the database is locked for a commit right now,
+        so the caller can't tell and should read afresh.
+        """
+        with self._lock:
+            try:
+                self._check(wait=False)
+            except sqlite3.OperationalError as e:
+                if e.sqlite_errorcode != sqlite3.SQLITE_BUSY:
+                    raise
+                return None
+            return self._epoch
+
+    def commit(self, conn, keys=()):
+        """Commit conn's write transaction, then drop keys, or everything if someone else committed too."""
+        with self._lock:
+            if not conn.in_transaction:
+                conn.commit()
+                return
+            try:
+                self._check(wait=False)  # conn holds the write lock: no one else can commit until it does
+                version = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+            except sqlite3.OperationalError as e:
+                # A large transaction takes an exclusive lock, which the watcher can't read past until it commits
+                if e.sqlite_errorcode != sqlite3.SQLITE_BUSY:
+                    raise
+                version = None
+            conn.commit()
+            seen = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            current = self._watcher.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+            if current != version:
+                self._flush()  # Another commit landed straight after ours, or ours couldn't be told apart
+            else:
+                for key in keys:
+                    if key in self._entries:
+                        del self._entries[key]
+                        self.invalidations += 1
+                self._generation += 1
+            self._seen = seen
+
+    def clear(self):
+        """Drop every entry and the persistent connection; the next lookup starts afresh."""
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        """Return hit, miss, eviction, invalidation and flush counts, and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "flushes": self.flushes,
+                    "size": len(self._entries), "maxsize": self.maxsize}
+
+read_cache = ReadCache()
+
+def goal_cache_keys(*goal_ids):
+    """read_cache keys holding data about goal_ids: their goal rows and contribution totals."""
+    return [(kind, goal_id) for goal_id in goal_ids for kind in ("goal", "total")]
+
+def commit_goal_writes(conn, goal_ids):
+    """Commit a write to goal_ids through read_cache, then run the goal write hooks."""
+    read_cache.commit(conn, goal_cache_keys(*goal_ids))
+    for hook in _goal_write_hooks:
+        hook(list(goal_ids))
 
 def initialize_db():
     """Create the goals table if it does not exist."""
     conn = connect_db()
     cursor = conn.cursor()
 
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS goals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             goal_name TEXT NOT NULL,
@@ -30,19 +338,39 @@ def initialize_db():
             sip_amount REAL,
             start_date TEXT DEFAULT CURRENT_DATE,
             notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            currency TEXT NOT NULL DEFAULT 'INR',
+            start_day INTEGER GENERATED ALWAYS AS ({day_number_sql("start_date")}) VIRTUAL
         )
     """)
 
-    # Ensure contributions_total column exists (for older databases)
-    cursor.execute("PRAGMA table_info(goals)")
+    # Ensure contributions_total, currency and start_day columns exist (for older databases)
+    cursor.execute("PRAGMA table_xinfo(goals)")
     existing_columns = [row[1] for row in cursor.fetchall()]
     if "contributions_total" not in existing_columns:
         cursor.execute("ALTER TABLE goals ADD COLUMN contributions_total REAL DEFAULT 0")
         conn.commit()
+    if "currency" not in existing_columns:
+        cursor.execute(f"ALTER TABLE goals ADD COLUMN currency TEXT NOT NULL DEFAULT '{BASE_CURRENCY}'")
+        conn.commit()
+    # Integer copies of the dates, computed by SQLite on insert and update, so range
+    # filters compare integers and callers never parse date strings
+    if "start_day" not in existing_columns:
+        cursor.execute(f"""
+            ALTER TABLE goals ADD COLUMN start_day INTEGER
+            GENERATED ALWAYS AS ({day_number_sql("start_date")}) VIRTUAL
+        """)
+        conn.commit()
+
+    # Indexes backing GoalQuery filters and sort keys
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_mode_horizon ON goals (investment_mode, time_horizon)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_cagr ON goals (cagr)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_created_at ON goals (created_at)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_goals_progress ON goals ({PROGRESS_EXPR})")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_start_day ON goals (start_day)")
 
     # Create contributions table
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS contributions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             goal_id INTEGER NOT NULL,
@@ -50,9 +378,36 @@ def initialize_db():
             date TEXT NOT NULL,
             fund_name TEXT,
             nav REAL,
+            currency TEXT,  -- Only set when it differs from the goal's currency
+            import_hash TEXT,  -- Content hash of the statement row it was imported from
+            day INTEGER GENERATED ALWAYS AS ({day_number_sql("date")}) VIRTUAL,
             FOREIGN KEY(goal_id) REFERENCES goals(id) ON DELETE CASCADE
         )
     """)
+    cursor.execute("PRAGMA table_xinfo(contributions)")
+    contribution_columns = [row[1] for row in cursor.fetchall()]
+    for column in ("currency", "import_hash"):
+        if column not in contribution_columns:
+            cursor.execute(f"ALTER TABLE contributions ADD COLUMN {column} TEXT")
+    if "day" not in contribution_columns:
+        cursor.execute(f"""
+            ALTER TABLE contributions ADD COLUMN day INTEGER
+            GENERATED ALWAYS AS ({day_number_sql("date")}) VIRTUAL
+        """)
+
+    # Makes statement re-imports idempotent (see statements.py); manual contributions have no hash
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_contributions_import_hash
+        ON contributions (import_hash) WHERE import_hash IS NOT NULL
+    """)
+
+    # Index backing per-goal totals and keyset pagination of contribution history
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_contributions_goal_date
+        ON contributions (goal_id, date, id)
+    """)
+    # Date-range scans across goals (exports, reports)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contributions_day ON contributions (day)")
 
     # Create basics table with recommendations
     cursor.execute("""
@@ -81,11 +436,702 @@ def initialize_db():
             VALUES (?, ?, ?, ?, ?, ?)
         """, default_basics)
 
+    create_fx_rates_table(cursor)  # Before the version triggers, which cover it
+
+    # Monotonic counter bumped on every change to goals, contributions, basics or
+    # FX rates, so readers (API ETags, caches, ledger snapshots) can tell whether
+    # anything changed
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS bump_version_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+    create_search_index(cursor)
+    create_ledger_journal(cursor)
+    create_milestone_table(cursor)
+    create_projection_table(cursor)
+
+    # Commit before opening a second connection, otherwise it sees the write lock
+    conn.commit()
+
     # Create table for tracking historical changes to basics
     create_basics_history_table()
 
-    conn.commit()
     conn.close()
+    read_cache.clear()  # The file may be a new one at a path the cache has seen
+
+def create_search_index(cursor):
+    """Create the goal_search FTS5 table and the triggers that keep it in sync.
+
+    goal_search holds one row per goal (rowid = goal ID) with its name, notes and
+    the distinct fund names of its contributions. goal_funds counts contributions
+    per (goal, fund), so contribution triggers only touch the FTS row when a fund
+    first appears for a goal or its last contribution goes. Existing data is
+    indexed the first time the table is created. Bulk loads can switch the
+    triggers off with set_search_sync() and rebuild afterwards. Returns False if
+    this SQLite build lacks FTS5, in which case search_goals() falls back to LIKE.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'goal_search'")
+    exists = cursor.fetchone() is not None
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS goal_search
+            USING fts5(goal_name, notes, funds, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+        """)
+    except sqlite3.OperationalError:
+        return False
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS goal_funds (
+            goal_id INTEGER NOT NULL,
+            fund_name TEXT NOT NULL,
+            contributions INTEGER NOT NULL,
+            PRIMARY KEY (goal_id, fund_name)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS search_sync (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            enabled INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO search_sync (id, enabled) VALUES (1, 1)")
+    synced = "(SELECT enabled FROM search_sync WHERE id = 1)"
+
+    funds_of = "(SELECT COALESCE(group_concat(fund_name, ' '), '') FROM goal_funds WHERE goal_id = {})"
+    add_fund = f"""
+        INSERT INTO goal_funds (goal_id, fund_name, contributions)
+        SELECT NEW.goal_id, NEW.fund_name, 1 WHERE NEW.fund_name IS NOT NULL
+        ON CONFLICT (goal_id, fund_name) DO UPDATE SET contributions = contributions + 1;
+        UPDATE goal_search SET funds = {funds_of.format("NEW.goal_id")}
+        WHERE rowid = NEW.goal_id AND NEW.fund_name IS NOT NULL
+          AND (SELECT contributions FROM goal_funds WHERE goal_id = NEW.goal_id AND fund_name = NEW.fund_name) = 1;
+    """
+    remove_fund = f"""
+        UPDATE goal_funds SET contributions = contributions - 1
+        WHERE goal_id = OLD.goal_id AND fund_name = OLD.fund_name;
+        DELETE FROM goal_funds WHERE goal_id = OLD.goal_id AND fund_name = OLD.fund_name AND contributions <= 0;
+        UPDATE goal_search SET funds = {funds_of.format("OLD.goal_id")}
+        WHERE rowid = OLD.goal_id AND OLD.fund_name IS NOT NULL AND NOT EXISTS
+            (SELECT 1 FROM goal_funds WHERE goal_id = OLD.goal_id AND fund_name = OLD.fund_name);
+    """
+    triggers = {
+        "goal_search_goal_insert": f"""
+            AFTER INSERT ON goals WHEN {synced} BEGIN
+                INSERT INTO goal_search (rowid, goal_name, notes, funds)
+                VALUES (NEW.id, NEW.goal_name, COALESCE(NEW.notes, ''), '');
+            END""",
+        "goal_search_goal_update": f"""
+            AFTER UPDATE OF goal_name, notes ON goals WHEN {synced} BEGIN
+                UPDATE goal_search SET goal_name = NEW.goal_name, notes = COALESCE(NEW.notes, '')
+                WHERE rowid = NEW.id;
+            END""",
+        "goal_search_goal_delete": f"""
+            AFTER DELETE ON goals WHEN {synced} BEGIN
+                DELETE FROM goal_search WHERE rowid = OLD.id;
+                DELETE FROM goal_funds WHERE goal_id = OLD.id;
+            END""",
+        "goal_search_contribution_insert": f"""
+            AFTER INSERT ON contributions WHEN NEW.fund_name IS NOT NULL AND {synced} BEGIN {add_fund} END""",
+        "goal_search_contribution_delete": f"""
+            AFTER DELETE ON contributions WHEN OLD.fund_name IS NOT NULL AND {synced} BEGIN {remove_fund} END""",
+        "goal_search_contribution_update": f"""
+            AFTER UPDATE OF goal_id, fund_name ON contributions
+            WHEN (NEW.goal_id IS NOT OLD.goal_id OR NEW.fund_name IS NOT OLD.fund_name) AND {synced}
+            BEGIN {remove_fund} {add_fund} END""",
+    }
+    # Replace triggers whose stored definition differs from the current one (older databases)
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'goal_search_%'")
+    stored = dict(cursor.fetchall())
+    for name, body in triggers.items():
+        sql = f"CREATE TRIGGER {name} {body}"
+        if stored.get(name) != sql:
+            if name in stored:
+                cursor.execute(f"DROP TRIGGER {name}")
+            cursor.execute(sql)
+
+    if not exists:
+        rebuild_search_index(cursor)
+    return True
+
+def rebuild_search_index(cursor):
+    """Repopulate goal_search and goal_funds from goals and contributions."""
+    cursor.execute("DELETE FROM goal_funds")
+    cursor.execute("DELETE FROM goal_search")
+    cursor.execute("""
+        INSERT INTO goal_funds (goal_id, fund_name, contributions)
+        SELECT goal_id, fund_name, COUNT(*) FROM contributions
+        WHERE fund_name IS NOT NULL
+        GROUP BY goal_id, fund_name
+    """)
+    cursor.execute("""
+        INSERT INTO goal_search (rowid, goal_name, notes, funds)
+        SELECT id, goal_name, COALESCE(notes, ''),
+               (SELECT COALESCE(group_concat(fund_name, ' '), '') FROM goal_funds WHERE goal_id = goals.id)
+        FROM goals
+    """)
+
+def set_search_sync(cursor, enabled):
+    """Switch the goal_search triggers on or off; returns False if there is no search index.
+
+    Turning sync back on rebuilds the index, so use this around bulk loads
+    inside the same transaction.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_sync'")
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute("UPDATE search_sync SET enabled = ? WHERE id = 1", (int(enabled),))
+    if enabled:
+        rebuild_search_index(cursor)
+    return True
+
+def create_ledger_journal(cursor):
+    """Create the append-only ledger_events journal and per-goal snapshots.
+
+    Every change to a goal's money or definition is journaled by the function
+    making it: contributions (one event each), corrections and reversals of a
+    contribution (the change in amount and units), and goal edits (field, old
+    and new value). goal_snapshots stores each goal's running totals every
+    SNAPSHOT_INTERVAL events, so goal_ledger_state() reads the latest snapshot
+    plus a short tail instead of the whole history. Databases created before
+    the journal existed get one contribution event per existing contribution.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ledger_events'")
+    exists = cursor.fetchone() is not None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ledger_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER NOT NULL,
+            event_type TEXT CHECK(event_type IN ('contribution', 'correction', 'reversal', 'goal_edit')) NOT NULL,
+            contribution_id INTEGER,
+            amount REAL NOT NULL DEFAULT 0,
+            units REAL NOT NULL DEFAULT 0,
+            field TEXT,
+            old_value TEXT,
+            new_value TEXT,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ledger_events_goal ON ledger_events (goal_id, id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS goal_snapshots (
+            goal_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            units REAL NOT NULL,
+            events INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (goal_id, event_id)
+        ) WITHOUT ROWID
+    """)
+    if not exists:
+        journal_contributions(cursor)
+
+def create_milestone_table(cursor):
+    """Create goal_milestones, the stored output of milestones.compute_milestones().
+
+    One row per goal and milestone (% of target) with the date it was crossed
+    or, if not yet, the projected date. event_id is the goal's latest ledger
+    event when the row was computed; a newer event means the row is stale.
+    as_of is the date projections were made from (see fetch_goal_milestones()).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS goal_milestones (
+            goal_id INTEGER NOT NULL,
+            milestone INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            crossed_on TEXT,
+            projected_on TEXT,
+            event_id INTEGER NOT NULL,
+            as_of TEXT,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (goal_id, milestone)
+        ) WITHOUT ROWID
+    """)
+    if "as_of" not in _stored_columns(cursor, "goal_milestones"):
+        cursor.execute("ALTER TABLE goal_milestones ADD COLUMN as_of TEXT")  # NULL: stale, recomputed on read
+
+def create_projection_table(cursor):
+    """Create goal_projections, the stored output of projections.refresh_projections().
+
+    Rows are looked up by key, a hash of everything a projection depends on
+    (see projections.projection_key()), so a row is never stale: when an
+    input changes, the key does too. event_id is the goal's latest ledger
+    event the row was computed at; rows of an older event can never be
+    looked up again and are dropped by store_projections().
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS goal_projections (
+            key TEXT NOT NULL UNIQUE,
+            goal_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            total_contributions REAL NOT NULL,
+            sip_amount REAL NOT NULL,
+            target_amount REAL NOT NULL,
+            future_value REAL NOT NULL,
+            shortfall REAL NOT NULL,
+            required_sip REAL NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goal_projections_goal ON goal_projections (goal_id, event_id)")
+
+def create_fx_rates_table(cursor):
+    """Create fx_rates: the rate of ccy in BASE_CURRENCY from date until the next rate."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fx_rates (
+            date TEXT NOT NULL,
+            ccy TEXT NOT NULL,
+            rate REAL NOT NULL CHECK(rate > 0),
+            PRIMARY KEY (ccy, date)
+        ) WITHOUT ROWID
+    """)
+
+def currency_code(value):
+    """Return value as an upper-case ISO 4217 code; raises ValueError if it isn't three letters."""
+    code = str(value or "").strip().upper()
+    if not re.fullmatch(r"[A-Z]{3}", code):
+        raise ValueError(f"Invalid currency code: {value!r}")
+    return code
+
+def fx_rate_sql(ccy, on):
+    """SQL expression for ccy's as-of rate on date on: one seek on the fx_rates primary key."""
+    return (f"(CASE WHEN {ccy} = '{BASE_CURRENCY}' THEN 1.0 ELSE "
+            f"(SELECT fx.rate FROM fx_rates fx WHERE fx.ccy = {ccy} AND fx.date <= {on} "
+            f"ORDER BY fx.date DESC LIMIT 1) END)")
+
+def goal_amount_sql(table):
+    """SQL expression for a contributions row's amount in its goal's currency.
+
+    Contributions in the goal's currency (currency IS NULL) are used as is;
+    others are converted at the rates in force on the contribution date. The
+    result is NULL if fx_rates has no rate that early.
+    """
+    goal_currency = f"(SELECT gc.currency FROM goals gc WHERE gc.id = {table}.goal_id)"
+    return (f"(CASE WHEN {table}.currency IS NULL THEN {table}.amount ELSE {table}.amount * "
+            f"{fx_rate_sql(f'{table}.currency', f'{table}.date')} / {fx_rate_sql(goal_currency, f'{table}.date')} END)")
+
+# A contribution's amount in its goal's currency, for queries over the bare contributions table
+GOAL_AMOUNT_EXPR = goal_amount_sql("contributions")
+
+def goal_total_sql(table):
+    """SQL expression summing the contributions of table's goal row in its currency."""
+    return f"(SELECT COALESCE(SUM({GOAL_AMOUNT_EXPR}), 0) FROM contributions WHERE goal_id = {table}.id)"
+
+# (DB_FILE, currency) -> (read_cache epoch, (dates, rates) lists) loaded from fx_rates; see fx_rate()
+_fx_cache = {}
+
+def clear_fx_cache():
+    """Forget cached rates; load_fx_rates() and restores call this."""
+    _fx_cache.clear()
+
+def fx_rate(ccy, on, conn=None):
+    """Return ccy's rate in BASE_CURRENCY in force on date on (the latest rate dated on or before it).
+
+    Each currency's rates are read once and then looked up by binary search in
+    memory. They are read again once read_cache has been flushed since, so
+    rates loaded by another process are picked up. Raises ValueError if there
+    is no rate that early.
+    """
+    if ccy == BASE_CURRENCY:
+        return 1.0
+    epoch = read_cache.epoch()
+    cached = _fx_cache.get((DB_FILE, ccy))
+    if cached is not None and epoch is not None and cached[0] == epoch:
+        series = cached[1]
+    else:
+        should_close = conn is None
+        if should_close:
+            conn = connect_db()
+        try:
+            rows = conn.execute("SELECT date, rate FROM fx_rates WHERE ccy = ? ORDER BY date", (ccy,)).fetchall()
+        finally:
+            if should_close:
+                conn.close()
+        series = ([row[0] for row in rows], [row[1] for row in rows])
+        if epoch is not None:
+            _fx_cache[DB_FILE, ccy] = (epoch, series)
+    on = on.isoformat() if isinstance(on, date_type) else str(on)[:10]
+    index = bisect.bisect_right(series[0], on) - 1
+    if index < 0:
+        raise ValueError(f"No {ccy} exchange rate on or before {on}")
+    return series[1][index]
+
+def convert_amount(amount, from_ccy, to_ccy, on, conn=None):
+    """Convert amount from one currency to another at the rates in force on date on."""
+    if from_ccy == to_ccy:
+        return amount
+    return amount * fx_rate(from_ccy, on, conn) / fx_rate(to_ccy, on, conn)
+
+def load_fx_rates(path):
+    """Bulk-load rates from a CSV file with date, ccy and rate columns (header required), in one transaction.
+
+    A rate already stored for the same currency and date is replaced. Rates for
+    BASE_CURRENCY are always 1 and are skipped. Raises ValueError naming the
+    first bad line; nothing is loaded then. Returns the number of rates loaded.
+    """
+    def parse(reader):
+        for line, row in enumerate(reader, start=2):
+            try:
+                day = datetime.strptime(row["date"].strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+                ccy = currency_code(row["ccy"])
+                rate = float(row["rate"])
+                if not rate > 0:
+                    raise ValueError(f"rate must be positive, got {rate}")
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{path}, line {line}: {e}")
+            if ccy != BASE_CURRENCY:
+                yield day, ccy, rate
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            missing = {"date", "ccy", "rate"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+            cursor.executemany("INSERT OR REPLACE INTO fx_rates (date, ccy, rate) VALUES (?, ?, ?)", parse(reader))
+            loaded = cursor.rowcount
+        conn.commit()
+        return loaded
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+        clear_fx_cache()
+
+def journal_contributions(cursor, after_id=0):
+    """Journal a contribution event for every contribution with ID above after_id.
+
+    Bulk inserts (restores, SIP catch-up, synthetic data) call this once after
+    their executemany() instead of journaling row by row.
+    """
+    cursor.execute(f"""
+        INSERT INTO ledger_events (goal_id, event_type, contribution_id, amount, units)
+        SELECT goal_id, 'contribution', id, {GOAL_AMOUNT_EXPR}, {UNITS_EXPR}
+        FROM contributions
+        WHERE id > ?
+        ORDER BY id
+    """, (after_id,))
+    if cursor.rowcount > 0:
+        # The new events have consecutive IDs ending at lastrowid
+        take_due_snapshots(cursor, after_event_id=cursor.lastrowid - cursor.rowcount)
+
+def record_event(cursor, goal_id, event_type, contribution_id=None, amount=0, units=0,
+                 field=None, old_value=None, new_value=None):
+    """Append one event to the journal and snapshot the goal if it is due."""
+    cursor.execute("""
+        INSERT INTO ledger_events
+        (goal_id, event_type, contribution_id, amount, units, field, old_value, new_value)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (goal_id, event_type, contribution_id, amount, units, field, old_value, new_value))
+    take_due_snapshots(cursor, goal_id)
+
+def take_due_snapshots(cursor, goal_id=None, after_event_id=0):
+    """Snapshot every goal (or just goal_id) with SNAPSHOT_INTERVAL or more events since its last snapshot.
+
+    after_event_id limits the check to goals with events after it, so a bulk
+    insert only looks at the goals it touched instead of the whole journal.
+    """
+    if goal_id is not None:
+        # Seek straight to the tail: (goal_id, id > last snapshot) on idx_ledger_events_goal
+        cursor.execute("""
+            SELECT event_id, total, units, events FROM goal_snapshots
+            WHERE goal_id = ? ORDER BY event_id DESC LIMIT 1
+        """, (goal_id,))
+        event_id, total, units, events = cursor.fetchone() or (0, 0, 0, 0)
+        cursor.execute("""
+            INSERT INTO goal_snapshots (goal_id, event_id, total, units, events)
+            SELECT goal_id, MAX(id), ? + SUM(amount), ? + SUM(units), ? + COUNT(*)
+            FROM ledger_events
+            WHERE goal_id = ? AND id > ?
+            GROUP BY goal_id
+            HAVING COUNT(*) >= ?
+        """, (total, units, events, goal_id, event_id, SNAPSHOT_INTERVAL))
+        return
+
+    cursor.execute("""
+        WITH touched AS (
+            SELECT DISTINCT goal_id FROM ledger_events WHERE id > ?
+        ),
+        latest AS (
+            SELECT t.goal_id, s.event_id, s.total, s.units, s.events
+            FROM touched t
+            LEFT JOIN goal_snapshots s ON s.goal_id = t.goal_id
+                AND s.event_id = (SELECT MAX(event_id) FROM goal_snapshots WHERE goal_id = t.goal_id)
+        )
+        INSERT INTO goal_snapshots (goal_id, event_id, total, units, events)
+        SELECT l.goal_id, MAX(e.id), COALESCE(l.total, 0) + SUM(e.amount),
+               COALESCE(l.units, 0) + SUM(e.units), COALESCE(l.events, 0) + COUNT(*)
+        FROM latest l
+        JOIN ledger_events e ON e.goal_id = l.goal_id AND e.id > COALESCE(l.event_id, 0)
+        GROUP BY l.goal_id
+        HAVING COUNT(*) >= ?
+    """, (after_event_id, SNAPSHOT_INTERVAL))
+
+def goal_ledger_state(goal_id, conn=None, use_snapshots=True):
+    """Rebuild a goal's current state from its latest snapshot plus the events after it.
+
+    Returns a dict with total, units, progress (% of the current target),
+    events (journal length) and tail (events read past the snapshot), or None
+    if the goal does not exist. use_snapshots=False replays the whole journal.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        row = conn.execute("""
+            WITH snapshot AS (
+                SELECT event_id, total, units, events FROM goal_snapshots
+                WHERE goal_id = :goal_id AND :use_snapshots
+                ORDER BY event_id DESC
+                LIMIT 1
+            ),
+            tail AS (
+                SELECT COALESCE(SUM(amount), 0) AS total, COALESCE(SUM(units), 0) AS units, COUNT(*) AS events
+                FROM ledger_events
+                WHERE goal_id = :goal_id AND id > COALESCE((SELECT event_id FROM snapshot), 0)
+            )
+            SELECT g.target_amount,
+                   COALESCE((SELECT total FROM snapshot), 0) + tail.total,
+                   COALESCE((SELECT units FROM snapshot), 0) + tail.units,
+                   COALESCE((SELECT events FROM snapshot), 0) + tail.events,
+                   tail.events
+            FROM goals g, tail
+            WHERE g.id = :goal_id
+        """, {"goal_id": goal_id, "use_snapshots": int(use_snapshots)}).fetchone()
+    finally:
+        if should_close:
+            conn.close()
+    if row is None:
+        return None
+    target_amount, total, units, events, tail = row
+    return {
+        "goal_id": goal_id,
+        "total": round(total, 2),
+        "units": round(units, 4),
+        "progress": round(total / target_amount * 100, 2) if target_amount > 0 else 0,
+        "events": events,
+        "tail": tail,
+    }
+
+def fetch_ledger_events(goal_id, conn=None):
+    """Return a goal's journal, oldest first, as
+    (id, event_type, contribution_id, amount, units, field, old_value, new_value, recorded_at) rows."""
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        return conn.execute("""
+            SELECT id, event_type, contribution_id, amount, units, field, old_value, new_value, recorded_at
+            FROM ledger_events WHERE goal_id = ? ORDER BY id
+        """, (goal_id,)).fetchall()
+    finally:
+        if should_close:
+            conn.close()
+
+def verify_contribution_totals(conn=None):
+    """Return (goal_id, contributions_total, journal_total) for goals whose stored total disagrees with the journal."""
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        return conn.execute("""
+            SELECT g.id, g.contributions_total, COALESCE(SUM(e.amount), 0) AS journal_total
+            FROM goals g
+            LEFT JOIN ledger_events e ON e.goal_id = g.id
+            GROUP BY g.id
+            HAVING ABS(g.contributions_total - journal_total) > 0.005
+        """).fetchall()
+    finally:
+        if should_close:
+            conn.close()
+
+def rebuild_contribution_totals():
+    """Reset every goal's contributions_total from its journal state; returns the goals changed."""
+    conn = connect_db()
+    try:
+        mismatched = verify_contribution_totals(conn)
+        for goal_id, _, _ in mismatched:
+            state = goal_ledger_state(goal_id, conn)
+            conn.execute("UPDATE goals SET contributions_total = ? WHERE id = ?", (state["total"], goal_id))
+        conn.commit()
+        return len(mismatched)
+    finally:
+        conn.close()
+
+def _fetch_contribution(cursor, contribution_id):
+    cursor.execute("""
+        SELECT c.goal_id, c.amount, c.date, c.fund_name, c.nav, c.currency, g.currency
+        FROM contributions c JOIN goals g ON g.id = c.goal_id
+        WHERE c.id = ?
+    """, (contribution_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Contribution {contribution_id} not found")
+    return row
+
+def _goal_currency(cursor, goal_id):
+    cursor.execute("SELECT currency FROM goals WHERE id = ?", (goal_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Goal {goal_id} not found")
+    return row[0]
+
+def _units(amount, nav):
+    return amount / nav if nav else 0
+
+def correct_contribution(contribution_id, amount=None, date=None, fund_name=None, nav=None):
+    """Correct a logged contribution's fields, journaling the change in amount and units.
+
+    Fields left as None keep their current value. Returns the correction event's amount delta.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        goal_id, old_amount, old_date, old_fund, old_nav, currency, goal_currency = \
+            _fetch_contribution(cursor, contribution_id)
+        old = {"amount": old_amount, "date": old_date, "fund_name": old_fund, "nav": old_nav}
+        new = {field: value if value is not None else old[field]
+               for field, value in (("amount", amount), ("date", date), ("fund_name", fund_name), ("nav", nav))}
+        changed = [field for field in old if new[field] != old[field]]
+        if not changed:
+            return 0
+
+        cursor.execute("""
+            UPDATE contributions SET amount = ?, date = ?, fund_name = ?, nav = ? WHERE id = ?
+        """, (new["amount"], new["date"], new["fund_name"], new["nav"], contribution_id))
+        # In the goal's currency, at each version's date
+        delta = (convert_amount(new["amount"], currency or goal_currency, goal_currency, new["date"], conn)
+                 - convert_amount(old_amount, currency or goal_currency, goal_currency, old_date, conn))
+        cursor.execute("UPDATE goals SET contributions_total = contributions_total + ? WHERE id = ?",
+                       (delta, goal_id))
+        record_event(cursor, goal_id, "correction", contribution_id, delta,
+                     _units(new["amount"], new["nav"]) - _units(old_amount, old_nav),
+                     ",".join(changed), json.dumps({f: old[f] for f in changed}),
+                     json.dumps({f: new[f] for f in changed}))
+        commit_goal_writes(conn, [goal_id])
+        return delta
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def reverse_contribution(contribution_id, reason=None):
+    """Reverse a logged contribution: remove it and journal the negated amount and units."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        goal_id, amount, date, fund_name, nav, currency, goal_currency = _fetch_contribution(cursor, contribution_id)
+        goal_amount = convert_amount(amount, currency or goal_currency, goal_currency, date, conn)
+        cursor.execute("DELETE FROM contributions WHERE id = ?", (contribution_id,))
+        cursor.execute("UPDATE goals SET contributions_total = contributions_total - ? WHERE id = ?",
+                       (goal_amount, goal_id))
+        record_event(cursor, goal_id, "reversal", contribution_id, -goal_amount, -_units(amount, nav),
+                     old_value=json.dumps({"amount": amount, "date": date, "fund_name": fund_name, "nav": nav}),
+                     new_value=reason)
+        commit_goal_writes(conn, [goal_id])
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def search_terms(text):
+    """Split free text into search terms (letters and digits only)."""
+    return re.findall(r"\w+", text or "")
+
+def fts_query(text, prefix=True):
+    """Build an FTS5 MATCH expression requiring every term; prefix=True matches word starts."""
+    return " ".join(f'"{term}"' + ("*" if prefix else "") for term in search_terms(text))
+
+def search_goals(text, limit=20, prefix=True, conn=None):
+    """Full-text search over goal names, notes and contribution fund names.
+
+    Every word in text must match (as a word prefix unless prefix=False).
+    Returns up to limit rows in fetch_goals_page() column order, best match
+    first, each followed by its bm25 score (lower is better) and the field
+    that matched, with hits wrapped in HIT_START and HIT_END.
+    """
+    query = fts_query(text, prefix)
+    if not query:
+        return []
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        try:
+            # Rank every match first, then highlight only the rows kept
+            return conn.execute(f"""
+                WITH ranked AS (
+                    SELECT rowid AS goal_id, bm25(goal_search, {", ".join(map(str, SEARCH_WEIGHTS))}) AS score
+                    FROM goal_search
+                    WHERE goal_search MATCH :q
+                    ORDER BY score
+                    LIMIT :limit
+                )
+                SELECT {goal_columns_sql("g", goal_total_sql("g"))},
+                       r.score,
+                       -- Hits are wrapped in char(2) (HIT_START) and char(3) (HIT_END)
+                       CASE WHEN instr(highlight(goal_search, 0, char(2), ''), char(2))
+                            THEN highlight(goal_search, 0, char(2), char(3))
+                            WHEN instr(highlight(goal_search, 1, char(2), ''), char(2))
+                            THEN snippet(goal_search, 1, char(2), char(3), '...', 8)
+                            ELSE snippet(goal_search, 2, char(2), char(3), '...', 8) END
+                FROM ranked r
+                JOIN goal_search ON goal_search.rowid = r.goal_id AND goal_search MATCH :q
+                JOIN goals g ON g.id = r.goal_id
+                ORDER BY r.score, g.id DESC
+            """, {"q": query, "limit": limit}).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            return search_goals_like(text, limit, conn)
+    finally:
+        if should_close:
+            conn.close()
+
+def search_goals_like(text, limit=20, conn=None):
+    """Unranked LIKE scan equivalent of search_goals(), for builds without FTS5 and for comparison."""
+    terms = search_terms(text)
+    if not terms:
+        return []
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        conditions = []
+        params = []
+        for term in terms:
+            conditions.append("""(g.goal_name LIKE ? OR g.notes LIKE ? OR EXISTS
+                (SELECT 1 FROM contributions c WHERE c.goal_id = g.id AND c.fund_name LIKE ?))""")
+            params += [f"%{term}%"] * 3
+        return conn.execute(f"""
+            SELECT {goal_columns_sql("g", goal_total_sql("g"))},
+                   NULL, NULL
+            FROM goals g
+            WHERE {" AND ".join(conditions)}
+            ORDER BY g.id DESC
+            LIMIT ?
+        """, params + [limit]).fetchall()
+    finally:
+        if should_close:
+            conn.close()
 
 def insert_goal(goal_data):
     """Insert a new financial goal into the database."""
@@ -94,8 +1140,9 @@ def insert_goal(goal_data):
 
     cursor.execute("""
         INSERT INTO goals 
-        (goal_name, target_amount, time_horizon, cagr, investment_mode, initial_investment, sip_amount, start_date, notes) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        (goal_name, target_amount, time_horizon, cagr, investment_mode, initial_investment, sip_amount, start_date, notes,
+         currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         goal_data["goal_name"],
         goal_data["target_amount"],
@@ -105,26 +1152,73 @@ def insert_goal(goal_data):
         goal_data["initial_investment"],
         goal_data["sip_amount"],  # <-- Updated to match get_user_input()
         goal_data["start_date"],
-        goal_data["notes"]
+        goal_data["notes"],
+        currency_code(goal_data.get("currency", BASE_CURRENCY))
     ))
 
-    conn.commit()  # <-- Ensure this line exists
+    commit_goal_writes(conn, [cursor.lastrowid])  # A miss for the new ID may be cached
     conn.close()
 
-def fetch_goals():
+class Goal(NamedTuple):
+    """A goal row, with its columns in GOAL_COLUMNS order.
+
+    Still a tuple, so it indexes and unpacks like the plain rows, and its
+    fields are typed and readable by name. NamedTuple classes have empty
+    __slots__, so a Goal takes no more memory than the tuple it replaces.
+    """
+
+    id: int
+    goal_name: str
+    target_amount: float
+    time_horizon: int
+    cagr: float
+    investment_mode: str
+    initial_investment: float
+    sip_amount: float
+    start_date: str
+    created_at: str
+    notes: str
+    contributions_total: float
+    currency: str  # The target, plan and contributions_total are in this currency
+
+    @property
+    def progress(self):
+        """Contributions as a % of the target (0 for a zero target)."""
+        return (self.contributions_total or 0) / self.target_amount * 100 if self.target_amount > 0 else 0
+
+# Canonical column projection of goal rows: every goal listing selects these, in this order
+GOAL_COLUMNS = Goal._fields
+
+def goal_row(cursor, row):
+    """sqlite3 row factory building a Goal from each row as the cursor yields it."""
+    return Goal(*row)
+
+def goal_columns_sql(alias=None, total=None):
+    """The GOAL_COLUMNS select list, qualified by a table alias if given.
+
+    total, if given, is an SQL expression selected in place of contributions_total.
+    """
+    columns = [f"{alias}.{column}" if alias else column for column in GOAL_COLUMNS]
+    if total:
+        columns[GOAL_COLUMNS.index("contributions_total")] = total
+    return ", ".join(columns)
+
+def fetch_goals(conn=None):
     """Retrieve all saved financial goals from the database, ensuring correct column order."""
-    conn = connect_db()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT id, goal_name, target_amount, time_horizon, cagr, investment_mode,
-               initial_investment, sip_amount, start_date, created_at, notes, contributions_total
+    cursor.execute(f"""
+        SELECT {goal_columns_sql()}
         FROM goals
         ORDER BY created_at DESC
     """)
 
     goals = cursor.fetchall()
-    conn.close()
+    if should_close:
+        conn.close()
     return goals
 
 def delete_goal(goal_id):
@@ -133,65 +1227,211 @@ def delete_goal(goal_id):
     cursor = conn.cursor()
 
     cursor.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
-    conn.commit()
+    cursor.execute("DELETE FROM goal_milestones WHERE goal_id = ?", (goal_id,))
+    cursor.execute("DELETE FROM goal_projections WHERE goal_id = ?", (goal_id,))
+    commit_goal_writes(conn, [goal_id])
     conn.close()
 
-def goal_exists(goal_id):
-    """Check if a goal with the given ID exists in the database."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT COUNT(*) FROM goals WHERE id = ?", (goal_id,))
-    exists = cursor.fetchone()[0] > 0
-
-    conn.close()
-    return exists
+def goal_exists(goal_id, conn=None):
+    """Check if a goal with the given ID exists in the database (answered from read_cache when it can be)."""
+    return fetch_goal_by_id(goal_id, conn) is not None
 
 def update_goal(goal_id, field, new_value):
     """Update a specific field of a goal in the database."""
-    conn = connect_db()
-    cursor = conn.cursor()
+    patch_goals([goal_id], {field: new_value}, replan=False)
+
+def _text_field(field, value, required=False):
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"{field} cannot be empty")
+    return value
 
-    # Ensure only allowed fields can be updated
-    allowed_fields = ["goal_name", "target_amount", "time_horizon", "cagr",
-                      "investment_mode", "initial_investment", "sip_amount", "start_date", "notes"]
+def _number_field(field, value, cast=float, positive=False, maximum=None):
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    if not math.isfinite(number):  # SQLite would store NaN as NULL
+        raise ValueError(f"{field} must be a finite number, got {value!r}")
+    if cast is int:
+        if not number.is_integer():
+            raise ValueError(f"{field} must be a whole number, got {value!r}")
+        number = int(number)
+    if number < 0 or (positive and number == 0):
+        raise ValueError(f"{field} must be {'greater than' if positive else 'at least'} 0")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{field} must be at most {maximum}")
+    return number
+
+def _mode_field(field, value):
+    value = str(value).strip()
+    value = {"SIP + Lumpsum": "Lumpsum + SIP"}.get(value, value)  # Label used by the add-goal menu
+    if value not in INVESTMENT_MODES:
+        raise ValueError(f"{field} must be one of {', '.join(INVESTMENT_MODES)}")
+    return value
+
+def _date_field(field, value):
+    value = str(value).strip()
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{field} must be a YYYY-MM-DD date, got {value!r}")
+    return value
+
+# Editable goal fields and their validators: validator(field, value) -> value to store
+GOAL_FIELD_VALIDATORS = {
+    "goal_name": lambda f, v: _text_field(f, v, required=True),
+    "target_amount": lambda f, v: _number_field(f, v, positive=True),
+    "time_horizon": lambda f, v: _number_field(f, v, cast=int, positive=True),
+    "cagr": lambda f, v: _number_field(f, v, maximum=100),
+    "investment_mode": _mode_field,
+    "initial_investment": _number_field,
+    "sip_amount": _number_field,
+    "start_date": _date_field,
+    "notes": _text_field,
+}
+
+REAL_GOAL_FIELDS = ("target_amount", "cagr", "initial_investment", "sip_amount")
+
+def validate_goal_changes(changes):
+    """Return changes with every value validated and converted; raises ValueError on the first bad one."""
+    validated = {}
+    for field, value in changes.items():
+        if field not in GOAL_FIELD_VALIDATORS:
+            raise ValueError(f"Invalid field: {field}")
+        validated[field] = GOAL_FIELD_VALIDATORS[field](field, value)
+    return validated
+
+def _plan_function(index):
+    """SQL function returning plan_investments()[index], or NULL when the inputs can't be planned."""
+    def plan(investment_mode, target_amount, time_horizon, cagr, lumpsum_amount):
+        try:
+            return goals_calculator.plan_investments(investment_mode, target_amount, time_horizon,
+                                                     cagr, lumpsum_amount)[index]
+        except (ArithmeticError, TypeError, ValueError):
+            return None
+    return plan
+
+def patch_goals(goal_ids, changes, replan=None):
+    """Apply validated field changes to many goals in one UPDATE statement and transaction.
+
+    goal_ids is a list of IDs, or None for every goal. When replan is true, or
+    None and changes touch a PLAN_INPUTS field, each goal's initial_investment and
+    sip_amount are recomputed with goals_calculator.plan_investments() in the same
+    statement, unless changes sets them explicitly (an explicit initial_investment
+    is kept as the lumpsum of a "Lumpsum + SIP" goal). Every changed field,
+    derived ones included, is journaled as a goal_edit event. Returns
+    {goal_id: {field: new value}} for the goals that changed.
+    """
+    changes = validate_goal_changes(changes)
+    if replan is None:
+        replan = any(field in changes for field in PLAN_INPUTS)
+    if not changes and not replan:
+        return {}
+
+    fields = list(GOAL_FIELD_VALIDATORS)
+    assignments = [f"{field} = :{field}" for field in changes]
+    if replan:
+        # SET expressions see the old row, so pass new values where they change
+        inputs = ", ".join(f":{field}" if field in changes else field for field in
+                           ("investment_mode", "target_amount", "time_horizon", "cagr", "initial_investment"))
+        for index, field in enumerate(("initial_investment", "sip_amount")):
+            if field not in changes:
+                assignments.append(f"{field} = COALESCE(plan_investment_{index}({inputs}), {field})")
+    where = "id IN (SELECT value FROM json_each(:goal_ids))" if goal_ids is not None else "1"
+    params = dict(changes, goal_ids=json.dumps([int(goal_id) for goal_id in goal_ids or []]))
 
-    if field not in allowed_fields:
+    conn = connect_db()
+    for index in range(2):
+        conn.create_function(f"plan_investment_{index}", 5, _plan_function(index), deterministic=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")  # Old values read below stay current until commit
+        cursor.execute(f"SELECT id, {', '.join(fields)} FROM goals WHERE {where}", params)
+        old_rows = {row[0]: row[1:] for row in cursor.fetchall()}
+        # RETURNING skips REAL affinity (whole numbers come back as int), so select REAL columns as + 0.0
+        returning = ", ".join(f"{field} + 0.0" if field in REAL_GOAL_FIELDS else field for field in fields)
+        cursor.execute(f"UPDATE goals SET {', '.join(assignments)} WHERE {where} RETURNING id, {returning}", params)
+        new_rows = cursor.fetchall()
+
+        patched, events = {}, []
+        for goal_id, *new_values in new_rows:
+            diff = {field: (old, new) for field, old, new in zip(fields, old_rows[goal_id], new_values) if old != new}
+            if diff:
+                patched[goal_id] = {field: new for field, (_, new) in diff.items()}
+                events.extend((goal_id, field, json.dumps(old), json.dumps(new)) for field, (old, new) in diff.items())
+        cursor.executemany("""
+            INSERT INTO ledger_events (goal_id, event_type, field, old_value, new_value)
+            VALUES (?, 'goal_edit', ?, ?, ?)
+        """, events)
+        if len(patched) == 1:
+            take_due_snapshots(cursor, next(iter(patched)))
+        elif patched:
+            take_due_snapshots(cursor)
+        commit_goal_writes(conn, patched)
+        return patched
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
         conn.close()
-        raise ValueError(f"Invalid field: {field}")
 
-    query = f"UPDATE goals SET {field} = ? WHERE id = ?"
-    cursor.execute(query, (new_value, goal_id))
+def patch_goal(goal_id, changes, replan=None):
+    """Apply validated field changes to one goal atomically; see patch_goals(). Returns the changed fields."""
+    return patch_goals([goal_id], changes, replan).get(goal_id, {})
 
-    conn.commit()
-    conn.close()
+def add_contribution(conn, goal_id, amount, date, fund_name=None, nav=None, currency=None):
+    """Insert a contribution, journal it and update its goal's total on conn, without committing.
 
-def log_contribution(goal_id, amount, date, fund_name=None, nav=None):
-    """Log a new contribution and update the total contributions in the goals table."""
-    conn = connect_db()
+    Returns (contribution ID, amount in the goal's currency). See log_contribution().
+    """
     cursor = conn.cursor()
-
-    try:
-        # Insert the contribution into the contributions table
-        if fund_name and nav:
-            cursor.execute("""
-                INSERT INTO contributions (goal_id, amount, date, fund_name, nav)
-                VALUES (?, ?, ?, ?, ?)
-            """, (goal_id, amount, date, fund_name, nav))
+    goal_amount = amount
+    if currency is not None:
+        currency = currency_code(currency)
+        goal_currency = _goal_currency(cursor, goal_id)
+        if currency == goal_currency:
+            currency = None
         else:
-            cursor.execute("""
-                INSERT INTO contributions (goal_id, amount, date)
-                VALUES (?, ?, ?)
-            """, (goal_id, amount, date))
+            goal_amount = convert_amount(amount, currency, goal_currency, date, conn)
 
-        # Update the total contributions in the goals table
+    # Insert the contribution into the contributions table
+    if fund_name and nav:
         cursor.execute("""
-            UPDATE goals
-            SET contributions_total = contributions_total + ?
-            WHERE id = ?
-        """, (amount, goal_id))
+            INSERT INTO contributions (goal_id, amount, date, fund_name, nav, currency)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (goal_id, amount, date, fund_name, nav, currency))
+    else:
+        cursor.execute("""
+            INSERT INTO contributions (goal_id, amount, date, currency)
+            VALUES (?, ?, ?, ?)
+        """, (goal_id, amount, date, currency))
+    contribution_id = cursor.lastrowid
 
-        conn.commit()
+    record_event(cursor, goal_id, "contribution", contribution_id, goal_amount,
+                 _units(amount, nav) if fund_name else 0)
+
+    # Update the total contributions in the goals table
+    cursor.execute("""
+        UPDATE goals
+        SET contributions_total = contributions_total + ?
+        WHERE id = ?
+    """, (goal_amount, goal_id))
+    return contribution_id, goal_amount
+
+def log_contribution(goal_id, amount, date, fund_name=None, nav=None, currency=None):
+    """Log a new contribution and update the total contributions in the goals table.
+
+    currency defaults to the goal's. A contribution in another currency is
+    stored as given and counts towards the goal at the rates in force on date.
+    """
+    conn = connect_db()
+
+    try:
+        _, goal_amount = add_contribution(conn, goal_id, amount, date, fund_name, nav, currency)
+        commit_goal_writes(conn, [goal_id])
+        metrics.CONTRIBUTIONS_LOGGED.labels("manual").inc()
+        metrics.CONTRIBUTION_AMOUNT.labels("manual").inc(goal_amount)
         console.print("[green]Contribution logged successfully![/green]")
     except Exception as e:
         conn.rollback()
@@ -199,9 +1439,11 @@ def log_contribution(goal_id, amount, date, fund_name=None, nav=None):
     finally:
         conn.close()
 
-def get_goal_progress(goal_id):
+def get_goal_progress(goal_id, conn=None):
     """Retrieve total contributions and calculate progress percentage."""
-    conn = connect_db()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -209,7 +1451,8 @@ def get_goal_progress(goal_id):
     """, (goal_id,))
     result = cursor.fetchone()
 
-    conn.close()
+    if should_close:
+        conn.close()
 
     if result:
         contributions_total, target_amount = result
@@ -228,9 +1471,11 @@ def get_goal_total_contributions(goal_id):
     conn.close()
     return total if total else 0
 
-def fetch_contributions(goal_id):
+def fetch_contributions(goal_id, conn=None):
     """Retrieve all contributions for a given goal, sorted by date (latest first)."""
-    conn = connect_db()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -239,25 +1484,27 @@ def fetch_contributions(goal_id):
     """, (goal_id,))
 
     contributions = cursor.fetchall()
-    conn.close()
+    if should_close:
+        conn.close()
     return contributions
 
-def fetch_all_goals():
+def fetch_all_goals(conn=None):
     """Retrieve all financial goals."""
-    conn = connect_db()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, goal_name, target_amount, time_horizon, cagr, investment_mode,
-               initial_investment, sip_amount, start_date, created_at, notes, contributions_total
-        FROM goals
-    """)
+    cursor.execute(f"SELECT {goal_columns_sql()} FROM goals")
     goals = cursor.fetchall()
-    conn.close()
+    if should_close:
+        conn.close()
     return goals
 
-def fetch_all_contributions():
+def fetch_all_contributions(conn=None):
     """Retrieve all contributions."""
-    conn = connect_db()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT contributions.id, goal_id, goal_name, amount, date
@@ -266,49 +1513,536 @@ def fetch_all_contributions():
         ORDER BY date DESC
     """)
     contributions = cursor.fetchall()
-    conn.close()
+    if should_close:
+        conn.close()
     return contributions
 
-def fetch_contributions_for_graph(goal_id):
-    """Retrieve contribution amounts and dates for graphing."""
+def fetch_contribution_series(goal_id, start=None, end=None, conn=None):
+    """Return a goal's contributions summed per day as (days, amounts) NumPy arrays, in date order.
+
+    days is datetime64[D], built straight from the integer day column, so no
+    date string is parsed; amounts are in the goal's currency. start and end
+    are optional inclusive bounds (dates or YYYY-MM-DD strings).
+    """
+    conditions, params = ["goal_id = ?", "day IS NOT NULL"], [goal_id]
+    if start:
+        conditions.append("day >= ?")
+        params.append(day_number(start))
+    if end:
+        conditions.append("day <= ?")
+        params.append(day_number(end))
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        rows = conn.execute(f"""
+            SELECT day, SUM({GOAL_AMOUNT_EXPR})
+            FROM contributions
+            WHERE {" AND ".join(conditions)}
+            GROUP BY day
+            ORDER BY day
+        """, params).fetchall()
+    finally:
+        if should_close:
+            conn.close()
+    series = np.array(rows, dtype=np.float64).reshape(-1, 2)
+    return series[:, 0].astype(np.int64).astype("datetime64[D]"), series[:, 1]
+
+def get_data_version(conn=None):
+    """Return the data version counter; it increases whenever goals, contributions, basics or FX rates change."""
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        return row[0] if row else 0
+    finally:
+        if should_close:
+            conn.close()
+
+def fetch_goals_page(after_id=None, limit=50, conn=None, row_factory=None):
+    """Retrieve one page of goals (newest first), keyset-paginated by ID.
+
+    Rows use the GOAL_COLUMNS order, with contributions_total summed from the
+    contributions table so no per-goal lookup is needed. Pass the ID of the
+    last row of the previous page as after_id. Pass row_factory=goal_row for
+    Goal rows instead of plain tuples.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+
+    cursor.execute(f"""
+        SELECT {goal_columns_sql(total=goal_total_sql("goals"))}
+        FROM goals
+        WHERE ? IS NULL OR id < ?
+        ORDER BY id DESC
+        LIMIT ?
+    """, (after_id, after_id, limit))
+
+    goals = cursor.fetchall()
+    if should_close:
+        conn.close()
+    return goals
+
+def fetch_contributions_page(goal_id, after_date=None, after_id=None, limit=50, conn=None):
+    """Retrieve one page of contributions for a goal (latest first), keyset-paginated.
+
+    Rows are (id, amount, date, fund_name, nav, currency), where currency is
+    the amount's: the contribution's own, else its goal's. Pass the date and ID
+    of the last row of the previous page as after_date/after_id.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    cursor = conn.cursor()
+
+    if after_date is None:
+        cursor.execute("""
+            SELECT id, amount, date, fund_name, nav,
+                   COALESCE(currency, (SELECT g.currency FROM goals g WHERE g.id = goal_id))
+            FROM contributions
+            WHERE goal_id = ?
+            ORDER BY date DESC, id DESC
+            LIMIT ?
+        """, (goal_id, limit))
+    else:
+        cursor.execute("""
+            SELECT id, amount, date, fund_name, nav,
+                   COALESCE(currency, (SELECT g.currency FROM goals g WHERE g.id = goal_id))
+            FROM contributions
+            WHERE goal_id = ? AND (date < ? OR (date = ? AND id < ?))
+            ORDER BY date DESC, id DESC
+            LIMIT ?
+        """, (goal_id, after_date, after_date, after_id, limit))
+
+    contributions = cursor.fetchall()
+    if should_close:
+        conn.close()
+    return contributions
+
+def iter_goal_pages(page_size=50, row_factory=None):
+    """Yield pages of goals until the table is exhausted, holding one page at a time."""
+    after_id = None
+    while True:
+        # Fetch one extra row so the last page is detected without an empty query
+        page = fetch_goals_page(after_id, page_size + 1, row_factory=row_factory)
+        yield page[:page_size]
+        if len(page) <= page_size:
+            return
+        after_id = page[page_size - 1][0]
+
+def iter_contribution_pages(goal_id, page_size=50):
+    """Yield pages of a goal's contributions (latest first), holding one page at a time."""
+    after_date = after_id = None
+    while True:
+        page = fetch_contributions_page(goal_id, after_date, after_id, page_size + 1)
+        yield page[:page_size]
+        if len(page) <= page_size:
+            return
+        after_id, _, after_date = page[page_size - 1][:3]
+
+class GoalQuery:
+    """Composable goal filters and sort keys, compiled into one parameterized query.
+
+    Each filter method returns the query so calls can be chained:
+
+        GoalQuery().mode("SIP").horizon_between(3, 10).order_by("progress", descending=True).fetch()
+
+    Rows use the GOAL_COLUMNS order; pass row_factory=goal_row to fetch() or
+    iter_pages() for Goal rows.
+    """
+
+    SORT_KEYS = {
+        "id": "id",
+        "created": "created_at",
+        "name": "goal_name",
+        "target": "target_amount",
+        "horizon": "time_horizon",
+        "cagr": "cagr",
+        "progress": PROGRESS_EXPR,
+    }
+
+    def __init__(self):
+        self._conditions = []
+        self._params = []
+        self._order = []
+        self._limit = None
+
+    def _between(self, expression, low, high):
+        if low is not None:
+            self._conditions.append(f"{expression} >= ?")
+            self._params.append(low)
+        if high is not None:
+            self._conditions.append(f"{expression} <= ?")
+            self._params.append(high)
+        return self
+
+    def mode(self, *modes):
+        """Keep goals whose investment_mode is one of the given modes."""
+        if modes:
+            placeholders = ", ".join("?" for _ in modes)
+            self._conditions.append(f"investment_mode IN ({placeholders})")
+            self._params.extend(modes)
+        return self
+
+    def horizon_between(self, min_years=None, max_years=None):
+        """Keep goals whose time horizon (years) lies in the inclusive range."""
+        return self._between("time_horizon", min_years, max_years)
+
+    def cagr_between(self, min_cagr=None, max_cagr=None):
+        """Keep goals whose expected CAGR (%) lies in the inclusive range."""
+        return self._between("cagr", min_cagr, max_cagr)
+
+    def progress_between(self, min_pct=None, max_pct=None):
+        """Keep goals whose progress (%) lies in the inclusive range."""
+        return self._between(PROGRESS_EXPR, min_pct, max_pct)
+
+    def name_contains(self, text):
+        """Keep goals whose name contains text (case-insensitive)."""
+        if text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            self._conditions.append("goal_name LIKE ? ESCAPE '\\'")
+            self._params.append(f"%{escaped}%")
+        return self
+
+    def order_by(self, key, descending=False):
+        """Sort by one of SORT_KEYS; later calls act as tie-breakers."""
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Invalid sort key: {key}")
+        self._order.append(f"{self.SORT_KEYS[key]} {'DESC' if descending else 'ASC'}")
+        return self
+
+    def limit(self, count):
+        """Return at most count goals."""
+        self._limit = count
+        return self
+
+    def compile(self):
+        """Return the (sql, params) pair for this query."""
+        sql = f"""
+            SELECT {goal_columns_sql()}
+            FROM goals"""
+        params = list(self._params)
+        if self._conditions:
+            sql += "\n            WHERE " + " AND ".join(self._conditions)
+        # id as the final tie-breaker keeps the order stable
+        sql += "\n            ORDER BY " + ", ".join(self._order + ["id DESC"])
+        if self._limit is not None:
+            sql += "\n            LIMIT ?"
+            params.append(self._limit)
+        return sql, params
+
+    def fetch(self, row_factory=None):
+        """Run the query and return all matching goals."""
+        return [goal for page in self.iter_pages(row_factory=row_factory) for goal in page]
+
+    def iter_pages(self, page_size=50, row_factory=None):
+        """Run the query and yield matching goals in chunks of page_size from one cursor.
+
+        Rows are built by row_factory (if given) only as each page is fetched.
+        """
+        sql, params = self.compile()
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory
+            cursor.execute(sql, params)
+            while True:
+                page = cursor.fetchmany(page_size)
+                if not page:
+                    return
+                yield page
+        finally:
+            conn.close()
+
+def fetch_portfolio_rows(conn=None, currency=BASE_CURRENCY, as_of=None):
+    """Retrieve every goal's planning inputs and contribution total in one query.
+
+    Returns (id, goal_name, target_amount, time_horizon, cagr, sip_amount, total_contributions)
+    rows ordered by ID, with amounts in currency. Contributions are converted to
+    their goal's currency at their own dates, then goals in another currency are
+    converted at the rates in force on as_of (default: today).
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    as_of = as_of or date_type.today()
+    factors, errors = {}, []
+
+    def to_currency(goal_currency):
+        if goal_currency not in factors:
+            try:
+                factors[goal_currency] = convert_amount(1.0, goal_currency, currency, as_of, conn)
+            except ValueError as e:
+                errors.append(e)  # SQLite would replace the message; re-raised below
+                factors[goal_currency] = None
+        return factors[goal_currency]
+
+    # Called only for goals in another currency; one rate lookup per currency
+    conn.create_function("to_report_currency", 1, to_currency)
+    converted = {column: f"CASE WHEN g.currency = :currency THEN {column} "
+                         f"ELSE {column} * to_report_currency(g.currency) END"
+                 for column in ("g.target_amount", "g.sip_amount", "COALESCE(c.total, 0)")}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT g.id, g.goal_name, {converted["g.target_amount"]}, g.time_horizon, g.cagr,
+                   {converted["g.sip_amount"]}, {converted["COALESCE(c.total, 0)"]}
+            FROM goals g
+            LEFT JOIN (
+                SELECT goal_id, SUM({GOAL_AMOUNT_EXPR}) AS total FROM contributions GROUP BY goal_id
+            ) c ON c.goal_id = g.id
+            ORDER BY g.id
+        """, {"currency": currency})
+        rows = cursor.fetchall()
+        if errors:
+            raise errors[0]
+        return rows
+    finally:
+        if should_close:
+            conn.close()
+
+def fetch_milestone_inputs(goal_ids=None, conn=None):
+    """Retrieve the goals milestones.compute_milestones() works on, in two queries.
+
+    Returns (goals, heads): goals are (id, target_amount, cagr, sip_amount,
+    contributions_total) rows and heads maps goal ID to its latest ledger event
+    ID. goal_ids limits both to those goals. The contributions come from a
+    columnar.ColumnarLedger loaded afterwards.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    cursor = conn.cursor()
+    where = "WHERE goal_id IN (SELECT value FROM json_each(?))" if goal_ids is not None else ""
+    params = (json.dumps(list(goal_ids)),) if goal_ids is not None else ()
+    try:
+        # Heads first: an event landing mid-read leaves the stored rows stale rather than wrong
+        cursor.execute(f"SELECT goal_id, MAX(id) FROM ledger_events {where} GROUP BY goal_id", params)
+        heads = dict(cursor.fetchall())
+        cursor.execute(f"""
+            SELECT id, target_amount, cagr, sip_amount, contributions_total FROM goals
+            {where.replace("goal_id", "id")} ORDER BY id
+        """, params)
+        goals = cursor.fetchall()
+        return goals, heads
+    finally:
+        if should_close:
+            conn.close()
+
+def iter_ledger_chunks(goal_ids=None, chunk_size=LEDGER_CHUNK_ROWS, conn=None):
+    """Yield the number of contributions, then lists of up to chunk_size (goal_id, day, amount, nav) rows.
+
+    Rows are ordered by goal, day and ID, and come from the same read
+    transaction as the count. amount is in the goal's currency; nav is 0 when
+    none was recorded. Contributions without a valid date are left out.
+    goal_ids limits the rows to those goals.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    where = "day IS NOT NULL"
+    params = ()
+    if goal_ids is not None:
+        where += " AND goal_id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(goal_ids)),)
+    began = not conn.in_transaction
+    try:
+        if began:
+            conn.execute("BEGIN")  # One snapshot for the count and the rows
+        yield conn.execute(f"SELECT COUNT(*) FROM contributions WHERE {where}", params).fetchone()[0]
+        cursor = conn.execute(f"""
+            SELECT goal_id, day, COALESCE({GOAL_AMOUNT_EXPR}, 0), COALESCE(nav, 0)
+            FROM contributions
+            WHERE {where}
+            ORDER BY goal_id, date, id  -- Same order as day for valid dates, and read off the index unsorted
+        """, params)
+        while chunk := cursor.fetchmany(chunk_size):
+            yield chunk
+    finally:
+        if began:
+            conn.rollback()
+        if should_close:
+            conn.close()
+
+def store_goal_milestones(rows, goal_ids=None):
+    """Replace the stored milestones of goal_ids (or of every goal) with rows, in one transaction.
+
+    rows are (goal_id, milestone, amount, crossed_on, projected_on, event_id, as_of).
+    """
     conn = connect_db()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT date, SUM(amount) 
-        FROM contributions 
-        WHERE goal_id = ? 
-        GROUP BY date 
-        ORDER BY date ASC
-    """, (goal_id,))
-    data = cursor.fetchall()
-    conn.close()
-    return data  # List of (date, total amount contributed)
+    try:
+        if goal_ids is None:
+            cursor.execute("DELETE FROM goal_milestones")
+        else:
+            cursor.execute("DELETE FROM goal_milestones WHERE goal_id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(list(goal_ids)),))
+        cursor.executemany("""
+            INSERT INTO goal_milestones (goal_id, milestone, amount, crossed_on, projected_on, event_id, as_of)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
 
-def fetch_goal_by_id(goal_id):
-    """Retrieve a specific goal by its ID."""
+def fetch_goal_milestones(goal_id, conn=None, as_of=None):
+    """Return a goal's stored (milestone, amount, crossed_on, projected_on) rows and whether they are current.
+
+    Rows are current when they were computed at the goal's latest ledger
+    event, their projections were made in as_of's month (default: today's)
+    or later, and no projected date is before as_of.
+    """
+    as_of = (as_of or date_type.today()).isoformat()
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT milestone, amount, crossed_on, projected_on, event_id, as_of
+            FROM goal_milestones WHERE goal_id = ? ORDER BY milestone
+        """, (goal_id,))
+        rows = cursor.fetchall()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ledger_events WHERE goal_id = ?", (goal_id,))
+        head = cursor.fetchone()[0]
+        current = bool(rows) and all(
+            event_id == head and stored_as_of is not None and stored_as_of[:7] >= as_of[:7]
+            and (projected_on is None or projected_on >= as_of)
+            for _, _, _, projected_on, event_id, stored_as_of in rows
+        )
+        return [row[:4] for row in rows], current
+    finally:
+        if should_close:
+            conn.close()
+
+def fetch_projection_inputs(goal_ids=None, conn=None):
+    """Retrieve what projections.refresh_projections() works on, in one query.
+
+    Returns (id, target_amount, time_horizon, cagr, investment_mode,
+    sip_amount, currency, contributions_total, event_id) rows, where event_id
+    is the goal's latest ledger event (0 if none). goal_ids limits the rows
+    to those goals.
+    """
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    where = "WHERE g.id IN (SELECT value FROM json_each(?))" if goal_ids is not None else ""
+    params = (json.dumps(list(goal_ids)),) if goal_ids is not None else ()
+    try:
+        return conn.execute(f"""
+            SELECT g.id, g.target_amount, g.time_horizon, g.cagr, g.investment_mode, g.sip_amount, g.currency,
+                   g.contributions_total,
+                   (SELECT COALESCE(MAX(e.id), 0) FROM ledger_events e WHERE e.goal_id = g.id)
+            FROM goals g
+            {where}
+            ORDER BY g.id
+        """, params).fetchall()
+    finally:
+        if should_close:
+            conn.close()
+
+def fetch_projection(key, conn=None):
+    """Return the stored (goal_id, total_contributions, sip_amount, target_amount, future_value, shortfall,
+    required_sip) row for a projection key, or None."""
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    try:
+        return conn.execute("""
+            SELECT goal_id, total_contributions, sip_amount, target_amount, future_value, shortfall, required_sip
+            FROM goal_projections WHERE key = ?
+        """, (key,)).fetchone()
+    finally:
+        if should_close:
+            conn.close()
+
+def store_projections(rows, max_rows=PROJECTION_CACHE_ROWS):
+    """Store projection rows in one transaction, then evict what can't or shouldn't be kept.
+
+    rows are (key, goal_id, event_id, total_contributions, sip_amount,
+    target_amount, future_value, shortfall, required_sip). A goal's rows from
+    before its latest stored ledger event are dropped, and beyond max_rows
+    rows the oldest computed go first.
+    """
     conn = connect_db()
     cursor = conn.cursor()
+    try:
+        cursor.executemany("""
+            INSERT OR REPLACE INTO goal_projections
+                (key, goal_id, event_id, total_contributions, sip_amount, target_amount,
+                 future_value, shortfall, required_sip)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        heads = {}
+        for row in rows:
+            heads[row[1]] = max(heads.get(row[1], 0), row[2])
+        cursor.executemany("DELETE FROM goal_projections WHERE goal_id = ? AND event_id < ?", heads.items())
+        # REPLACE gives a row a new rowid, so rowid order is the order rows were computed in
+        cursor.execute("""
+            DELETE FROM goal_projections WHERE rowid IN (
+                SELECT rowid FROM goal_projections ORDER BY rowid DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_rows,))
+        read_cache.commit(conn)  # goal_projections isn't versioned, so cached reads stay valid
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
 
-    cursor.execute("""
-        SELECT id, goal_name, target_amount, time_horizon, cagr, investment_mode, 
-               initial_investment, sip_amount, start_date
-        FROM goals 
+def fetch_goal_by_id(goal_id, conn=None, row_factory=None):
+    """Retrieve a specific goal by its ID, in GOAL_COLUMNS order (a Goal with row_factory=goal_row).
+
+    Without conn the row comes from read_cache when it can. Passing conn
+    always queries it, e.g. to read inside a transaction.
+    """
+    if conn is None:
+        goal = read_cache.get(("goal", goal_id), lambda: _fetch_goal_by_id(goal_id))
+        return row_factory(None, goal) if goal and row_factory else goal
+    return _fetch_goal_by_id(goal_id, conn, row_factory)
+
+def _fetch_goal_by_id(goal_id, conn=None, row_factory=None):
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+
+    cursor.execute(f"""
+        SELECT {goal_columns_sql()}
+        FROM goals
         WHERE id = ?
     """, (goal_id,))
 
     goal = cursor.fetchone()  # Fetch one goal
-    conn.close()
-    return goal  # Returns (id, goal_name, target_amount) or None if not found
+    if should_close:
+        conn.close()
+    return goal  # None if not found
 
-def get_goal_total_contributions(goal_id):
-    """Fetch total contributions for a specific goal."""
-    conn = connect_db()
+def get_goal_total_contributions(goal_id, conn=None):
+    """Fetch total contributions for a specific goal (from read_cache when conn isn't given and it can)."""
+    if conn is None:
+        return read_cache.get(("total", goal_id), lambda: _get_goal_total_contributions(goal_id))
+    return _get_goal_total_contributions(goal_id, conn)
+
+def _get_goal_total_contributions(goal_id, conn=None):
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT SUM(amount) FROM contributions WHERE goal_id = ?
+    cursor.execute(f"""
+        SELECT SUM({GOAL_AMOUNT_EXPR}) FROM contributions WHERE goal_id = ?
     """, (goal_id,))
     total = cursor.fetchone()[0]
-    conn.close()
+    if should_close:
+        conn.close()
     return total if total else 0  # Ensure it returns 0 if no contributions exist
 
 def update_basic_amount(category, amount, monthly_expenses=None, family_members=None, annual_income=None):
@@ -343,29 +2077,25 @@ def update_basic_amount(category, amount, monthly_expenses=None, family_members=
     """, (amount, recommended, amount >= recommended, category))
 
     # Log the change
-    log_basics_change(category, current_amount, amount, f"Updated {category} amount")
+    log_basics_change(category, current_amount, amount, f"Updated {category} amount", conn)
 
-    conn.commit()
+    read_cache.commit(conn, [("basics",)])
     conn.close()
 
-def get_basics_status():
+def get_basics_status(conn=None):
     """Fetch status of all financial basics."""
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT category, target_amount, current_amount, is_funded, 
-               recommendation_description, last_updated
-        FROM financial_basics
-    """)
-    
-    result = cursor.fetchall()
-    conn.close()
-    return result
+    return fetch_basics(conn)
 
-def fetch_basics():
-    """Retrieve all financial basics from the database."""
-    conn = connect_db()
+def fetch_basics(conn=None):
+    """Retrieve all financial basics (from read_cache when conn isn't given and it can)."""
+    if conn is None:
+        return list(read_cache.get(("basics",), _fetch_basics))
+    return _fetch_basics(conn)
+
+def _fetch_basics(conn=None):
+    should_close = conn is None
+    if should_close:
+        conn = connect_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -381,9 +2111,14 @@ def fetch_basics():
     """)
 
     basics = cursor.fetchall()
-    conn.close()
+    if should_close:
+        conn.close()
     return basics
 
+def _stored_columns(cursor, table):
+    """Return a table's columns, without generated ones (PRAGMA table_info leaves those out)."""
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+
 def export_all_data(export_dir="backups"):
     """Export all data from database to CSV files with timestamp."""
     # Create timestamp for unique backup folders
@@ -395,10 +2130,11 @@ def export_all_data(export_dir="backups"):
         
     conn = connect_db()
     cursor = conn.cursor()
+    start = time.perf_counter()
     
     try:
-        # Export goals
-        cursor.execute("SELECT * FROM goals")
+        # Export goals (generated columns are left out; they can't be inserted back)
+        cursor.execute(f"SELECT {', '.join(_stored_columns(cursor, 'goals'))} FROM goals")
         goals = cursor.fetchall()
         with open(f"{backup_dir}/goals.csv", 'w', newline='') as f:
             writer = csv.writer(f)
@@ -406,7 +2142,7 @@ def export_all_data(export_dir="backups"):
             writer.writerows(goals)
         
         # Export contributions
-        cursor.execute("SELECT * FROM contributions")
+        cursor.execute(f"SELECT {', '.join(_stored_columns(cursor, 'contributions'))} FROM contributions")
         contributions = cursor.fetchall()
         with open(f"{backup_dir}/contributions.csv", 'w', newline='') as f:
             writer = csv.writer(f)
@@ -420,7 +2156,24 @@ def export_all_data(export_dir="backups"):
             writer = csv.writer(f)
             writer.writerow([description[0] for description in cursor.description])
             writer.writerows(basics)
+
+        # Export the ledger journal (snapshots are derived and rebuilt on restore)
+        cursor.execute("SELECT * FROM ledger_events")
+        events = cursor.fetchall()
+        with open(f"{backup_dir}/ledger_events.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([description[0] for description in cursor.description])
+            writer.writerows(events)
+
+        # Export exchange rates
+        cursor.execute("SELECT date, ccy, rate FROM fx_rates")
+        rates = cursor.fetchall()
+        with open(f"{backup_dir}/fx_rates.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([description[0] for description in cursor.description])
+            writer.writerows(rates)
         
+        metrics.BACKUP_DURATION.observe(time.perf_counter() - start)
         return backup_dir
     
     finally:
@@ -433,50 +2186,60 @@ def import_all_data(backup_dir):
     
     conn = connect_db()
     cursor = conn.cursor()
+    start = time.perf_counter()
+    rows = 0
     
     try:
+        # Rebuild the search index once at the end instead of row by row
+        set_search_sync(cursor, False)
+
         # Clear existing data
         cursor.execute("DELETE FROM contributions")
         cursor.execute("DELETE FROM goals")
         cursor.execute("DELETE FROM financial_basics")
+        cursor.execute("DELETE FROM ledger_events")
+        cursor.execute("DELETE FROM goal_snapshots")
+        cursor.execute("DELETE FROM goal_milestones")  # Derived; recomputed on first read
+        cursor.execute("DELETE FROM goal_projections")
+        # Backups taken before rates were kept restore with the current rates
+        if os.path.exists(os.path.join(backup_dir, "fx_rates.csv")):
+            cursor.execute("DELETE FROM fx_rates")
         
-        # Import goals
-        goals_file = os.path.join(backup_dir, "goals.csv")
-        if os.path.exists(goals_file):
-            with open(goals_file, 'r') as f:
-                reader = csv.reader(f)
-                headers = next(reader)  # Skip headers
-                for row in reader:
-                    cursor.execute("""
-                        INSERT INTO goals 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, row)
-        
-        # Import contributions
-        contributions_file = os.path.join(backup_dir, "contributions.csv")
-        if os.path.exists(contributions_file):
-            with open(contributions_file, 'r') as f:
-                reader = csv.reader(f)
-                headers = next(reader)  # Skip headers
-                for row in reader:
-                    cursor.execute("""
-                        INSERT INTO contributions 
-                        VALUES (?, ?, ?, ?)
-                    """, row)
-        
-        # Import financial basics
-        basics_file = os.path.join(backup_dir, "financial_basics.csv")
-        if os.path.exists(basics_file):
-            with open(basics_file, 'r') as f:
-                reader = csv.reader(f)
-                headers = next(reader)  # Skip headers
-                for row in reader:
-                    cursor.execute("""
-                        INSERT INTO financial_basics 
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, row)
-        
+        # Import each table in one executemany() per file, mapping columns by the
+        # CSV header so backups taken before a column was added still restore
+        for table in ("fx_rates", "goals", "contributions", "financial_basics", "ledger_events"):
+            table_file = os.path.join(backup_dir, f"{table}.csv")
+            if os.path.exists(table_file):
+                with open(table_file, 'r', newline='') as f:
+                    reader = csv.reader(f)
+                    headers = next(reader)
+                    # Header names go into the INSERT, so only the table's own columns are accepted
+                    unknown = sorted(set(headers) - set(_stored_columns(cursor, table)))
+                    if unknown:
+                        raise ValueError(f"{table}.csv has unknown columns: {', '.join(map(repr, unknown))}")
+                    columns = ", ".join(headers)
+                    placeholders = ", ".join("?" for _ in headers)
+                    cursor.executemany(
+                        f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                        ([value if value != "" else None for value in row] for row in reader)
+                    )
+                    rows += cursor.rowcount
+
+        # Backups taken before the journal existed start it from the restored contributions
+        if not os.path.exists(os.path.join(backup_dir, "ledger_events.csv")):
+            journal_contributions(cursor)
+        else:
+            take_due_snapshots(cursor)
+
+        set_search_sync(cursor, True)
         conn.commit()
+        clear_fx_cache()
+        read_cache.clear()
+        elapsed = time.perf_counter() - start
+        metrics.RESTORE_DURATION.observe(elapsed)
+        metrics.RESTORE_ROWS.inc(rows)
+        if elapsed > 0:
+            metrics.RESTORE_ROWS_PER_SECOND.set(rows / elapsed)
         
     except Exception as e:
         conn.rollback()
@@ -537,7 +2300,7 @@ def update_basic(category, target_amount, current_amount, notes, additional_info
         # Log the change using the same connection
         log_basics_change(category_db, old_amount, current_amount, notes, conn)
 
-        conn.commit()
+        read_cache.commit(conn, [("basics",)])
         return True
 
     except Exception as e:
@@ -570,7 +2333,10 @@ def create_basics_history_table():
     conn.close()
 
 def log_basics_change(category, old_amount, new_amount, notes="", conn=None):
-    """Log changes to financial basics for historical tracking."""
+    """Log changes to financial basics for historical tracking.
+
+    Given conn, the entry joins its transaction and the caller commits.
+    """
     should_close = False
     if conn is None:
         conn = connect_db()
@@ -590,8 +2356,9 @@ def log_basics_change(category, old_amount, new_amount, notes="", conn=None):
             (category, target_amount, current_amount, change_amount, notes)
             VALUES (?, ?, ?, ?, ?)
         """, (category, target_amount, new_amount, change_amount, notes))
-        
-        conn.commit()
+
+        if should_close:
+            conn.commit()
     finally:
         if should_close:
             conn.close()
@@ -0,0 +1,111 @@
+import csv
+import gzip
+import json
+
+from financial_goals_tracker import db
+
+EXPORT_FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 5000  # Rows pulled per fetchmany() call
+
+GOAL_COLUMNS = list(db.GOAL_COLUMNS)
+# Headers that aren't just the column name in title case
+_GOAL_HEADER_NAMES = {"id": "ID", "cagr": "CAGR (%)", "initial_investment": "Lumpsum", "sip_amount": "SIP",
+                      "contributions_total": "Total Contributions"}
+GOAL_HEADERS = [_GOAL_HEADER_NAMES.get(column, column.replace("_", " ").title()) for column in GOAL_COLUMNS]
+
+# currency is the amount's: the contribution's own, else its goal's
+CONTRIBUTION_COLUMNS = ["id", "goal_id", "goal_name", "amount", "currency", "date", "fund_name", "nav"]
+CONTRIBUTION_HEADERS = ["ID", "Goal ID", "Goal Name", "Amount", "Currency", "Date", "Fund Name", "NAV"]
+
+
+def export_path(base_name, fmt="csv", compress=False):
+    """Return the file name for an export, e.g. goals_export.jsonl.gz."""
+    return f"{base_name}.{fmt}" + (".gz" if compress else "")
+
+
+def _open_output(path, compress):
+    if compress:
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def _filters(goal_ids=None, start_date=None, end_date=None, day_column="day", goal_column="goal_id"):
+    """Build a WHERE clause and params for the optional goal and date-range filters.
+
+    Dates are compared as day numbers on the indexed integer day column.
+    """
+    conditions, params = [], []
+    if goal_ids:
+        conditions.append(f"{goal_column} IN ({', '.join('?' for _ in goal_ids)})")
+        params.extend(goal_ids)
+    if start_date:
+        conditions.append(f"{day_column} >= ?")
+        params.append(db.day_number(start_date))
+    if end_date:
+        conditions.append(f"{day_column} <= ?")
+        params.append(db.day_number(end_date))
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return where, params
+
+
+def _stream_to_file(sql, params, count_sql, path, fmt, compress, columns, headers, chunk_size, progress):
+    """Run sql and write its rows to path chunk by chunk; returns the number of rows written.
+
+    progress, if given, is called as progress(rows_written, total_rows) after each chunk.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format: {fmt}")
+
+    conn = db.connect_db()
+    try:
+        total = conn.execute(count_sql, params).fetchone()[0] if progress else None
+        cursor = conn.execute(sql, params)
+        written = 0
+        with _open_output(path, compress) as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(headers)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if fmt == "csv":
+                    writer.writerows(rows)
+                else:
+                    f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+                written += len(rows)
+                if progress:
+                    progress(written, total)
+        return written
+    finally:
+        conn.close()
+
+
+def export_goals(path, fmt="csv", compress=False, goal_ids=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream goals to a CSV or JSON Lines file, optionally gzip-compressed."""
+    where, params = _filters(goal_ids, goal_column="id")
+    sql = f"SELECT {db.goal_columns_sql()} FROM goals{where} ORDER BY id"
+    count_sql = f"SELECT COUNT(*) FROM goals{where}"
+    return _stream_to_file(sql, params, count_sql, path, fmt, compress,
+                           GOAL_COLUMNS, GOAL_HEADERS, chunk_size, progress)
+
+
+def export_contributions(path, fmt="csv", compress=False, goal_ids=None, start_date=None, end_date=None,
+                         chunk_size=CHUNK_SIZE, progress=None):
+    """Stream contributions (with goal name, fund and NAV) to a CSV or JSON Lines file.
+
+    start_date/end_date are inclusive YYYY-MM-DD bounds. Rows are written in ID
+    order so SQLite can stream them without sorting the whole ledger.
+    """
+    where, params = _filters(goal_ids, start_date, end_date,
+                             day_column="c.day", goal_column="c.goal_id")
+    sql = f"""
+        SELECT c.id, c.goal_id, g.goal_name, c.amount, COALESCE(c.currency, g.currency), c.date,
+               c.fund_name, c.nav
+        FROM contributions c
+        JOIN goals g ON c.goal_id = g.id{where}
+        ORDER BY c.id
+    """
+    count_sql = f"SELECT COUNT(*) FROM contributions c JOIN goals g ON c.goal_id = g.id{where}"
+    return _stream_to_file(sql, params, count_sql, path, fmt, compress,
+                           CONTRIBUTION_COLUMNS, CONTRIBUTION_HEADERS, chunk_size, progress)
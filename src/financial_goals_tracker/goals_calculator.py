@@ -1,4 +1,9 @@
 import math
+import time
+
+import numpy as np
+
+from financial_goals_tracker import metrics
 
 def calculate_lumpsum(target_amount, time_horizon, cagr):
     """Calculate the required lumpsum investment today to reach the target amount."""
@@ -46,3 +51,48 @@ def calculate_mixed(target_amount, time_horizon, cagr, lumpsum_percentage=None,
     #print(f"\nDEBUG: lumpsum_investment={lumpsum_investment}, sip_investment={sip_investment}\n")  # Debug print
 
     return round(lumpsum_investment, 2), round(sip_investment, 2)
+
+def plan_investments(investment_mode, target_amount, time_horizon, cagr, lumpsum_amount=0):
+    """Return the (initial_investment, sip_amount) a goal needs under its investment mode.
+
+    For "Lumpsum + SIP" the lumpsum amount is kept and the SIP covers the rest,
+    as calculate_mixed() does for a fixed lumpsum.
+    """
+    if investment_mode == "SIP":
+        return 0, calculate_sip(target_amount, time_horizon, cagr)
+    if investment_mode == "Lumpsum":
+        return calculate_lumpsum(target_amount, time_horizon, cagr), 0
+    return calculate_mixed(target_amount, time_horizon, cagr, lumpsum_amount=lumpsum_amount or 0)
+
+def project_future_values(totals, sip_amounts, target_amounts, time_horizons, cagrs):
+    """Project future value, shortfall and required SIP increase for many goals at once.
+
+    All arguments are equal-length sequences (or scalars). Existing contributions
+    compound annually; the ongoing SIP compounds monthly and is invested at the
+    start of each month. Returns (future_value, shortfall, required_sip) arrays;
+    required_sip is 0 where there is no shortfall.
+    """
+    start = time.perf_counter()
+    totals = np.nan_to_num(np.asarray(totals, dtype=float))
+    sip_amounts = np.nan_to_num(np.asarray(sip_amounts, dtype=float))
+    target_amounts = np.asarray(target_amounts, dtype=float)
+    time_horizons = np.asarray(time_horizons, dtype=float)
+    cagr_decimal = np.asarray(cagrs, dtype=float) / 100
+
+    months = time_horizons * 12
+    monthly_rate = cagr_decimal / 12
+    growing = monthly_rate > 0
+    safe_rate = np.where(growing, monthly_rate, 1.0)  # Avoid division by zero
+
+    # Future value of one unit of monthly SIP (annuity due); simple sum if CAGR is 0
+    sip_factor = np.where(growing, (((1 + safe_rate) ** months - 1) / safe_rate) * (1 + safe_rate), months)
+
+    future_value = totals * (1 + cagr_decimal) ** time_horizons + sip_amounts * sip_factor
+    shortfall = target_amounts - future_value
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required_sip = np.where((shortfall > 0) & (sip_factor > 0), shortfall / sip_factor, 0.0)
+
+    metrics.PROJECTION_GOALS.inc(future_value.size)
+    metrics.PROJECTION_DURATION.observe(time.perf_counter() - start)
+    return future_value, shortfall, required_sip
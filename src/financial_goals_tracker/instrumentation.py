@@ -0,0 +1,238 @@
+"""Opt-in statement statistics and slow-query log for the db layer.
+
+Set FGT_DB_STATS=1 to enable. Every connection opened through db.connect_db()
+then records, per distinct statement, how often it ran, a latency histogram,
+rows fetched and SQLite VM steps (via a progress handler). Statements slower
+than FGT_SLOW_QUERY_MS (default 100) are logged with their EXPLAIN QUERY PLAN.
+Stats are merged into FGT_DB_STATS_FILE (default db_stats.json) at exit and
+shown by `financial-tracker db-stats`.
+
+When disabled nothing is installed: connect_db() returns plain connections.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from financial_goals_tracker import db
+
+ENV_ENABLED = "FGT_DB_STATS"
+ENV_SLOW_MS = "FGT_SLOW_QUERY_MS"
+ENV_STATS_FILE = "FGT_DB_STATS_FILE"
+DEFAULT_STATS_FILE = "db_stats.json"
+DEFAULT_SLOW_MS = 100.0
+SLOW_LOG_SIZE = 100  # Slow statements kept in memory
+PROGRESS_STEPS = 1000  # VM instructions between progress handler calls
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_lock = threading.Lock()
+_stats = {}
+_slow_log = deque(maxlen=SLOW_LOG_SIZE)
+_enabled = False
+slow_ms = DEFAULT_SLOW_MS
+
+
+def normalize(sql):
+    """Collapse whitespace so the same statement always maps to one key."""
+    return " ".join(sql.split())
+
+
+def _new_entry():
+    return {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "vm_steps": 0,
+            "histogram": [0] * (len(BUCKETS_MS) + 1)}
+
+
+def _record(sql, elapsed_ms, rows=0, vm_steps=0, conn=None, params=None):
+    key = normalize(sql)
+    bucket = next((i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound), len(BUCKETS_MS))
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = _new_entry()
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["rows"] += rows
+        entry["vm_steps"] += vm_steps
+        entry["histogram"][bucket] += 1
+
+    if elapsed_ms >= slow_ms and conn is not None:
+        _log_slow(key, sql, elapsed_ms, conn, params)
+
+
+def _log_slow(key, sql, elapsed_ms, conn, params):
+    plan = None
+    try:
+        # A plain cursor, so the EXPLAIN itself is not instrumented
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+        plan = [row[-1] for row in rows]
+    except sqlite3.Error:
+        pass  # Not explainable (e.g. PRAGMA) or bound to executemany() params
+    with _lock:
+        _slow_log.append({"sql": key, "elapsed_ms": round(elapsed_ms, 3), "plan": plan,
+                          "at": time.strftime("%Y-%m-%d %H:%M:%S")})
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execute()/executemany() and counts fetched rows."""
+
+    def _timed(self, method, sql, params, plan_params):
+        conn = self.connection
+        conn.vm_steps = 0
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._sql = sql
+            _record(sql, elapsed_ms, vm_steps=conn.vm_steps * PROGRESS_STEPS, conn=conn, params=plan_params)
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(super().executemany, sql, seq_of_params, None)
+
+    def _count_rows(self, rows):
+        sql = getattr(self, "_sql", None)
+        if sql is not None and rows:
+            with _lock:
+                entry = _stats.get(normalize(sql))
+                if entry is not None:
+                    entry["rows"] += rows
+        return rows
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._count_rows(1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count_rows(len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.set_progress_handler(self._progress, PROGRESS_STEPS)
+
+    def _progress(self):
+        self.vm_steps += 1
+        return 0  # Never interrupt
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(slow_query_ms=None, stats_file=None):
+    """Instrument every connection opened from now on."""
+    global _enabled, slow_ms
+    if slow_query_ms is not None:
+        slow_ms = slow_query_ms
+    if not _enabled:
+        db.set_connection_factory(InstrumentedConnection)
+        _enabled = True
+        if stats_file:
+            atexit.register(dump_stats, stats_file)
+
+
+def disable():
+    """Stop instrumenting new connections; collected stats are kept."""
+    global _enabled
+    db.set_connection_factory(None)
+    _enabled = False
+
+
+def enable_from_env():
+    """Enable instrumentation if FGT_DB_STATS is set to a true value."""
+    if os.environ.get(ENV_ENABLED, "").lower() in ("1", "true", "yes", "on"):
+        enable(float(os.environ.get(ENV_SLOW_MS, DEFAULT_SLOW_MS)),
+               os.environ.get(ENV_STATS_FILE, DEFAULT_STATS_FILE))
+
+
+def reset():
+    """Discard collected stats and the slow-query log."""
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
+
+
+def snapshot():
+    """Return a copy of the collected stats: {"statements": {...}, "slow_queries": [...]}."""
+    with _lock:
+        return {
+            "buckets_ms": list(BUCKETS_MS),
+            "statements": {sql: dict(entry, histogram=list(entry["histogram"])) for sql, entry in _stats.items()},
+            "slow_queries": list(_slow_log),
+        }
+
+
+def merge(into, other):
+    """Merge snapshot other into snapshot into (in place) and return it."""
+    for sql, entry in other["statements"].items():
+        target = into["statements"].setdefault(sql, _new_entry())
+        for field in ("count", "total_ms", "rows", "vm_steps"):
+            target[field] += entry[field]
+        target["max_ms"] = max(target["max_ms"], entry["max_ms"])
+        target["histogram"] = [a + b for a, b in zip(target["histogram"], entry["histogram"])]
+    into["slow_queries"] = (into.get("slow_queries", []) + other["slow_queries"])[-SLOW_LOG_SIZE:]
+    return into
+
+
+def load_stats(path=DEFAULT_STATS_FILE):
+    """Load a stats file written by dump_stats(), or an empty snapshot."""
+    if not os.path.exists(path):
+        return {"buckets_ms": list(BUCKETS_MS), "statements": {}, "slow_queries": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump_stats(path=DEFAULT_STATS_FILE):
+    """Merge this process's stats into path (atomically replacing it)."""
+    current = snapshot()
+    if not current["statements"]:
+        return
+    merged = merge(load_stats(path), current)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(merged, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def percentile_ms(entry, fraction):
+    """Estimate a latency percentile from the histogram (bucket upper bound)."""
+    target = entry["count"] * fraction
+    seen = 0
+    for bound, count in zip(BUCKETS_MS + (float("inf"),), entry["histogram"]):
+        seen += count
+        if seen >= target:
+            return bound if bound != float("inf") else entry["max_ms"]
+    return entry["max_ms"]
+
+
+enable_from_env()
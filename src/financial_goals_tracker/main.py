@@ -1,62 +1,171 @@
 from financial_goals_tracker import goals_calculator
 from financial_goals_tracker import db
 from financial_goals_tracker import investment_recommendation
+from financial_goals_tracker import portfolio
+from financial_goals_tracker import export
+from financial_goals_tracker import instrumentation
+from financial_goals_tracker import metrics
+from financial_goals_tracker import milestones
+from financial_goals_tracker import projections
 from rich.table import Table
 from rich.console import Console
 from rich.prompt import Prompt
-import csv
+from rich.markup import escape
+from rich.progress import Progress
 import matplotlib.pyplot as plt
 from datetime import datetime
+import numpy as np
 import os
+import re
 
 console = Console()
 
-def display_goals():
-    """Fetch and display saved financial goals in a table format."""
-    goals = db.fetch_goals()
-
-    if not goals:
-        console.print("[yellow]No goals found. Add a goal first![/yellow]")
-        return
+PAGE_SIZE = 25  # Rows rendered per table page in listings
+
+def page_through(pages, render_page):
+    """Render pages one at a time, asking before fetching past the first page.
+
+    The next page is fetched before prompting so the user is only asked when
+    there is more to show. Returns the number of pages rendered.
+    """
+    pages = iter(pages)
+    page = next(pages, None)
+    page_number = 0
+    while page:
+        page_number += 1
+        render_page(page, page_number)
+        page = next(pages, None)
+        if not page:
+            break
+        more = Prompt.ask("[bold]Press Enter for the next page or 'q' to stop[/bold]", default="")
+        if more.strip().lower() == "q":
+            break
+    return page_number
 
-    table = Table(title="Saved Financial Goals")
+def goals_table(goals, title="Saved Financial Goals"):
+    """Build a Rich table for db.Goal rows."""
+    table = Table(title=title)
     table.add_column("ID", justify="right", style="bold yellow")
     table.add_column("Goal Name", style="bold cyan")
-    table.add_column("Target (INR)", justify="right")
+    table.add_column("Currency", justify="center")
+    table.add_column("Target", justify="right")
     table.add_column("Time (Years)", justify="center")
     table.add_column("CAGR (%)", justify="right")
     table.add_column("Mode", justify="center", style="bold magenta")
-    table.add_column("Lumpsum (INR)", justify="right")
-    table.add_column("SIP (INR)", justify="right")
+    table.add_column("Lumpsum", justify="right")
+    table.add_column("SIP", justify="right")
     table.add_column("Start Date", justify="center")
-    table.add_column("Total Contributions", justify="right", style="green")  # New Column
-    table.add_column("Progress (%)", justify="right", style="magenta")  # New Column
+    table.add_column("Total Contributions", justify="right", style="green")
+    table.add_column("Progress (%)", justify="right", style="magenta")
     table.add_column("Notes", style="italic")
     table.add_column("Created At", justify="center")
-    
-    for goal in goals:
-        goal_id = goal[0]  # ID
-        total_contributions = db.get_goal_total_contributions(goal_id)  # Fetch from DB
-        progress = (total_contributions / goal[2]) * 100 if goal[2] > 0 else 0  # Calculate %
 
+    for goal in goals:
         table.add_row(
-            str(goal[0]),  # ID
-            goal[1],       # Goal Name
-            f"{goal[2]:,.2f}",  # Target Amount
-            str(goal[3]),  # Time Horizon
-            f"{goal[4]:.1f}",  # CAGR
-            goal[5],       # Investment Mode
-            f"{goal[6]:,.2f}" if goal[6] else "-",  # Lumpsum Investment
-            f"{goal[7]:,.2f}" if goal[7] else "-",  # SIP Amount
-            goal[8] if goal[8] else "-",  # Start Date
-            f"{total_contributions:,.2f}",  # Display Contributions
-            f"{progress:.2f}%",  # Display Progress
-            goal[10] if goal[9] else "-", # Notes
-            goal[9] 
+            str(goal.id),
+            goal.goal_name,
+            goal.currency,
+            f"{goal.target_amount:,.2f}",
+            str(goal.time_horizon),
+            f"{goal.cagr:.1f}",
+            goal.investment_mode,
+            f"{goal.initial_investment:,.2f}" if goal.initial_investment else "-",
+            f"{goal.sip_amount:,.2f}" if goal.sip_amount else "-",
+            goal.start_date if goal.start_date else "-",
+            f"{goal.contributions_total or 0:,.2f}",
+            f"{goal.progress:.2f}%",
+            goal.notes if goal.notes else "-",
+            goal.created_at
+        )
+
+    return table
+
+def display_goals():
+    """Fetch and display saved financial goals in a paginated table format."""
+
+    def render_page(goals, page_number):
+        title = "Saved Financial Goals" if page_number == 1 else f"Saved Financial Goals (page {page_number})"
+        console.print(goals_table(goals, title))
+
+    if not page_through(db.iter_goal_pages(PAGE_SIZE, db.goal_row), render_page):
+        console.print("[yellow]No goals found. Add a goal first![/yellow]")
+
+def get_optional_number(prompt_text, input_type=float):
+    """Prompt for an optional number; blank input returns None."""
+    while True:
+        user_input = Prompt.ask(f"[bold]{prompt_text}[/bold]", default="").strip()
+        if not user_input:
+            return None
+        try:
+            return input_type(user_input)
+        except ValueError:
+            console.print(f"[red]Invalid input. Please enter a valid {input_type.__name__} or leave blank.[/red]")
+
+def filter_goals_menu():
+    """Show only the goals matching user-selected filters, in the chosen order."""
+    console.print("\n[bold cyan]Find Goals[/bold cyan] [italic](leave any filter blank to skip it)[/italic]\n")
+
+    query = db.GoalQuery()
+
+    mode = Prompt.ask("[bold]Investment mode[/bold]", choices=["", "SIP", "Lumpsum", "Lumpsum + SIP"], default="")
+    if mode:
+        query.mode(mode)
+    query.name_contains(Prompt.ask("[bold]Name contains[/bold]", default="").strip())
+    query.horizon_between(get_optional_number("Minimum time horizon (years):", int),
+                          get_optional_number("Maximum time horizon (years):", int))
+    query.progress_between(get_optional_number("Minimum progress (%):"),
+                           get_optional_number("Maximum progress (%):"))
+    query.cagr_between(get_optional_number("Minimum CAGR (%):"),
+                       get_optional_number("Maximum CAGR (%):"))
+
+    sort_key = Prompt.ask("[bold]Sort by[/bold]", choices=list(db.GoalQuery.SORT_KEYS), default="created")
+    descending = Prompt.ask("[bold]Descending order?[/bold]", choices=["y", "n"], default="y") == "y"
+    query.order_by(sort_key, descending=descending)
+
+    def render_page(goals, page_number):
+        title = "Matching Goals" if page_number == 1 else f"Matching Goals (page {page_number})"
+        console.print(goals_table(goals, title))
+
+    if not page_through(query.iter_pages(PAGE_SIZE, db.goal_row), render_page):
+        console.print("[yellow]No goals match these filters.[/yellow]")
+
+def highlight_hits(text):
+    """Turn search hits (between db.HIT_START and db.HIT_END) into bold Rich markup, escaping everything else."""
+    parts = re.split(f"{db.HIT_START}(.*?){db.HIT_END}", text)  # Odd indices are hits
+    return "".join(f"[bold green]{escape(part)}[/bold green]" if i % 2 else escape(part)
+                   for i, part in enumerate(parts))
+
+def search_results_table(results, title="Search Results"):
+    """Build a Rich table for db.search_goals() rows, best match first."""
+    table = Table(title=title)
+    table.add_column("ID", justify="right", style="bold yellow")
+    table.add_column("Goal Name", style="bold cyan")
+    table.add_column("Target", justify="right")
+    table.add_column("Mode", justify="center", style="bold magenta")
+    table.add_column("Progress (%)", justify="right", style="magenta")
+    table.add_column("Match", style="italic")
 
+    for *columns, _score, match in results:
+        goal = db.Goal(*columns)
+        table.add_row(
+            str(goal.id),
+            goal.goal_name,
+            f"{goal.target_amount:,.2f} {goal.currency}",
+            goal.investment_mode,
+            f"{goal.progress:.2f}%",
+            highlight_hits(match) if match else "-"
         )
 
-    console.print(table)
+    return table
+
+def search_goals_menu():
+    """Search goal names, notes and fund names; shows the best matches first."""
+    text = Prompt.ask("[bold]Search goals (names, notes, fund names)[/bold]").strip()
+    results = db.search_goals(text, limit=PAGE_SIZE)
+    if not results:
+        console.print(f"[yellow]No goals match '{text}'.[/yellow]")
+        return
+    console.print(search_results_table(results, f"Goals matching '{text}'"))
 
 def get_numeric_input(prompt_text, default=0, input_type=int):
     """Reusable function to get a numeric input with validation."""
@@ -71,10 +180,17 @@ def get_user_input():
     """Prompt user for goal details, integrate goal calculator, and allow fund selection."""
     goal_name = Prompt.ask("[bold]Enter goal name[/bold]")
 
+    while True:
+        try:
+            currency = db.currency_code(Prompt.ask("[bold]Enter goal currency:[/bold] ", default=db.BASE_CURRENCY))
+            break
+        except ValueError:
+            console.print("[red]Please enter a 3-letter currency code (e.g. INR, USD, EUR).[/red]")
+
     # Handle numeric inputs with validation
     while True:
         try:
-            target_amount = int(Prompt.ask("[bold]Enter target amount (INR):[/bold] ", default="0"))
+            target_amount = int(Prompt.ask(f"[bold]Enter target amount ({currency}):[/bold] ", default="0"))
             if target_amount < 0:
                 console.print("[red]Amount cannot be negative.[/red]")
                 continue
@@ -120,7 +236,7 @@ def get_user_input():
     if investment_mode == "Lumpsum":
         while True:
             try:
-                initial_investment = int(Prompt.ask("[bold]Enter lumpsum amount (INR):[/bold] ", default="0"))
+                initial_investment = int(Prompt.ask(f"[bold]Enter lumpsum amount ({currency}):[/bold] ", default="0"))
                 if initial_investment < 0:
                     console.print("[red]Amount cannot be negative.[/red]")
                     continue
@@ -130,7 +246,7 @@ def get_user_input():
     
     elif investment_mode == "SIP":
         sip_amount = goals_calculator.calculate_sip(target_amount, time_horizon, cagr)
-        console.print(f"\n[bold green]Required monthly SIP: ₹{sip_amount:,.2f}[/bold green]")
+        console.print(f"\n[bold green]Required monthly SIP: {sip_amount:,.2f} {currency}[/bold green]")
     
     elif investment_mode == "SIP + Lumpsum":
         console.print("\n[bold cyan]Choose how to allocate your Lumpsum investment:[/bold cyan]")
@@ -149,14 +265,14 @@ def get_user_input():
                 target_amount, time_horizon, cagr, lumpsum_percentage=lumpsum_percentage
             )
         else:
-            lumpsum_amount = get_numeric_input("Enter the fixed Lumpsum amount (INR):", default=0, input_type=float)
+            lumpsum_amount = get_numeric_input(f"Enter the fixed Lumpsum amount ({currency}):", default=0, input_type=float)
             initial_investment, sip_amount = goals_calculator.calculate_mixed(
                 target_amount, time_horizon, cagr, lumpsum_amount=lumpsum_amount
             )
         
         console.print(f"\n[bold green]Required investments:[/bold green]")
-        console.print(f"[green]Lumpsum: ₹{initial_investment:,.2f}[/green]")
-        console.print(f"[green]Monthly SIP: ₹{sip_amount:,.2f}[/green]")
+        console.print(f"[green]Lumpsum: {initial_investment:,.2f} {currency}[/green]")
+        console.print(f"[green]Monthly SIP: {sip_amount:,.2f} {currency}[/green]")
 
     # Start Date Input
     start_date = Prompt.ask("[bold]Enter start date (YYYY-MM-DD, leave blank for today):[/bold] ").strip()
@@ -181,7 +297,8 @@ def get_user_input():
         "initial_investment": initial_investment,
         "sip_amount": sip_amount,
         "start_date": start_date,
-        "notes": notes
+        "notes": notes,
+        "currency": currency
     }
 
 
@@ -294,7 +411,8 @@ def edit_goal_menu():
         console.print("[yellow]Edit canceled.[/yellow]")
         return
 
-    if not db.goal_exists(goal_id):
+    goal = db.fetch_goal_by_id(goal_id, row_factory=db.goal_row)
+    if not goal:
         console.print("[red]Error: No goal found with this ID.[/red]")
         return
 
@@ -330,20 +448,29 @@ def edit_goal_menu():
         new_value = console.input(f"[bold]Enter new value for {field_name.replace('_', ' ').title()}:[/bold] ").strip()
         updated_data[field_name] = new_value
 
+    try:
+        updated_data = db.validate_goal_changes(updated_data)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        return
+
     console.print("\n[bold cyan]Confirm changes:[/bold cyan]")
     for field, value in updated_data.items():
         console.print(f"  [bold yellow]{field.replace('_', ' ').title()}[/bold yellow]: {value}")
 
     confirm = console.input("[bold red]Are you sure you want to update these fields? (y)es/(n)o):[/bold red] ").strip().lower()
     if confirm == "y":
-        for field, value in updated_data.items():
-            db.update_goal(goal_id, field, value)
+        # One transaction; SIP/lumpsum are re-planned if target, horizon, CAGR or mode changed
+        changed = db.patch_goal(goal_id, updated_data)
         console.print("[green]Goal updated successfully![/green]")
+        for field in ("initial_investment", "sip_amount"):
+            if field in changed and field not in updated_data:
+                console.print(f"  [cyan]{field.replace('_', ' ').title()} re-planned:[/cyan] {changed[field]:,.2f} {goal.currency}")
     else:
         console.print("[yellow]Edit canceled.[/yellow]")
 
 def log_contribution_menu():
-    """Menu for logging a new contribution to a goal."""
+    """Menu for logging a new contribution to a goal, in its currency or another one."""
     display_goals()  # Show available goals
 
     goal_id = Prompt.ask("[bold]Enter the ID of the goal to contribute to (or 0 to cancel):[/bold]").strip()
@@ -357,7 +484,7 @@ def log_contribution_menu():
     goal_id = int(goal_id)
 
     # Fetch goal details first
-    goal = db.fetch_goal_by_id(goal_id)
+    goal = db.fetch_goal_by_id(goal_id, row_factory=db.goal_row)
     if not goal:
         console.print("[red]Goal not found.[/red]")
         return
@@ -365,7 +492,14 @@ def log_contribution_menu():
     # Get basic contribution details
     while True:
         try:
-            amount = float(Prompt.ask("[bold]Enter contribution amount (INR):[/bold]").strip())
+            currency = db.currency_code(Prompt.ask("[bold]Enter contribution currency:[/bold]", default=goal.currency))
+            break
+        except ValueError:
+            console.print("[red]Please enter a 3-letter currency code (e.g. INR, USD, EUR).[/red]")
+
+    while True:
+        try:
+            amount = float(Prompt.ask(f"[bold]Enter contribution amount ({currency}):[/bold]").strip())
             if amount <= 0:
                 console.print("[red]Amount must be positive.[/red]")
                 continue
@@ -386,7 +520,7 @@ def log_contribution_menu():
 
     # Log the contribution
     try:
-        db.log_contribution(goal_id, amount, date)
+        db.log_contribution(goal_id, amount, date, currency=currency)
         console.print("[green]Contribution logged successfully![/green]")
     except Exception as e:
         console.print(f"[red]Error logging contribution: {str(e)}[/red]")
@@ -406,37 +540,39 @@ def view_contributions_menu():
         return
     goal_id = int(goal_id)
 
-    contributions = db.fetch_contributions(goal_id)
-
-    if not contributions:
-        console.print("[yellow]No contributions found for this goal.[/yellow]")
-        return
-
-    table = Table(title=f"Contribution History for Goal ID {goal_id}")
-    table.add_column("ID", style="bold yellow")
-    table.add_column("Amount (INR)", justify="right", style="green")
-    table.add_column("Date", justify="center", style="bold cyan")
+    def render_page(contributions, page_number):
+        title = f"Contribution History for Goal ID {goal_id}"
+        if page_number > 1:
+            title += f" (page {page_number})"
+        table = Table(title=title)
+        table.add_column("ID", style="bold yellow")
+        table.add_column("Amount", justify="right", style="green")
+        table.add_column("Date", justify="center", style="bold cyan")
+        table.add_column("Fund", style="italic")
+        table.add_column("NAV", justify="right")
+
+        for entry in contributions:
+            table.add_row(
+                str(entry[0]),
+                f"{entry[1]:,.2f} {entry[5]}",
+                entry[2],
+                entry[3] or "-",
+                f"{entry[4]:,.4f}" if entry[4] else "-"
+            )
 
-    for entry in contributions:
-        table.add_row(str(entry[0]), f"{entry[1]:,.2f}", entry[2])
+        console.print(table)
 
-    console.print(table)
+    if not page_through(db.iter_contribution_pages(goal_id, PAGE_SIZE), render_page):
+        console.print("[yellow]No contributions found for this goal.[/yellow]")
 
-def export_to_csv():
-    """Export financial goals and contributions to CSV files."""
-    goals = db.fetch_all_goals()
-    contributions = db.fetch_all_contributions()
+def export_to_csv(fmt="csv", compress=False, goal_ids=None, start_date=None, end_date=None):
+    """Export financial goals and contributions, streaming rows to CSV or JSON Lines files."""
+    goals_filename = export.export_path("goals_export", fmt, compress)
+    contributions_filename = export.export_path("contributions_export", fmt, compress)
 
-    goals_filename = "goals_export.csv"
-    contributions_filename = "contributions_export.csv"
-    
     # Check if files already exist
-    files_exist = []
-    if os.path.exists(goals_filename):
-        files_exist.append(goals_filename)
-    if os.path.exists(contributions_filename):
-        files_exist.append(contributions_filename)
-        
+    files_exist = [name for name in (goals_filename, contributions_filename) if os.path.exists(name)]
+
     if files_exist:
         file_list = ", ".join(files_exist)
         confirm = Prompt.ask(
@@ -447,39 +583,57 @@ def export_to_csv():
             console.print("[yellow]Export cancelled.[/yellow]")
             return
 
-    # Export goals to CSV
-    with open(goals_filename, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["ID", "Goal Name", "Target Amount", "Time Horizon", "CAGR (%)",
-                         "Investment Mode", "Lumpsum (INR)", "SIP (INR)", "Start Date",
-                         "Created At", "Notes", "Total Contributions"])
-        writer.writerows(goals)
+    with Progress(console=console) as progress_bar:
+        goals_task = progress_bar.add_task("Exporting goals", total=None)
+        goals_count = export.export_goals(
+            goals_filename, fmt, compress, goal_ids,
+            progress=lambda done, total: progress_bar.update(goals_task, completed=done, total=total)
+        )
+        contributions_task = progress_bar.add_task("Exporting contributions", total=None)
+        contributions_count = export.export_contributions(
+            contributions_filename, fmt, compress, goal_ids, start_date, end_date,
+            progress=lambda done, total: progress_bar.update(contributions_task, completed=done, total=total)
+        )
+
+    console.print(f"[green]{goals_count:,} goals exported successfully to {goals_filename}[/green]")
+    console.print(f"[green]{contributions_count:,} contributions exported successfully to {contributions_filename}[/green]")
+
+def export_menu():
+    """Prompt for export format and filters, then export goals and contributions."""
+    console.print("\n[bold cyan]Export Data[/bold cyan]\n")
+
+    fmt = Prompt.ask("[bold]Format[/bold]", choices=list(export.EXPORT_FORMATS), default="csv")
+    compress = Prompt.ask("[bold]Compress with gzip?[/bold]", choices=["y", "n"], default="n") == "y"
+
+    goal_ids = Prompt.ask("[bold]Goal IDs to export (comma-separated, blank for all)[/bold]", default="").strip()
+    goal_ids = [int(goal_id) for goal_id in goal_ids.split(",") if goal_id.strip().isdigit()]
 
-    console.print(f"[green]Goals exported successfully to {goals_filename}[/green]")
+    start_date = Prompt.ask("[bold]Contributions from (YYYY-MM-DD, blank for no limit)[/bold]", default="").strip()
+    end_date = Prompt.ask("[bold]Contributions until (YYYY-MM-DD, blank for no limit)[/bold]", default="").strip()
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                console.print("[red]Invalid date format. Export cancelled.[/red]")
+                return
 
-    # Export contributions to CSV
-    with open(contributions_filename, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["ID", "Goal ID", "Goal Name", "Amount (INR)", "Date"])
-        writer.writerows(contributions)
+    export_to_csv(fmt, compress, goal_ids or None, start_date or None, end_date or None)
 
-    console.print(f"[green]Contributions exported successfully to {contributions_filename}[/green]")
+def prepare_progress_series(days, amounts):
+    """Turn daily (datetime64 day, amount) arrays into plot-ready dates and a running total."""
+    return days, np.cumsum(amounts)
 
-def plot_goal_progress(goal_id, goal_name, target_amount):
+def plot_goal_progress(goal_id, goal_name, target_amount, currency=db.BASE_CURRENCY):
     """Generate a progress graph for a financial goal."""
-    contributions = db.fetch_contributions_for_graph(goal_id)
+    days, amounts = db.fetch_contribution_series(goal_id)
 
-    if not contributions:
+    if not len(days):
         console.print("[yellow]No contributions recorded for this goal.[/yellow]")
         return
 
     try:
-        # Convert data into lists for plotting
-        dates = [datetime.strptime(entry[0], "%Y-%m-%d") for entry in contributions]
-        amounts = [entry[1] for entry in contributions]
-
-        # Generate cumulative sum for progress tracking
-        cumulative_contributions = [sum(amounts[:i+1]) for i in range(len(amounts))]
+        dates, cumulative_contributions = prepare_progress_series(days, amounts)
 
         # Expected progress line (assuming uniform contributions)
         expected_dates = [dates[0], dates[-1]]
@@ -491,7 +645,7 @@ def plot_goal_progress(goal_id, goal_name, target_amount):
         plt.plot(expected_dates, expected_amounts, linestyle="dashed", color="red", label="Expected Progress")
         
         plt.xlabel("Date")
-        plt.ylabel("Amount (INR)")
+        plt.ylabel(f"Amount ({currency})")
         plt.title(f"Progress for {goal_name}")
         plt.legend()
         plt.grid(True)
@@ -517,101 +671,71 @@ def view_progress_graph_menu():
         return
     goal_id = int(goal_id)
 
-    goal_data = db.fetch_goal_by_id(goal_id)
-    if not goal_data:
+    goal = db.fetch_goal_by_id(goal_id, row_factory=db.goal_row)
+    if not goal:
         console.print("[red]Goal not found.[/red]")
         return
 
-    goal_name, target_amount, time_horizon, cagr = goal_data[1], goal_data[2], goal_data[3], goal_data[4]
-
     # Show progress graph first
-    plot_goal_progress(goal_id, goal_name, target_amount)
+    plot_goal_progress(goal_id, goal.goal_name, goal.target_amount, goal.currency)
 
     # Then show milestone tracking
     console.print("\n[bold cyan]Milestone Progress:[/bold cyan]")
-    calculate_milestones(goal_id, target_amount)
+    calculate_milestones(goal_id, goal.currency)
 
     # Show future value projection
     console.print("\n[bold cyan]Future Value Projection:[/bold cyan]")
-    calculate_future_value(goal_id, target_amount, time_horizon, cagr)
+    calculate_future_value(goal_id, goal.currency)
 
     console.input("\nPress Enter to return to the main menu...")
 
-def calculate_milestones(goal_id, target_amount):
-    """Check milestone progress for a goal."""
-    total_contributions = db.get_goal_total_contributions(goal_id)
-    
-    milestones = {
-        "25%": target_amount * 0.25,
-        "50%": target_amount * 0.50,
-        "75%": target_amount * 0.75,
-        "100% (Goal Achieved!)": target_amount
-    }
+def calculate_milestones(goal_id, currency=db.BASE_CURRENCY):
+    """Show when a goal crossed, or is projected to cross, each milestone."""
+    rows = milestones.goal_milestones(goal_id)  # Stored by the milestone engine; recomputed only if stale
 
     table = Table(title=f"Milestone Progress for Goal ID {goal_id}")
     table.add_column("Milestone", style="bold yellow")
-    table.add_column("Target Amount (INR)", justify="right", style="cyan")
+    table.add_column(f"Target Amount ({currency})", justify="right", style="cyan")
     table.add_column("Status", justify="center", style="bold green")
+    table.add_column("Date", justify="center")
 
-    for label, amount in milestones.items():
-        status = "✔ Reached" if total_contributions >= amount else "❌ Pending"
-        table.add_row(label, f"{amount:,.2f}", status)
+    for milestone, amount, crossed_on, projected_on in rows:
+        label = "100% (Goal Achieved!)" if milestone == 100 else f"{milestone}%"
+        if crossed_on:
+            status, when = "✔ Reached", crossed_on
+        else:
+            status, when = "❌ Pending", f"~{projected_on} (projected)" if projected_on else "Not on current SIP"
+        table.add_row(label, f"{amount:,.2f}", status, when)
 
     console.print(table)
 
-def calculate_future_value(goal_id, target_amount, time_horizon, cagr):
+def calculate_future_value(goal_id, currency=db.BASE_CURRENCY):
     """Calculate future value of current contributions and determine shortfall/surplus."""
-    total_contributions = db.get_goal_total_contributions(goal_id)
-    goal_data = db.fetch_goal_by_id(goal_id)
+    projection = projections.goal_projection(goal_id)  # Stored; recomputed only after the goal changes
 
-    if not goal_data or len(goal_data) < 8:
+    if not projection:
         console.print("[red]Error: Goal data is incomplete or missing.[/red]")
         return
 
-    sip_amount = goal_data[7]  # Monthly SIP amount
-    cagr_decimal = cagr / 100
-    n = 12  # Monthly compounding - moved outside the if block
-
-    # Future Value of existing investments
-    future_value_existing = total_contributions * ((1 + cagr_decimal) ** time_horizon)
-
-    # Future Value of SIP contributions (corrected formula for monthly compounding)
-    if cagr_decimal > 0:
-        monthly_rate = cagr_decimal / n  # Convert annual CAGR to monthly
-        months = time_horizon * n  # Total number of months
-        fv_sip = sip_amount * (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate)
-    else:
-        fv_sip = sip_amount * time_horizon * n  # If CAGR is 0, simple sum
-
-    # Total Future Value
-    total_future_value = future_value_existing + fv_sip
-    shortfall = target_amount - total_future_value
-
-    # Calculate required SIP increase if needed
-    required_sip = 0
-    if shortfall > 0:
-        if cagr_decimal > 0:
-            monthly_rate = cagr_decimal / n
-            months = time_horizon * n
-            required_sip = shortfall * monthly_rate / (((1 + monthly_rate) ** months - 1) * (1 + monthly_rate))
-        else:
-            # If CAGR is 0, simple division
-            required_sip = shortfall / (time_horizon * n)
+    total_contributions, sip_amount, target_amount = (projection.total_contributions, projection.sip_amount,
+                                                      projection.target_amount)
+    total_future_value, shortfall, required_sip = (projection.future_value, projection.shortfall,
+                                                   projection.required_sip)
 
     # Display results
     table = Table(title=f"Future Value Projection for Goal ID {goal_id}")
     table.add_column("Metric", style="bold yellow")
     table.add_column("Value", justify="right", style="cyan")
 
-    table.add_row("Current Contributions (INR)", f"{total_contributions:,.2f}")
-    table.add_row("Ongoing SIP (INR)", f"{sip_amount:,.2f}")
-    table.add_row("Expected Future Value (INR)", f"{total_future_value:,.2f}")
-    table.add_row("Target Amount (INR)", f"{target_amount:,.2f}")
+    table.add_row(f"Current Contributions ({currency})", f"{total_contributions:,.2f}")
+    table.add_row(f"Ongoing SIP ({currency})", f"{sip_amount:,.2f}")
+    table.add_row(f"Expected Future Value ({currency})", f"{total_future_value:,.2f}")
+    table.add_row(f"Target Amount ({currency})", f"{target_amount:,.2f}")
     table.add_row("Status", "[green]✔ On Track[/green]" if total_future_value >= target_amount else "[red]❌ Shortfall[/red]")
 
     if shortfall > 0:
-        table.add_row("Shortfall Amount (INR)", f"{shortfall:,.2f}")
-        table.add_row("Increase SIP to Stay on Track (INR)", f"{required_sip:,.2f}")
+        table.add_row(f"Shortfall Amount ({currency})", f"{shortfall:,.2f}")
+        table.add_row(f"Increase SIP to Stay on Track ({currency})", f"{required_sip:,.2f}")
 
     console.print(table)
 
@@ -620,8 +744,111 @@ def calculate_future_value(goal_id, target_amount, time_horizon, cagr):
     if total_future_value >= target_amount:
         console.print("[green]✔ You are on track! Keep your current SIP to meet your goal.[/green]")
     else:
-        console.print(f"[red]❌ Your current SIP of ₹{sip_amount:,.2f} is not enough.[/red]")
-        console.print(f"[yellow]💡 Consider increasing it to ₹{required_sip:,.2f} to stay on track.[/yellow]")
+        console.print(f"[red]❌ Your current SIP of {sip_amount:,.2f} {currency} is not enough.[/red]")
+        console.print(f"[yellow]💡 Consider increasing it to {required_sip:,.2f} {currency} to stay on track.[/yellow]")
+
+def portfolio_report_table(report):
+    """Build a Rich table summarizing a PortfolioReport."""
+    summary = report.summary()
+    currency = report.currency
+    table = Table(title="Portfolio Health Report")
+    table.add_column("Metric", style="bold yellow")
+    table.add_column("Value", justify="right", style="cyan")
+
+    table.add_row("Goals", str(summary["goals"]))
+    table.add_row("On Track", f"{summary['on_track']} / {summary['goals']}")
+    table.add_row(f"Total Target ({currency})", f"{summary['target_amount']:,.2f}")
+    table.add_row(f"Total Contributions ({currency})", f"{summary['total_contributions']:,.2f}")
+    table.add_row(f"Expected Future Value ({currency})", f"{summary['future_value']:,.2f}")
+    table.add_row(f"Total Shortfall ({currency})", f"{summary['shortfall']:,.2f}")
+    table.add_row(f"Total SIP Increase Needed ({currency})", f"{summary['required_sip']:,.2f}")
+    for label, count in summary["milestones"].items():
+        table.add_row(f"Goals Past {label}", str(count))
+
+    return table
+
+def portfolio_goals_table(records, title="Goal Projections", currency=db.BASE_CURRENCY):
+    """Build a Rich table of per-goal rows from PortfolioReport.records()."""
+    table = Table(title=title)
+    table.add_column("ID", justify="right", style="bold yellow")
+    table.add_column("Goal Name", style="bold cyan")
+    table.add_column("Progress (%)", justify="right", style="magenta")
+    table.add_column("Milestone", justify="center")
+    table.add_column(f"Future Value ({currency})", justify="right")
+    table.add_column(f"Shortfall ({currency})", justify="right")
+    table.add_column(f"SIP Increase ({currency})", justify="right")
+    table.add_column("Status", justify="center")
+
+    for record in records:
+        table.add_row(
+            str(record["goal_id"]),
+            record["goal_name"],
+            f"{record['progress']:.2f}%",
+            f"{record['milestone']}%" if record["milestone"] else "-",
+            f"{record['future_value']:,.2f}",
+            f"{record['shortfall']:,.2f}" if record["shortfall"] > 0 else "-",
+            f"{record['required_sip']:,.2f}" if record["required_sip"] > 0 else "-",
+            "[green]✔ On Track[/green]" if record["on_track"] else "[red]❌ Shortfall[/red]"
+        )
+
+    return table
+
+def query_stats_table(stats, top=20):
+    """Build a Rich table of the statements with the most total time from an instrumentation snapshot."""
+    table = Table(title="Query Stats")
+    table.add_column("Statement", style="cyan", overflow="fold")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (ms)", justify="right", style="magenta")
+    table.add_column("Mean (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("Max (ms)", justify="right")
+    table.add_column("Rows", justify="right")
+    table.add_column("VM Steps", justify="right")
+
+    ranked = sorted(stats["statements"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    for sql, entry in ranked[:top]:
+        table.add_row(
+            sql if len(sql) <= 120 else sql[:117] + "...",
+            f"{entry['count']:,}",
+            f"{entry['total_ms']:,.2f}",
+            f"{entry['total_ms'] / entry['count']:,.3f}",
+            f"<= {instrumentation.percentile_ms(entry, 0.95):g}",
+            f"{entry['max_ms']:,.3f}",
+            f"{entry['rows']:,}",
+            f"~{entry['vm_steps']:,}"
+        )
+
+    return table
+
+def portfolio_report_menu():
+    """Show the portfolio-wide health report and optionally export it."""
+    report = portfolio.build_report()
+    if not len(report):
+        console.print("[yellow]No goals found. Add a goal first![/yellow]")
+        return
+
+    console.print(portfolio_report_table(report))
+
+    records = report.records()
+
+    def chunks():
+        while True:
+            chunk = [record for _, record in zip(range(PAGE_SIZE), records)]
+            if not chunk:
+                return
+            yield chunk
+
+    page_through(chunks(), lambda chunk, page_number: console.print(
+        portfolio_goals_table(chunk, currency=report.currency)))
+
+    export_format = Prompt.ask("[bold]Export report?[/bold]", choices=["none", "json", "csv"], default="none")
+    if export_format != "none":
+        filename = f"portfolio_report.{export_format}"
+        if export_format == "json":
+            portfolio.export_json(report, filename)
+        else:
+            portfolio.export_csv(report, filename)
+        console.print(f"[green]Report exported successfully to {filename}[/green]")
 
 def display_basics():
     """Display the status of financial basics in a table format."""
@@ -859,6 +1086,10 @@ def backup_menu():
         elif choice == "4":
             break
 
+MENU_OPTIONS = ["The Basics", "Add Goal", "View Goals", "Goal Calculator", "Edit Goal", "Delete Goal",
+                "Log Contribution", "View Contributions", "Export Data", "View Progress Graph",
+                "Backup & Restore", "Find Goals", "Portfolio Report", "Search Goals", "Exit"]
+
 def main_menu():
     """Display CLI menu with Rich UI."""
     while True:
@@ -868,30 +1099,22 @@ def main_menu():
         table.add_column("Option", justify="center", style="bold yellow", no_wrap=True)
         table.add_column("Description", style="bold")
 
-        table.add_row("1", "The Basics")
-        table.add_row("2", "Add Goal")
-        table.add_row("3", "View Goals")
-        table.add_row("4", "Goal Calculator")
-        table.add_row("5", "Edit Goal")
-        table.add_row("6", "Delete Goal")
-        table.add_row("7", "Log Contribution")
-        table.add_row("8", "View Contributions")
-        table.add_row("9", "Export to CSV")
-        table.add_row("10", "View Progress Graph")
-        table.add_row("11", "Backup & Restore")
-        table.add_row("12", "Exit")
+        for number, option in enumerate(MENU_OPTIONS, 1):
+            table.add_row(str(number), option)
 
         console.print(table)
 
         while True:
-            choice = Prompt.ask("[bold]Choose an option (1-12)[/bold]")
+            choice = Prompt.ask("[bold]Choose an option (1-15)[/bold]")
             try:
                 choice = int(choice)
-                if choice in range(1, 13):
+                if choice in range(1, 16):
                     break
-                console.print("[red]Invalid choice. Please select a valid option (1-12).[/red]")
+                console.print("[red]Invalid choice. Please select a valid option (1-15).[/red]")
             except ValueError:
-                console.print("[red]Invalid input. Please enter a number (1-12).[/red]")
+                console.print("[red]Invalid input. Please enter a number (1-15).[/red]")
+
+        metrics.ACTIONS.labels("menu", MENU_OPTIONS[choice - 1]).inc()
 
         if choice == 1:
             basics_menu()
@@ -918,10 +1141,17 @@ def main_menu():
         elif choice == 11:
             backup_menu()
         elif choice == 12:
+            filter_goals_menu()
+        elif choice == 13:
+            portfolio_report_menu()
+        elif choice == 14:
+            search_goals_menu()
+        elif choice == 15:
             console.print("[bold red]Exiting program.[/bold red]")
             break
 
 if __name__ == "__main__":
     db.initialize_db()  # Ensure DB is set up
+    projections.enable_background_rebuild()
     main_menu()
 
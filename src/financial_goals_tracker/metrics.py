@@ -0,0 +1,395 @@
+"""Process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in a Registry. Updates on hot paths are
+cheap: counters and histograms keep one cell per thread, so inc()/observe()
+never take a lock, and cells are only summed when the registry is rendered.
+
+Metrics are exported by writing a textfile-collector file (write_textfile(),
+or automatically at exit when FGT_METRICS_TEXTFILE is set), by the
+`financial-tracker metrics` command, or from /metrics on the local JSON API.
+
+Each CLI run is a new process, so write_textfile() adds this process's
+counter and histogram increments to the totals already in the file rather
+than overwriting them. Gauges are written as this process sees them.
+"""
+import atexit
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent textfile writers may then lose each other's increments
+    fcntl = None
+
+ENV_TEXTFILE = "FGT_METRICS_TEXTFILE"
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Sharded:
+    """Per-thread cells of width floats; summed on read."""
+
+    def __init__(self, width):
+        self._width = width
+        self._cells = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0.0] * self._width
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def total(self):
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(column) for column in zip(*cells)] if cells else [0.0] * self._width
+
+
+class Metric:
+    """Base class: a named metric with optional labels, registered on creation."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()  # Expose zero samples before the first update
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Return the child metric for these label values (in labelnames order)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels; use labels() first")
+        return self.labels()
+
+    def samples(self):
+        """Yield (suffix, label_values, extra_labels, value) for rendering."""
+        for values, child in sorted(self._children.items()):
+            for suffix, extra, value in child.samples():
+                yield suffix, values, extra, value
+
+    def collect(self):
+        """Return (sample, value) pairs, sample being the metric name with its suffix and labels."""
+        return [(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)}", value)
+                for suffix, values, extra, value in self.samples()]
+
+    def render(self, samples=None):
+        """Return the HELP and TYPE lines and a line per sample (default: collect())."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for sample, value in self.collect() if samples is None else samples:
+            lines.append(f"{sample} {_format_value(value)}")
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Sharded(1)
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._shards.cell()[0] += amount
+
+    def get(self):
+        return self._shards.total()[0]
+
+    def samples(self):
+        yield "", (), self.get()
+
+
+class Counter(Metric):
+    """A monotonically increasing value. Names should end in _total."""
+
+    type = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def get(self):
+        return self._default().get()
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = float(value)
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """Read the value from function() whenever the gauge is collected."""
+        self._function = function
+
+    def get(self):
+        return float(self._function()) if self._function else self._value
+
+    def samples(self):
+        try:
+            value = self.get()
+        except Exception:
+            return  # Source unavailable (e.g. no database yet); omit the sample
+        yield "", (), value
+
+
+class Gauge(Metric):
+    """A value that can go up and down, or be computed at collection time."""
+
+    type = "gauge"
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+    def get(self):
+        return self._default().get()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # Cell layout: one count per bucket (+Inf last), then sum, then count
+        self._shards = _Sharded(len(buckets) + 3)
+
+    def observe(self, value):
+        cell = self._shards.cell()
+        cell[bisect.bisect_left(self._buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        totals = self._shards.total()
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), totals):
+            cumulative += count
+            yield "_bucket", (("le", _format_value(bound)),), cumulative
+        yield "_sum", (), totals[-2]
+        yield "_count", (), totals[-1]
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        """Context manager observing the elapsed seconds of its block."""
+        return self._default().time()
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._written = {}  # Counter and histogram samples as of this process's last write_textfile()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write the metrics to path atomically, as the node_exporter textfile collector expects.
+
+        Counters and histograms accumulate across processes: the increments
+        made since this process last wrote are added to the samples already in
+        the file, and samples only other processes produced are kept. Writers
+        hold a lock on the directory, so concurrent runs don't lose updates.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        directory = os.path.dirname(os.path.abspath(path))
+        with _locked(directory):
+            previous = read_textfile(path)
+            lines, written = [], {}
+            for metric in metrics:
+                samples = metric.collect()
+                if metric.type != "gauge":
+                    merged = {}
+                    for sample, value in samples:
+                        written[sample] = value
+                        if sample in previous.get(metric.name, {}):
+                            value += previous[metric.name][sample] - self._written.get(sample, 0)
+                        merged[sample] = value
+                    for sample, value in previous.get(metric.name, {}).items():
+                        merged.setdefault(sample, value)
+                    samples = list(merged.items())
+                lines.extend(metric.render(samples))
+
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self._written = written
+
+
+@contextmanager
+def _locked(directory):
+    """Hold an exclusive lock on directory for the block (no lock where fcntl is unavailable)."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # Releases the lock
+
+
+def read_textfile(path):
+    """Parse a file written by write_textfile() into {metric name: {sample: value}}; {} if it is missing."""
+    families = {}
+    try:
+        f = open(path)
+    except FileNotFoundError:
+        return families
+    with f:
+        samples = None
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("# TYPE "):
+                samples = families.setdefault(line.split()[2], {})
+            elif line and not line.startswith("#") and samples is not None:
+                sample, _, value = line.rpartition(" ")
+                samples[sample] = float(value)
+    return families
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics fed by the rest of the package
+DB_CONNECTIONS = Counter("fgt_db_connections_opened_total", "SQLite connections opened by connect_db().")
+GOALS = Gauge("fgt_goals", "Goals currently stored.")
+CONTRIBUTIONS_LOGGED = Counter("fgt_contributions_logged_total", "Contributions logged.", ["source"])
+CONTRIBUTION_AMOUNT = Counter("fgt_contributions_logged_amount_total",
+                              "Sum of logged contribution amounts (INR).", ["source"])
+BACKUP_DURATION = Histogram("fgt_backup_duration_seconds", "Time taken to write a full CSV backup.")
+RESTORE_DURATION = Histogram("fgt_restore_duration_seconds", "Time taken to restore a CSV backup.")
+RESTORE_ROWS = Counter("fgt_restore_rows_total", "Rows inserted by backup restores.")
+RESTORE_ROWS_PER_SECOND = Gauge("fgt_restore_rows_per_second", "Insert throughput of the most recent restore.")
+PROJECTION_GOALS = Counter("fgt_projection_goals_total", "Goals projected by goals_calculator.project_future_values().")
+PROJECTION_DURATION = Histogram("fgt_projection_duration_seconds", "Time per project_future_values() call.",
+                                buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1))
+ACTIONS = Counter("fgt_actions_total", "Menu options chosen and CLI commands run.", ["interface", "action"])
+API_REQUESTS = Counter("fgt_api_requests_total", "Requests answered by the local JSON API.", ["status"])
+READ_CACHE_LOOKUPS = Counter("fgt_read_cache_lookups_total", "Lookups in the db layer's read-through cache.",
+                             ["result"])
+READ_CACHE_FLUSHES = Counter("fgt_read_cache_flushes_total",
+                             "Read cache flushes after commits by other connections or processes.")
+PROJECTION_CACHE_LOOKUPS = Counter("fgt_projection_cache_lookups_total", "Lookups in the goal_projections cache.",
+                                   ["result"])
+PROJECTION_REBUILDS = Counter("fgt_projection_rebuilds_total",
+                              "Background projection rebuilds after goal writes.", ["result"])
+GROUP_COMMIT_OPS = Histogram("fgt_group_commit_ops", "Write operations per writer.GroupCommitWriter commit.",
+                             buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+
+def render():
+    return REGISTRY.render()
+
+
+def write_textfile(path):
+    REGISTRY.write_textfile(path)
+
+
+if os.environ.get(ENV_TEXTFILE):
+    atexit.register(write_textfile, os.environ[ENV_TEXTFILE])
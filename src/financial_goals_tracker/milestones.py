@@ -0,0 +1,113 @@
+"""Milestone crossing dates: when each goal reached, or is projected to reach, a % of its target.
+
+compute_milestones() runs in batch and stores its results in goal_milestones:
+- historical crossings come from a binary search (np.searchsorted) over each
+  goal's cumulative contribution series, read from a ColumnarLedger (for
+  every goal, the memory-mapped ledger snapshot, rewritten if stale);
+- projected crossings come from solving the SIP growth formula for the
+  number of months in closed form.
+
+Each stored row carries the goal's latest ledger event ID and the date its
+projections were made from. goal_milestones() reads the stored rows, which is
+a primary-key lookup, and recomputes a goal only when its ledger has moved on
+since, its projections were made before the current month, or one of its
+projected dates has passed.
+"""
+from datetime import date
+
+import numpy as np
+
+from financial_goals_tracker import columnar
+from financial_goals_tracker import db
+from financial_goals_tracker.portfolio import MILESTONES
+from financial_goals_tracker.scheduler import add_months
+
+MAX_PROJECTION_MONTHS = 100 * 12  # Further out than this is reported as never
+
+
+def crossing_indexes(amounts, thresholds):
+    """Return, per threshold, the index of the contribution whose running total first reached it.
+
+    amounts are one goal's contributions in date order. The running total is
+    made monotonic with a running maximum (so a later reversal doesn't undo a
+    crossing), which lets every threshold be found by binary search. Thresholds
+    never reached get len(amounts).
+    """
+    if len(amounts) == 0:
+        return np.zeros(len(thresholds), dtype=np.int64)
+    reached = np.maximum.accumulate(np.cumsum(np.asarray(amounts, dtype=float)))
+    return np.searchsorted(reached, thresholds, side="left")
+
+
+def projected_months(totals, sip_amounts, cagrs, amounts):
+    """Months until totals plus the monthly SIP grow to amounts (0 if already there, inf if never).
+
+    Arguments broadcast like NumPy arrays. The current total compounds monthly
+    alongside the SIP, which is invested at the start of each month as in
+    project_future_values(). The growth formula is solved for n:
+
+        P(1+i)^n + S(1+i)((1+i)^n - 1)/i = M  =>  (1+i)^n = (M + A) / (P + A), where A = S(1+i)/i
+    """
+    totals = np.nan_to_num(np.asarray(totals, dtype=float))
+    sip_amounts = np.nan_to_num(np.asarray(sip_amounts, dtype=float))
+    amounts = np.asarray(amounts, dtype=float)
+    rate = np.nan_to_num(np.asarray(cagrs, dtype=float)) / 1200
+    growing = rate > 0
+    safe_rate = np.where(growing, rate, 1.0)  # Avoid division by zero
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = sip_amounts * (1 + safe_rate) / safe_rate
+        compounded = np.log((amounts + annuity) / (totals + annuity)) / np.log1p(safe_rate)
+        linear = (amounts - totals) / sip_amounts  # No growth: the SIP alone closes the gap
+        months = np.where(growing, compounded, linear)
+    months = np.where(totals >= amounts, 0.0, months)
+    # Nothing invested and no SIP (or a negative SIP) never gets there
+    return np.where(np.isfinite(months) & (months >= 0), np.ceil(months - 1e-9), np.inf)
+
+
+def compute_milestones(goal_ids=None, as_of=None):
+    """Compute and store milestone dates for goal_ids (default: every goal). Returns the number of goals."""
+    as_of = as_of or date.today()
+    conn = db.connect_db()
+    try:
+        goals, heads = db.fetch_milestone_inputs(goal_ids, conn)
+        if goal_ids is None:
+            ledger = columnar.load_snapshot(conn=conn)
+        else:
+            ledger = columnar.ColumnarLedger.load(goal_ids, conn=conn)
+    finally:
+        conn.close()
+    dates = ledger.days.astype("datetime64[D]").astype(str)
+
+    fractions = np.array(MILESTONES, dtype=float) / 100
+    if goals:
+        ids, targets, cagrs, sip_amounts, totals = (np.array(column, dtype=float) for column in zip(*goals))
+    else:
+        ids = targets = cagrs = sip_amounts = totals = np.zeros(0)
+    amounts = targets[:, None] * fractions  # One row per goal, one column per milestone
+    months = projected_months(totals[:, None], sip_amounts[:, None], cagrs[:, None], amounts)
+
+    rows = []
+    for index, goal_id in enumerate(ids.astype(int).tolist()):
+        start, end = ledger.span(goal_id)
+        crossed = crossing_indexes(ledger.amounts[start:end], amounts[index])
+        for milestone, amount, crossed_at, month in zip(MILESTONES, amounts[index].tolist(), crossed.tolist(),
+                                                        months[index].tolist()):
+            crossed_on = str(dates[start + crossed_at]) if crossed_at < end - start else None
+            projected_on = None
+            if crossed_on is None and month <= MAX_PROJECTION_MONTHS:
+                projected_on = add_months(as_of, int(month)).isoformat()
+            rows.append((goal_id, milestone, amount, crossed_on, projected_on, heads.get(goal_id, 0),
+                         as_of.isoformat()))
+
+    db.store_goal_milestones(rows, goal_ids)
+    return len(goals)
+
+
+def goal_milestones(goal_id, as_of=None):
+    """Return (milestone, amount, crossed_on, projected_on) rows for a goal, recomputing them only if stale."""
+    rows, current = db.fetch_goal_milestones(goal_id, as_of=as_of)
+    if not current:
+        compute_milestones([goal_id], as_of)
+        rows, _ = db.fetch_goal_milestones(goal_id, as_of=as_of)
+    return rows
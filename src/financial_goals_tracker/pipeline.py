@@ -0,0 +1,144 @@
+"""Parallel parse/validate pipeline for large CSV files.
+
+A file is split into byte ranges that end on line boundaries (line_chunks()).
+run() then passes every chunk through three stages:
+
+- parse: a process pool parses, converts and validates chunks;
+- sequence: the calling thread takes the results in file order, for work that
+  depends on row order (numbering, hashing, error reports);
+- write: one writer thread does the database writes, as SQLite allows one
+  writer at a time anyway.
+
+Memory stays bounded by backpressure. At most max_pending chunks are in the
+pool, and at most queue_size batches wait for the writer. When the writer
+falls behind, the sequence stage blocks instead of buffering, and no new
+chunks are read until it catches up. Each stage's rows, busy time and waits
+are returned as StageStats.
+
+Chunks are split on raw newlines, so quoted fields must not contain line breaks.
+"""
+import csv
+import io
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+DEFAULT_QUEUE_SIZE = 2  # Batches waiting for the writer
+
+
+@dataclass
+class StageStats:
+    """Rows through one pipeline stage and the time spent on them."""
+
+    rows: int = 0
+    busy_s: float = 0.0  # Working time (for parse, summed over every worker)
+    waited_s: float = 0.0  # Time blocked on the stage before or after this one
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.busy_s if self.busy_s else 0.0
+
+
+def line_chunks(path, chunk_bytes=DEFAULT_CHUNK_BYTES, start=0):
+    """Yield (start, end) byte ranges covering path from start, each ending just after a newline (or at EOF)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # Move on to the end of the line the boundary fell in
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def read_chunk(path, start, end, delimiter=","):
+    """Return a csv.reader over bytes start..end of path, and the number of lines they hold."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return csv.reader(io.StringIO(text, newline=""), delimiter=delimiter), text.count("\n")
+
+
+def _timed(parse, task):
+    start = time.perf_counter()
+    rows, payload = parse(task)
+    return time.perf_counter() - start, rows, payload
+
+
+def run(tasks, parse, sequence, write, workers=None, max_pending=None, queue_size=DEFAULT_QUEUE_SIZE,
+        initializer=None, initargs=()):
+    """Run tasks through the parse, sequence and write stages; returns {stage: StageStats}.
+
+    parse(task) runs in a worker process and must be a module-level function
+    returning (rows parsed, payload). sequence(payload) runs in the calling
+    thread in task order and returns the batch (a list) to write, if any.
+    write(batch) runs on the writer thread. The first exception raised by
+    write stops the pipeline and is re-raised here.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    stats = {stage: StageStats() for stage in ("parse", "sequence", "write")}
+    batches = queue.Queue(maxsize=queue_size)
+    failures = []
+
+    def writer():
+        write_stats = stats["write"]
+        while True:
+            start = time.perf_counter()
+            batch = batches.get()
+            write_stats.waited_s += time.perf_counter() - start
+            if batch is None:
+                return
+            if failures:
+                continue  # Drain the queue so the producer never blocks
+            start = time.perf_counter()
+            try:
+                write(batch)
+            except BaseException as e:
+                failures.append(e)
+            write_stats.busy_s += time.perf_counter() - start
+            write_stats.rows += len(batch)
+
+    thread = threading.Thread(target=writer, name="pipeline-writer", daemon=True)
+    pool = ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs)
+    tasks = iter(tasks)
+    pending = deque()
+
+    def fill():
+        for task in tasks:
+            pending.append(pool.submit(_timed, parse, task))
+            if len(pending) >= max_pending:
+                break
+
+    try:
+        fill()  # Forked workers start on the first submit: before the writer thread, which they mustn't inherit
+        thread.start()
+        while pending and not failures:
+            start = time.perf_counter()
+            elapsed, rows, payload = pending.popleft().result()
+            stats["sequence"].waited_s += time.perf_counter() - start
+            stats["parse"].busy_s += elapsed
+            stats["parse"].rows += rows
+            fill()
+
+            start = time.perf_counter()
+            batch = sequence(payload)
+            stats["sequence"].busy_s += time.perf_counter() - start
+            stats["sequence"].rows += rows
+            if batch:
+                start = time.perf_counter()
+                batches.put(batch)  # Blocks while the writer is queue_size batches behind
+                stats["sequence"].waited_s += time.perf_counter() - start
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if thread.is_alive():
+            batches.put(None)
+            thread.join()
+    if failures:
+        raise failures[0]
+    return stats
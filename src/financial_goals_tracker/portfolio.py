@@ -0,0 +1,107 @@
+import csv
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+
+MILESTONES = (25, 50, 75, 100)  # Progress (%) checkpoints, as in calculate_milestones
+
+REPORT_FIELDS = ["goal_id", "goal_name", "target_amount", "time_horizon", "cagr", "sip_amount",
+                 "total_contributions", "progress", "milestone", "future_value", "shortfall",
+                 "required_sip", "on_track"]
+
+
+@dataclass
+class PortfolioReport:
+    """Per-goal projections for the whole portfolio, one NumPy array per column."""
+
+    goal_ids: np.ndarray
+    goal_names: list
+    target_amounts: np.ndarray
+    time_horizons: np.ndarray
+    cagrs: np.ndarray
+    sip_amounts: np.ndarray
+    totals: np.ndarray
+    progress: np.ndarray
+    milestones: np.ndarray  # Highest milestone reached (0 if none)
+    future_values: np.ndarray
+    shortfalls: np.ndarray
+    required_sips: np.ndarray
+    currency: str = db.BASE_CURRENCY  # Of every amount above
+
+    def __len__(self):
+        return len(self.goal_ids)
+
+    @property
+    def on_track(self):
+        return self.shortfalls <= 0
+
+    def summary(self):
+        """Portfolio-wide totals as a dict of plain Python numbers."""
+        return {
+            "goals": len(self),
+            "currency": self.currency,
+            "on_track": int(self.on_track.sum()),
+            "target_amount": float(self.target_amounts.sum()),
+            "total_contributions": float(self.totals.sum()),
+            "future_value": float(self.future_values.sum()),
+            "shortfall": float(np.clip(self.shortfalls, 0, None).sum()),
+            "required_sip": float(self.required_sips.sum()),
+            "milestones": {f"{m}%": int((self.milestones >= m).sum()) for m in MILESTONES},
+        }
+
+    def records(self):
+        """Yield one dict per goal, keyed by REPORT_FIELDS."""
+        columns = zip(self.goal_ids.tolist(), self.goal_names, self.target_amounts.tolist(),
+                      self.time_horizons.tolist(), self.cagrs.tolist(), self.sip_amounts.tolist(),
+                      self.totals.tolist(), np.round(self.progress, 2).tolist(), self.milestones.tolist(),
+                      np.round(self.future_values, 2).tolist(), np.round(self.shortfalls, 2).tolist(),
+                      np.round(self.required_sips, 2).tolist(), self.on_track.tolist())
+        for values in columns:
+            yield dict(zip(REPORT_FIELDS, values))
+
+
+def build_report(rows=None, currency=db.BASE_CURRENCY):
+    """Build a PortfolioReport from fetch_portfolio_rows() output (amounts in currency) in one vectorized pass."""
+    if rows is None:
+        rows = db.fetch_portfolio_rows(currency=currency)
+
+    goal_ids, goal_names, targets, horizons, cagrs, sips, totals = zip(*rows) if rows else ((),) * 7
+
+    goal_ids = np.array(goal_ids, dtype=np.int64)
+    targets = np.array(targets, dtype=float)
+    horizons = np.array(horizons, dtype=float)
+    cagrs = np.nan_to_num(np.array(cagrs, dtype=float))
+    sips = np.nan_to_num(np.array(sips, dtype=float))
+    totals = np.array(totals, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        progress = np.where(targets > 0, totals / targets * 100, 0.0)
+
+    # Index of the highest checkpoint at or below progress, mapped back to its value
+    milestone_values = np.array((0,) + MILESTONES)
+    milestones = milestone_values[np.searchsorted(MILESTONES, progress, side="right")]
+
+    future_values, shortfalls, required_sips = goals_calculator.project_future_values(
+        totals, sips, targets, horizons, cagrs
+    )
+
+    return PortfolioReport(goal_ids, list(goal_names), targets, horizons, cagrs, sips, totals,
+                           progress, milestones, future_values, shortfalls, required_sips, currency)
+
+
+def export_json(report, path):
+    """Write the summary and per-goal rows to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"summary": report.summary(), "goals": list(report.records())}, f, indent=2)
+
+
+def export_csv(report, path):
+    """Write per-goal rows to a CSV file."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report.records())
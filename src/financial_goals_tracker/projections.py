@@ -0,0 +1,162 @@
+"""Cached goal projections: future value, shortfall and the SIP increase needed.
+
+Projections are stored in goal_projections under a key hashed from
+everything they depend on: the goal's planning inputs, the assumption set
+and the goal's latest ledger event, which moves on with every contribution,
+correction, reversal and goal edit. goal_projection() reads the inputs and
+looks the key up, which is two indexed queries, and computes (and stores)
+only on a miss. A stored row is never stale, because changing any input
+changes the key.
+
+Writes make the next lookup a miss. With enable_background_rebuild(), the
+goals a write changed are queued to a daemon thread, which recomputes their
+projections in one batch so the next lookup finds them. The table is kept
+small by store_projections() (see db.PROJECTION_CACHE_ROWS).
+"""
+import hashlib
+import json
+import queue
+import threading
+from typing import NamedTuple
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import metrics
+
+PROJECTION_MODEL = 1  # Bump when project_future_values() changes, so every stored result is retired
+DEFAULT_ASSUMPTIONS = {"model": PROJECTION_MODEL}
+
+
+class Projection(NamedTuple):
+    """One goal's projection, in the goal's currency."""
+
+    goal_id: int
+    total_contributions: float
+    sip_amount: float
+    target_amount: float
+    future_value: float
+    shortfall: float  # Negative when the goal is projected to overshoot
+    required_sip: float  # SIP increase that closes the shortfall; 0 when on track
+
+    @property
+    def on_track(self):
+        return self.shortfall <= 0
+
+
+def _assumptions(assumptions):
+    return dict(DEFAULT_ASSUMPTIONS, **(assumptions or {}))
+
+
+def projection_key(inputs, assumptions=None):
+    """Hash a db.fetch_projection_inputs() row and an assumption set into a goal_projections key.
+
+    assumptions may override the goal's "cagr", e.g. for a what-if scenario;
+    any other entries only need to be JSON-serializable.
+    """
+    goal_id, target, time_horizon, cagr, mode, sip_amount, currency, _, event_id = inputs
+    payload = json.dumps([goal_id, target, time_horizon, cagr, mode, sip_amount, currency, event_id,
+                          _assumptions(assumptions)], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _project(rows, assumptions):
+    """Compute the goal_projections rows for db.fetch_projection_inputs() rows, in one vectorized call."""
+    assumptions = _assumptions(assumptions)
+    totals = [row[7] for row in rows]
+    sip_amounts = [row[5] or 0 for row in rows]
+    targets = [row[1] for row in rows]
+    cagrs = [assumptions.get("cagr", row[3]) for row in rows]
+    future_values, shortfalls, required_sips = goals_calculator.project_future_values(
+        totals, sip_amounts, targets, [row[2] for row in rows], cagrs
+    )
+    return [(projection_key(row, assumptions), row[0], row[8], total, sip_amount, target,
+             float(future_value), float(shortfall), float(required_sip))
+            for row, total, sip_amount, target, future_value, shortfall, required_sip
+            in zip(rows, totals, sip_amounts, targets, future_values, shortfalls, required_sips)]
+
+
+def refresh_projections(goal_ids=None, assumptions=None):
+    """Compute and store projections for goal_ids (default: every goal). Returns the number of goals."""
+    rows = db.fetch_projection_inputs(goal_ids)
+    if rows:
+        db.store_projections(_project(rows, assumptions))
+    return len(rows)
+
+
+def goal_projection(goal_id, assumptions=None):
+    """Return a goal's Projection under assumptions, from goal_projections when it is there; None if no goal."""
+    conn = db.connect_db()
+    try:
+        inputs = db.fetch_projection_inputs([goal_id], conn)
+        if not inputs:
+            return None
+        stored = db.fetch_projection(projection_key(inputs[0], assumptions), conn)
+    finally:
+        conn.close()
+    metrics.PROJECTION_CACHE_LOOKUPS.labels("hit" if stored else "miss").inc()
+    if stored:
+        return Projection(*stored)
+    row = _project(inputs, assumptions)[0]
+    db.store_projections([row])
+    return Projection(row[1], *row[3:])
+
+
+class ProjectionRebuilder:
+    """Daemon thread that recomputes the projections of goals queued by schedule().
+
+    Goals queued while a rebuild runs are coalesced into the next one, so a
+    burst of writes costs one batch rather than one rebuild per write. The
+    thread exits once the queue is empty, and schedule() starts another.
+    """
+
+    def __init__(self, assumptions=None):
+        self.assumptions = assumptions
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def schedule(self, goal_ids):
+        """Queue goal_ids for a rebuild, starting the thread if it isn't running."""
+        self._queue.put(list(goal_ids))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="projection-rebuild", daemon=True)
+                self._thread.start()
+
+    def join(self):
+        """Wait until every queued goal has been rebuilt."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._queue.empty():
+                    self._thread = None
+                    return
+            batches = [self._queue.get()]
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                refresh_projections(sorted({goal_id for batch in batches for goal_id in batch}), self.assumptions)
+                metrics.PROJECTION_REBUILDS.labels("ok").inc()
+            except Exception:
+                metrics.PROJECTION_REBUILDS.labels("error").inc()  # The next lookup computes it instead
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+
+
+rebuilder = ProjectionRebuilder()
+
+
+def enable_background_rebuild():
+    """Rebuild the projections of every goal a write changes in the background, from now on."""
+    db.remove_goal_write_hook(rebuilder.schedule)
+    db.add_goal_write_hook(rebuilder.schedule)
+
+
+def disable_background_rebuild():
+    db.remove_goal_write_hook(rebuilder.schedule)
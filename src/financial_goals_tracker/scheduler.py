@@ -0,0 +1,130 @@
+import calendar
+import threading
+from datetime import date, datetime
+
+from rich.console import Console
+
+from financial_goals_tracker import db
+from financial_goals_tracker import metrics
+
+console = Console()
+
+DEFAULT_INTERVAL = 3600  # Seconds between daemon runs
+
+
+def add_months(start, months):
+    """Return start shifted by a number of months, clamping the day to the month's end."""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def sip_calendar(start_date, time_horizon, until):
+    """Return the monthly SIP due dates from start_date up to and including until.
+
+    Instalments run for time_horizon years, one per month on the start day
+    (clamped to shorter months).
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    due_dates = []
+    for month in range(int(time_horizon * 12)):
+        due = add_months(start, month)
+        if due > until:
+            break
+        due_dates.append(due)
+    return due_dates
+
+
+def plan_catch_up(today=None, conn=None):
+    """Return (goal_id, sip_amount, due_date) rows for every missed SIP month.
+
+    A month counts as paid if the goal has any contribution dated in it, whether
+    logged by hand or by an earlier run. Existing months for all SIP goals come
+    from one scan of the contributions (goal_id, date) index.
+    """
+    today = today or date.today()
+    should_close = conn is None
+    if should_close:
+        conn = db.connect_db()
+    try:
+        goals = conn.execute("""
+            SELECT id, sip_amount, start_date, time_horizon
+            FROM goals
+            WHERE sip_amount > 0 AND start_day <= ?
+        """, (db.day_number(today),)).fetchall()
+
+        paid_months = set(conn.execute("""
+            SELECT c.goal_id, substr(c.date, 1, 7)
+            FROM goals g
+            JOIN contributions c ON c.goal_id = g.id
+            WHERE g.sip_amount > 0
+            GROUP BY c.goal_id, substr(c.date, 1, 7)
+        """))
+    finally:
+        if should_close:
+            conn.close()
+
+    missed = []
+    for goal_id, sip_amount, start_date, time_horizon in goals:
+        try:
+            due_dates = sip_calendar(start_date, time_horizon, today)
+        except ValueError:
+            continue  # Unparseable start date; nothing can be scheduled
+        for due in due_dates:
+            if (goal_id, due.strftime("%Y-%m")) not in paid_months:
+                missed.append((goal_id, sip_amount, due.isoformat()))
+    return missed
+
+
+def run_catch_up(today=None, dry_run=False):
+    """Log every missed SIP instalment in one transaction and return the rows logged.
+
+    Planning and inserting happen under one write lock (BEGIN IMMEDIATE), so
+    concurrent or repeated runs never log the same month twice.
+    """
+    conn = db.connect_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        missed = plan_catch_up(today, conn)
+        if dry_run or not missed:
+            conn.rollback()
+            return missed
+
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM contributions").fetchone()[0]
+        conn.executemany("""
+            INSERT INTO contributions (goal_id, amount, date)
+            VALUES (?, ?, ?)
+        """, missed)
+        db.journal_contributions(conn.cursor(), last_id)
+
+        totals = {}
+        for goal_id, amount, _ in missed:
+            totals[goal_id] = totals.get(goal_id, 0) + amount
+        conn.executemany("""
+            UPDATE goals
+            SET contributions_total = contributions_total + ?
+            WHERE id = ?
+        """, [(amount, goal_id) for goal_id, amount in totals.items()])
+
+        db.commit_goal_writes(conn, sorted(totals))
+        metrics.CONTRIBUTIONS_LOGGED.labels("scheduler").inc(len(missed))
+        metrics.CONTRIBUTION_AMOUNT.labels("scheduler").inc(sum(totals.values()))
+        return missed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def run_daemon(interval=DEFAULT_INTERVAL, stop_event=None):
+    """Run catch-up every interval seconds until stop_event is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            logged = run_catch_up()
+            if logged:
+                console.print(f"[green]Logged {len(logged)} scheduled SIP contributions.[/green]")
+        except Exception as e:
+            console.print(f"[red]SIP catch-up failed: {str(e)}[/red]")
+        stop_event.wait(interval)
@@ -0,0 +1,301 @@
+import asyncio
+import ipaddress
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import metrics
+from financial_goals_tracker import portfolio
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+RESPONSE_CACHE_SIZE = 256  # Rendered responses kept per data version
+MAX_PAGE_SIZE = 500
+METRICS_PATH = "/metrics"  # Prometheus text format; never cached
+
+# The API calls contributions_total total_contributions, as the progress payload does
+_GOAL_FIELD_NAMES = {"contributions_total": "total_contributions"}
+GOAL_FIELDS = [_GOAL_FIELD_NAMES.get(column, column) for column in db.GOAL_COLUMNS]
+CONTRIBUTION_FIELDS = ["id", "amount", "date", "fund_name", "nav", "currency"]
+
+
+class APIError(Exception):
+    """An error that maps directly to an HTTP status and JSON error body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_loopback(host):
+    """Return True if host names or is a loopback address."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _int_param(query, name, default=None, minimum=None, maximum=None):
+    """Read an integer query parameter; below minimum is a 400, above maximum is clamped to it."""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"{name} must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+
+def _progress(goal_id, conn):
+    goal = db.fetch_goal_by_id(goal_id, conn, db.goal_row)
+    if not goal:
+        raise APIError(HTTPStatus.NOT_FOUND, f"Goal {goal_id} not found")
+    total = db.get_goal_total_contributions(goal_id, conn)
+    target = goal.target_amount
+    progress = total / target * 100 if target > 0 else 0
+    milestones = {f"{m}%": total >= target * m / 100 for m in portfolio.MILESTONES}
+    return goal, {"goal_id": goal_id, "target_amount": target, "total_contributions": total,
+                  "progress": round(progress, 2), "milestones": milestones}
+
+
+def _goal_payload(goal):
+    """A Goal as a JSON object, keyed by GOAL_FIELDS."""
+    return {_GOAL_FIELD_NAMES.get(column, column): value for column, value in goal._asdict().items()}
+
+
+def _list_goals(query, conn):
+    limit = _int_param(query, "limit", 50, minimum=1, maximum=MAX_PAGE_SIZE)
+    after_id = _int_param(query, "after_id")
+    # Fetch one extra row to know whether another page exists
+    rows = db.fetch_goals_page(after_id, limit + 1, conn, db.goal_row)
+    goals = [_goal_payload(goal) for goal in rows[:limit]]
+    next_after_id = goals[-1]["id"] if len(rows) > limit else None
+    return {"goals": goals, "next_after_id": next_after_id}
+
+
+def _get_goal(goal_id, query, conn):
+    goal, progress = _progress(goal_id, conn)
+    # The stored total is replaced by the one just summed for the progress
+    return dict(_goal_payload(goal), total_contributions=progress["total_contributions"],
+                progress=progress["progress"])
+
+
+def _list_contributions(goal_id, query, conn):
+    if not db.fetch_goal_by_id(goal_id, conn):
+        raise APIError(HTTPStatus.NOT_FOUND, f"Goal {goal_id} not found")
+    limit = _int_param(query, "limit", 50, minimum=1, maximum=MAX_PAGE_SIZE)
+    after_id = _int_param(query, "after_id")
+    after_date = query.get("after_date", [None])[0]
+    if (after_date is None) != (after_id is None):
+        raise APIError(HTTPStatus.BAD_REQUEST, "after_date and after_id must be given together")
+    rows = db.fetch_contributions_page(goal_id, after_date, after_id, limit + 1, conn)
+    contributions = [dict(zip(CONTRIBUTION_FIELDS, row)) for row in rows[:limit]]
+    cursor = None
+    if len(rows) > limit:
+        cursor = {"after_date": contributions[-1]["date"], "after_id": contributions[-1]["id"]}
+    return {"goal_id": goal_id, "contributions": contributions, "next": cursor}
+
+
+def _get_progress(goal_id, query, conn):
+    return _progress(goal_id, conn)[1]
+
+
+def _get_projection(goal_id, query, conn):
+    goal, progress = _progress(goal_id, conn)
+    total = progress["total_contributions"]
+    target, time_horizon, cagr, sip_amount = goal.target_amount, goal.time_horizon, goal.cagr, goal.sip_amount or 0
+    future_value, shortfall, required_sip = goals_calculator.project_future_values(
+        total, sip_amount, target, time_horizon, cagr
+    )
+    return {"goal_id": goal_id, "total_contributions": total, "sip_amount": sip_amount,
+            "target_amount": target, "future_value": round(float(future_value), 2),
+            "shortfall": round(max(float(shortfall), 0), 2),
+            "required_sip_increase": round(float(required_sip), 2),
+            "on_track": bool(shortfall <= 0)}
+
+
+def _get_portfolio(query, conn):
+    report = portfolio.build_report(db.fetch_portfolio_rows(conn))
+    return {"summary": report.summary(), "goals": list(report.records())}
+
+
+# (pattern, handler) pairs; handlers for /goals/<id>... take the goal ID first
+ROUTES = [
+    (re.compile(r"/goals/?"), _list_goals),
+    (re.compile(r"/goals/(\d+)/?"), _get_goal),
+    (re.compile(r"/goals/(\d+)/contributions/?"), _list_contributions),
+    (re.compile(r"/goals/(\d+)/progress/?"), _get_progress),
+    (re.compile(r"/goals/(\d+)/projection/?"), _get_projection),
+    (re.compile(r"/portfolio/?"), _get_portfolio),
+]
+
+
+class GoalsAPIServer:
+    """Read-only JSON API over the goals database, served on a loopback address.
+
+    Requests are parsed on the asyncio event loop; every database call runs on a
+    bounded thread pool, each worker borrowing a connection from a shared
+    ConnectionPool. Responses carry an ETag derived from db.get_data_version(),
+    so clients sending If-None-Match get 304 until the data changes, and
+    rendered bodies are reused for repeated requests at the same version.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+        if not is_loopback(host):
+            raise ValueError(f"Refusing to bind to non-loopback address: {host}")
+        self.host = host
+        self.port = port
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="goals-api")
+        self._pool = db.ConnectionPool(workers)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._server = None
+
+    async def start(self):
+        """Start listening; returns the bound (host, port)."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolve port 0
+        return self.host, self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, body=b'{"error": "Malformed request"}',
+                                     keep_alive=False)
+                    break
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                content_type = "application/json"
+                if method not in ("GET", "HEAD"):
+                    status, etag, body = HTTPStatus.METHOD_NOT_ALLOWED, None, b'{"error": "Method not allowed"}'
+                elif urlsplit(target).path == METRICS_PATH:
+                    # Rendering touches the database (goal count gauge), so keep it off the loop
+                    loop = asyncio.get_running_loop()
+                    body = (await loop.run_in_executor(self._executor, metrics.render)).encode()
+                    status, etag, content_type = HTTPStatus.OK, None, metrics.CONTENT_TYPE
+                else:
+                    loop = asyncio.get_running_loop()
+                    try:
+                        status, etag, body = await loop.run_in_executor(
+                            self._executor, self._respond, target, headers.get("if-none-match")
+                        )
+                    except Exception as e:
+                        status, etag = HTTPStatus.INTERNAL_SERVER_ERROR, None
+                        body = json.dumps({"error": str(e)}).encode()
+                metrics.API_REQUESTS.labels(status.value).inc()
+                await self._send(writer, status, etag, body, keep_alive, head=method == "HEAD",
+                                 content_type=content_type)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, etag=None, body=b"", keep_alive=True, head=False,
+                    content_type="application/json"):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 "Cache-Control: no-cache",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if etag:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head and status != HTTPStatus.NOT_MODIFIED:
+            writer.write(body)
+        await writer.drain()
+
+    def _respond(self, target, if_none_match):
+        """Build (status, etag, body) for a GET; runs on a worker thread."""
+        with self._pool.acquire() as conn:
+            # One read transaction so the body matches the version in its ETag
+            conn.execute("BEGIN")
+            version = db.get_data_version(conn)
+            etag = f'"v{version}"'
+            if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return HTTPStatus.NOT_MODIFIED, etag, b""
+
+            key = (target, version)
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    return HTTPStatus.OK, etag, cached
+
+            try:
+                payload = self._route(target, conn)
+            except APIError as e:
+                return e.status, None, json.dumps({"error": str(e)}).encode()
+
+        body = json.dumps(payload).encode()
+        with self._cache_lock:
+            self._cache[key] = body
+            while len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return HTTPStatus.OK, etag, body
+
+    def _route(self, target, conn):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        for pattern, handler in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match:
+                args = [int(group) for group in match.groups()]
+                return handler(*args, query, conn)
+        raise APIError(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+
+
+def run(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+    """Run the API server until interrupted."""
+    server = GoalsAPIServer(host, port, workers)
+
+    async def main():
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
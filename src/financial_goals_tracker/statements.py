@@ -0,0 +1,367 @@
+"""Streaming import of broker and bank statements (CSV files) as contributions.
+
+A StatementMapping says which columns hold the date, amount, fund and so on,
+and maps fund names to goals with regex rules (first match wins). Mappings are
+usually loaded from a JSON file:
+
+    {
+        "columns": {"date": "Txn Date", "amount": "Amount", "fund": "Scheme", "reference": "Txn ID"},
+        "date_format": "%d-%m-%Y",
+        "rules": [{"match": "nifty|index", "goal_id": 1}, {"match": "liquid", "goal_id": 2}],
+        "default_goal_id": null
+    }
+
+Rows are parsed lazily and written in batches, one transaction each, so memory
+stays bounded however large the file is. Each row's content hash (its
+reference column if mapped, otherwise date, amount, fund, NAV and currency)
+is stored in contributions.import_hash under a unique index. Re-importing a
+statement, or an overlapping one, therefore skips the rows already there.
+Identical rows on the same date are told apart by their order within that
+date. Occurrence counts are kept for the last OPEN_DATES dates seen, so a
+statement must be in date order, give or take that many dates, as brokers and
+banks export them.
+Rows that can't be imported are written to an error report instead of stopping
+the import.
+"""
+import csv
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from financial_goals_tracker import db
+from financial_goals_tracker import metrics
+from financial_goals_tracker import pipeline
+
+DEFAULT_BATCH_SIZE = 5000  # Rows per transaction
+OPEN_DATES = 31  # Dates whose identical-row counts are remembered; bounds memory on huge statements
+
+COLUMN_KEYS = ("date", "amount", "fund", "nav", "currency", "reference")
+CONFIG_KEYS = {"columns", "date_format", "delimiter", "negate", "skip_lines", "currency", "rules", "default_goal_id"}
+
+
+def parse_amount(text):
+    """Parse a statement amount such as "₹1,234.50", "-500" or "(500.00)" (negative)."""
+    cleaned = re.sub(r"[^\d.()-]", "", text or "")
+    negative = cleaned.startswith("(") and cleaned.endswith(")")
+    value = float(cleaned.strip("()"))
+    return -value if negative else value
+
+
+@dataclass
+class StatementMapping:
+    """How to read one statement layout: source column names, formats and fund-to-goal rules."""
+
+    columns: dict = field(default_factory=lambda: {"date": "date", "amount": "amount"})
+    date_format: str = "%Y-%m-%d"
+    delimiter: str = ","
+    negate: bool = False  # Contributions appear as negative amounts (debits on a bank statement)
+    skip_lines: int = 0  # Preamble lines before the header row
+    currency: str = None  # Currency of every row, when there is no currency column
+    rules: list = field(default_factory=list)  # (compiled pattern, goal_id) pairs
+    default_goal_id: int = None  # Goal for funds no rule matches
+
+    @classmethod
+    def from_dict(cls, config):
+        unknown = set(config) - CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Unknown mapping key(s): {', '.join(sorted(unknown))}")
+        columns = {key: name for key, name in config.get("columns", {}).items() if name}
+        if set(columns) - set(COLUMN_KEYS) or not {"date", "amount"} <= set(columns):
+            raise ValueError(f"columns must map date and amount, and may map {', '.join(COLUMN_KEYS[2:])}")
+        try:
+            rules = [(re.compile(rule["match"], re.IGNORECASE), int(rule["goal_id"]))
+                     for rule in config.get("rules", [])]
+        except (KeyError, TypeError, re.error) as e:
+            raise ValueError(f"Invalid rule: {e}")
+        default_goal_id = config.get("default_goal_id")
+        return cls(columns=columns, date_format=config.get("date_format", "%Y-%m-%d"),
+                   delimiter=config.get("delimiter", ","), negate=bool(config.get("negate", False)),
+                   skip_lines=int(config.get("skip_lines", 0)),
+                   currency=db.currency_code(config["currency"]) if config.get("currency") else None,
+                   rules=rules, default_goal_id=int(default_goal_id) if default_goal_id is not None else None)
+
+    @classmethod
+    def load(cls, path):
+        """Load a mapping from a JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def goal_for(self, fund):
+        """Return the goal ID for a fund name: the first matching rule's, else default_goal_id."""
+        for pattern, goal_id in self.rules:
+            if fund and pattern.search(fund):
+                return goal_id
+        return self.default_goal_id
+
+
+@dataclass
+class ImportResult:
+    """Counts for one import; updated after every batch."""
+
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    stages: dict = field(default_factory=lambda: {"parse": pipeline.StageStats(), "write": pipeline.StageStats()})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed_s if self.elapsed_s else 0.0
+
+
+class _RowParser:
+    """Turns raw statement rows into contribution tuples, raising ValueError with a reason."""
+
+    def __init__(self, mapping, header, goal_currencies, conn=None):
+        missing = [name for name in mapping.columns.values() if name not in header]
+        if missing:
+            raise ValueError(f"Statement has no column(s) {', '.join(missing)}; found {', '.join(header)}")
+        self.mapping = mapping
+        self.index = {key: header.index(name) for key, name in mapping.columns.items()}
+        self.goal_currencies = goal_currencies
+        self.conn = conn
+
+    def _value(self, row, key):
+        index = self.index.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    def parse(self, row):
+        """Return (goal_id, amount, date, fund, nav, currency, row key, goal_amount); see _RowHasher for the key."""
+        mapping = self.mapping
+        raw_date, raw_amount = self._value(row, "date"), self._value(row, "amount")
+        try:
+            day = _parse_date(raw_date, mapping.date_format)
+        except ValueError:
+            raise ValueError(f"Invalid date {raw_date!r} (expected {mapping.date_format})")
+        try:
+            amount = parse_amount(raw_amount) * (-1 if mapping.negate else 1)
+        except ValueError:
+            raise ValueError(f"Invalid amount {raw_amount!r}")
+        if amount == 0:
+            raise ValueError("Amount is zero")
+
+        fund = self._value(row, "fund") or None
+        raw_nav = self._value(row, "nav")
+        try:
+            nav = parse_amount(raw_nav) if raw_nav else None
+        except ValueError:
+            raise ValueError(f"Invalid NAV {raw_nav!r}")
+        raw_currency = self._value(row, "currency") or mapping.currency
+        currency = db.currency_code(raw_currency) if raw_currency else None  # None: the goal's currency
+
+        goal_id = mapping.goal_for(fund)
+        if goal_id is None:
+            raise ValueError(f"No rule maps fund {fund!r} to a goal")
+        goal_currency = self.goal_currencies.get(goal_id)
+        if goal_currency is None:
+            raise ValueError(f"Goal {goal_id} does not exist")
+        if currency == goal_currency:
+            currency = None
+        goal_amount = db.convert_amount(amount, currency or goal_currency, goal_currency, day, self.conn)
+
+        reference = self._value(row, "reference")
+        key = f"ref|{reference}" if reference else f"{day}|{amount:.2f}|{(fund or '').casefold()}|{nav}|{currency}"
+        return goal_id, amount, day, fund, nav, currency, key, goal_amount
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(text, date_format):
+    # Statements repeat the same few dates many times over
+    return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+
+
+class _RowHasher:
+    """Replaces a parsed row's key with its import hash. Rows must be passed in file order."""
+
+    def __init__(self):
+        self._seen = OrderedDict()  # date -> {row key: occurrences}, most recently used last
+
+    def __call__(self, row):
+        day, key = row[2], row[6]
+        seen = self._seen.get(day)
+        if seen is None:
+            seen = self._seen[day] = {}
+            if len(self._seen) > OPEN_DATES:
+                self._seen.popitem(last=False)
+        else:
+            self._seen.move_to_end(day)
+        occurrence = seen[key] = seen.get(key, -1) + 1
+        import_hash = hashlib.blake2b(f"{key}#{occurrence}".encode(), digest_size=16).hexdigest()
+        return row[:6] + (import_hash, row[7])
+
+
+def _parse_rows(reader, parser, on_error):
+    """Yield parsed rows from reader, skipping blank lines; calls on_error(line, reason, row) for rows that fail."""
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            yield parser.parse(row)
+        except ValueError as e:
+            on_error(reader.line_num, str(e), row)
+
+
+def _read_header(path, mapping):
+    """Return the statement's header columns and the byte offset its rows start at."""
+    with open(path, "rb") as f:
+        for _ in range(mapping.skip_lines):
+            f.readline()
+        line = f.readline().decode("utf-8-sig")
+        header = next(csv.reader([line], delimiter=mapping.delimiter), [])
+        return [name.strip() for name in header], f.tell()
+
+
+def _write_batch(conn, batch):
+    """Insert the rows of batch not imported before, in one transaction; returns (imported, goal total)."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("SELECT import_hash FROM contributions WHERE import_hash IN (SELECT value FROM json_each(?))",
+                       (json.dumps([row[6] for row in batch]),))
+        seen = {row[0] for row in cursor.fetchall()}
+        new_rows = []
+        for row in batch:
+            if row[6] not in seen:  # Also drops a repeat within the batch, e.g. a reused reference
+                seen.add(row[6])
+                new_rows.append(row)
+        if not new_rows:
+            conn.rollback()
+            return 0, 0
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM contributions")
+        last_id = cursor.fetchone()[0]
+        cursor.executemany("""
+            INSERT INTO contributions (goal_id, amount, date, fund_name, nav, currency, import_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (row[:7] for row in new_rows))
+        db.journal_contributions(cursor, last_id)
+
+        totals = {}
+        for row in new_rows:
+            totals[row[0]] = totals.get(row[0], 0) + row[7]
+        cursor.executemany("""
+            UPDATE goals
+            SET contributions_total = contributions_total + ?
+            WHERE id = ?
+        """, [(amount, goal_id) for goal_id, amount in totals.items()])
+        db.commit_goal_writes(conn, sorted(totals))
+        return len(new_rows), sum(totals.values())
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# Per-process state for parallel imports, set by _init_worker()
+_worker = {}
+
+
+def _init_worker(db_file, path, mapping, header, goal_currencies):
+    db.DB_FILE = db_file
+    _worker.update(path=path, delimiter=mapping.delimiter, parser=_RowParser(mapping, header, goal_currencies))
+
+
+def _parse_chunk(chunk):
+    """Parse one byte range of the statement in a worker: returns (rows, (parsed rows, errors, lines))."""
+    reader, lines = pipeline.read_chunk(_worker["path"], *chunk, delimiter=_worker["delimiter"])
+    errors = []
+    parsed = list(_parse_rows(reader, _worker["parser"], lambda *error: errors.append(error)))
+    return len(parsed) + len(errors), (parsed, errors, lines)
+
+
+def import_statement(path, mapping, errors_path=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False,
+                     progress=None, workers=1, chunk_bytes=pipeline.DEFAULT_CHUNK_BYTES):
+    """Import a CSV statement as contributions; returns an ImportResult.
+
+    Rows that can't be imported are written to errors_path (if given) as CSV
+    with their line number, the reason, and the original columns. dry_run
+    parses and validates every row without writing. progress, if given, is
+    called with the ImportResult after every batch.
+
+    With workers > 1, chunks of chunk_bytes are parsed and validated in that
+    many processes (see the pipeline module), while hashing and writing stay in
+    file order, so the result is the same as a serial import. Quoted fields
+    must not contain line breaks then.
+    """
+    start = time.perf_counter()
+    result = ImportResult()
+    header, offset = _read_header(path, mapping)
+    header_line = mapping.skip_lines + 1
+    conn = db.connect_db(check_same_thread=False)  # Used by the pipeline's writer thread
+    error_file = open(errors_path, "w", newline="", encoding="utf-8") if errors_path else None
+    try:
+        goal_currencies = dict(conn.execute("SELECT id, currency FROM goals").fetchall())
+        parser = _RowParser(mapping, header, goal_currencies, conn)
+        hasher = _RowHasher()
+        error_writer = csv.writer(error_file) if error_file else None
+        if error_writer:
+            error_writer.writerow(["line", "error"] + header)
+
+        def record_error(line, reason, row):
+            result.rows += 1
+            result.errors += 1
+            if error_writer:
+                error_writer.writerow([line, reason] + row)
+
+        def write(batch):
+            if not dry_run:
+                imported, amount = _write_batch(conn, batch)
+                result.imported += imported
+                result.duplicates += len(batch) - imported
+                metrics.CONTRIBUTIONS_LOGGED.labels("import").inc(imported)
+                metrics.CONTRIBUTION_AMOUNT.labels("import").inc(amount)
+            result.elapsed_s = time.perf_counter() - start
+            if progress:
+                progress(result)
+
+        if workers > 1:
+            line_base = header_line
+
+            def sequence(payload):
+                nonlocal line_base
+                parsed, errors, lines = payload
+                for line, reason, row in errors:
+                    record_error(line_base + line, reason, row)
+                line_base += lines
+                result.rows += len(parsed)
+                return [hasher(row) for row in parsed]
+
+            def write_chunk(batch):
+                for index in range(0, len(batch), batch_size):
+                    write(batch[index:index + batch_size])
+
+            result.stages = pipeline.run(
+                pipeline.line_chunks(path, chunk_bytes, offset), _parse_chunk, sequence, write_chunk,
+                workers=workers, initializer=_init_worker,
+                initargs=(db.DB_FILE, path, mapping, header, goal_currencies))
+        else:
+            parse_stats, write_stats = result.stages["parse"], result.stages["write"]
+            with open(path, newline="", encoding="utf-8") as f:
+                f.seek(offset)
+                reader = csv.reader(f, delimiter=mapping.delimiter)
+                rows = (hasher(row) for row in _parse_rows(
+                    reader, parser, lambda line, reason, row: record_error(header_line + line, reason, row)))
+                while True:
+                    batch_start = time.perf_counter()
+                    batch = list(islice(rows, batch_size))
+                    write_start = time.perf_counter()
+                    parse_stats.busy_s += write_start - batch_start
+                    if not batch:
+                        break
+                    result.rows += len(batch)
+                    parse_stats.rows += len(batch)
+                    write(batch)
+                    write_stats.busy_s += time.perf_counter() - write_start
+                    write_stats.rows += len(batch)
+        result.elapsed_s = time.perf_counter() - start
+        return result
+    finally:
+        conn.close()
+        if error_file:
+            error_file.close()
@@ -0,0 +1,137 @@
+"""Seeded synthetic data for scratch databases, used by benchmarks and tests.
+
+Never point this at a real database: it only appends, but the volumes are large.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+
+BATCH_SIZE = 50000  # Rows generated and inserted per executemany() call
+
+FUNDS = ["Nifty 50 Index Fund", "Nifty Next 50 Index Fund", "Flexi Cap Fund", "Mid Cap Fund",
+         "Small Cap Fund", "Corporate Bond Fund", "Liquid Fund", "Gold ETF", "ELSS Tax Saver Fund",
+         "Balanced Advantage Fund"]
+GOAL_NAMES = ["Emergency Corpus", "Car", "House Down Payment", "Child Education", "Retirement",
+              "Vacation", "Wedding", "Home Renovation", "Laptop", "Sabbatical"]
+MODES = ["SIP", "Lumpsum", "Lumpsum + SIP"]
+MODE_WEIGHTS = [0.6, 0.15, 0.25]
+BASICS = ["emergency_fund", "health_insurance", "term_insurance"]
+
+
+def nav_history(rng, days, funds=FUNDS):
+    """Return {fund: daily NAV array} as seeded geometric random walks over days."""
+    history = {}
+    for fund in funds:
+        drift = rng.normal(0.10, 0.04) / 365
+        volatility = rng.uniform(0.002, 0.015)
+        returns = rng.normal(drift, volatility, days)
+        history[fund] = rng.uniform(10, 200) * np.exp(np.cumsum(returns))
+    return history
+
+
+def _goal_rows(rng, count, today):
+    horizons = rng.choice([1, 2, 3, 5, 7, 10, 15, 20], size=count, p=[.1, .1, .15, .2, .1, .15, .1, .1])
+    targets = np.round(np.exp(rng.normal(np.log(1_500_000), 1.0, count)), -3)
+    cagrs = np.round(np.clip(rng.normal(11, 3, count), 4, 18), 1)
+    modes = rng.choice(len(MODES), size=count, p=MODE_WEIGHTS)
+    start_offsets = rng.integers(0, 5 * 365, count)
+    names = rng.integers(0, len(GOAL_NAMES), count)
+
+    rows = []
+    for i in range(count):
+        target, horizon, cagr, mode = float(targets[i]), int(horizons[i]), float(cagrs[i]), MODES[modes[i]]
+        lumpsum = sip = 0
+        if mode == "SIP":
+            sip = goals_calculator.calculate_sip(target, horizon, cagr)
+        elif mode == "Lumpsum":
+            lumpsum = goals_calculator.calculate_lumpsum(target, horizon, cagr)
+        else:
+            lumpsum, sip = goals_calculator.calculate_mixed(target, horizon, cagr, lumpsum_percentage=30)
+        start = today - timedelta(days=int(start_offsets[i]))
+        rows.append((f"{GOAL_NAMES[names[i]]} #{i + 1}", target, horizon, cagr, mode, lumpsum, sip,
+                     start.isoformat(), "synthetic"))
+    return rows
+
+
+def generate(goals=1000, contributions=100000, basics_history=100, seed=42, today=None, batch_size=BATCH_SIZE):
+    """Populate db.DB_FILE with synthetic goals, contributions and basics history.
+
+    Contributions are spread over goals with a heavy-tailed weighting, dated
+    after each goal's start, sized around its SIP, and priced from per-fund NAV
+    random walks. Generation and inserts run in batches, so memory stays
+    bounded by batch_size even for tens of millions of rows. The same seed
+    always produces the same data. Returns the inserted goal IDs.
+    """
+    rng = np.random.default_rng(seed)
+    today = today or date(2025, 1, 1)
+    history_days = 5 * 365 + 1
+    first_day = today - timedelta(days=history_days - 1)
+    navs = nav_history(rng, history_days)
+
+    db.initialize_db()
+    conn = db.connect_db()
+    conn.execute("PRAGMA synchronous = OFF")  # Scratch data; durability is irrelevant
+    try:
+        goal_rows = _goal_rows(rng, goals, today)
+        first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM goals").fetchone()[0]) + 1
+        conn.executemany("""
+            INSERT INTO goals
+            (goal_name, target_amount, time_horizon, cagr, investment_mode, initial_investment, sip_amount, start_date, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, goal_rows)
+        goal_ids = np.arange(first_id, first_id + goals)
+
+        # Per-goal sampling weights (heavy-tailed) and the day index each goal starts on
+        weights = rng.pareto(1.5, goals) + 1
+        weights /= weights.sum()
+        start_index = np.array([(date.fromisoformat(row[7]) - first_day).days for row in goal_rows])
+        sips = np.array([row[6] or row[1] / (row[2] * 12) for row in goal_rows])
+        fund_names = np.array(FUNDS)
+        fund_navs = np.stack([navs[fund] for fund in FUNDS])
+
+        last_contribution_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM contributions").fetchone()[0]
+        remaining = contributions
+        while remaining > 0:
+            n = min(batch_size, remaining)
+            remaining -= n
+            goal_index = rng.choice(goals, size=n, p=weights)
+            days = start_index[goal_index] + (rng.random(n) * (history_days - start_index[goal_index])).astype(int)
+            amounts = np.round(sips[goal_index] * rng.lognormal(0, 0.25, n), 2)
+            funds = rng.integers(0, len(FUNDS), n)
+            nav = np.round(fund_navs[funds, days], 4)
+            dates = (np.datetime64(first_day) + days).astype(str)
+            conn.executemany("""
+                INSERT INTO contributions (goal_id, amount, date, fund_name, nav)
+                VALUES (?, ?, ?, ?, ?)
+            """, zip(goal_ids[goal_index].tolist(), amounts.tolist(), dates.tolist(),
+                     fund_names[funds].tolist(), nav.tolist()))
+
+        conn.execute("""
+            UPDATE goals
+            SET contributions_total = COALESCE(
+                (SELECT SUM(amount) FROM contributions WHERE goal_id = goals.id), 0)
+            WHERE id >= ?
+        """, (first_id,))
+        db.journal_contributions(conn.cursor(), last_contribution_id)
+
+        history = []
+        for _ in range(basics_history):
+            category = BASICS[rng.integers(0, len(BASICS))]
+            target = float(np.round(rng.uniform(1e5, 2e7), -3))
+            current = float(np.round(target * rng.uniform(0, 1.2), -2))
+            change = float(np.round(rng.normal(0, target * 0.05), 2))
+            changed_on = first_day + timedelta(days=int(rng.integers(0, history_days)))
+            history.append((category, target, current, change, f"{changed_on.isoformat()} 00:00:00", "synthetic"))
+        conn.executemany("""
+            INSERT INTO financial_basics_history
+            (category, target_amount, current_amount, change_amount, change_date, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, history)
+
+        conn.commit()
+        return goal_ids.tolist()
+    finally:
+        conn.close()
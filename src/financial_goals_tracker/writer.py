@@ -0,0 +1,228 @@
+"""Single-writer queue with group commit.
+
+Every log_contribution() call opens a connection, takes the write lock and
+waits for its own commit to reach the disk. GroupCommitWriter instead queues
+write operations for one writer thread, which runs them in batches: a batch
+closes when it holds max_batch operations or max_delay_ms after its first
+operation arrived, and is committed once. The lock is taken and the disk
+synced once per batch rather than once per write.
+
+    with GroupCommitWriter() as writer:
+        futures = [writer.log_contribution(goal_id, 500, "2024-06-01") for goal_id in goal_ids]
+        contribution_ids = [future.result() for future in futures]
+
+submit() returns a concurrent.futures.Future, which is resolved only after
+the batch holding its operation has committed. A result therefore means the
+write is durable. Each operation runs in its own savepoint, so one that
+raises fails its own future and leaves the rest of its batch to commit. If
+the commit itself fails, every future in the batch gets that error.
+asyncio code can await the futures through asyncio.wrap_future().
+
+If another connection holds the write lock past its busy timeout, the
+batch's BEGIN IMMEDIATE is retried with backoff before the batch fails.
+Should the writer thread stop for any reason, every operation still queued
+fails with RuntimeError and later submit() calls raise it.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from financial_goals_tracker import db
+from financial_goals_tracker import metrics
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_DELAY_MS = 5  # How long a batch's first operation waits for others to join it
+DEFAULT_QUEUE_SIZE = 1024  # Operations waiting for the writer; submit() blocks beyond this
+BUSY_RETRIES = 5  # Further BEGIN IMMEDIATE attempts while the database is locked
+BUSY_BACKOFF_S = 0.05  # Wait before the first retry; doubled for each further one
+
+_STOP = object()
+
+
+class _Operation:
+    __slots__ = ("future", "op", "args", "kwargs", "goal_ids", "on_commit")
+
+    def __init__(self, op, args, kwargs, goal_ids, on_commit):
+        self.future = Future()
+        self.op, self.args, self.kwargs = op, args, kwargs
+        self.goal_ids, self.on_commit = goal_ids, on_commit
+
+
+class GroupCommitWriter:
+    """One writer thread that runs queued write operations and commits them in groups.
+
+    Use it as a context manager, or call close() to flush and stop it.
+    """
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_delay_ms=DEFAULT_MAX_DELAY_MS,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.ops = self.batches = 0
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(queue_size)  # Free places in the queue
+        self._lock = threading.Lock()  # Held to check _closed and queue an operation in one step
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="fgt-group-commit", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, op, *args, goal_ids=(), on_commit=None, **kwargs):
+        """Queue op(conn, *args, **kwargs) and return a Future for its result.
+
+        op runs on the writer's connection inside the batch's transaction
+        and must not commit. goal_ids are the goals it changes, for
+        db.commit_goal_writes(). on_commit(result), if given, runs after the
+        commit and its return value becomes the future's result. Raises
+        RuntimeError once the writer is closed or its thread has stopped.
+        """
+        operation = _Operation(op, args, kwargs, list(goal_ids), on_commit)
+        self._slots.acquire()  # Released once the writer takes the operation, or drops it
+        with self._lock:
+            if self._closed:
+                self._slots.release()
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put(operation)
+        return operation.future
+
+    def log_contribution(self, goal_id, amount, date, fund_name=None, nav=None, currency=None):
+        """Queue a contribution (see db.log_contribution()); the future resolves to its contribution ID."""
+        return self.submit(db.add_contribution, goal_id, amount, date, fund_name, nav, currency,
+                           goal_ids=[goal_id], on_commit=_contribution_logged)
+
+    def close(self):
+        """Commit every queued operation, then stop the writer thread."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    def _take(self, timeout=None):
+        operation = self._queue.get(timeout=timeout)
+        if operation is not _STOP:
+            self._slots.release()
+        return operation
+
+    def _run(self):
+        batch = []
+        error = None
+        try:
+            conn = db.connect_db()
+            try:
+                stopping = False
+                while not stopping:
+                    first = self._take()
+                    if first is _STOP:
+                        break
+                    batch = [first]
+                    deadline = time.monotonic() + self.max_delay
+                    while len(batch) < self.max_batch:
+                        try:
+                            operation = self._take(timeout=max(deadline - time.monotonic(), 0))
+                        except queue.Empty:
+                            break
+                        if operation is _STOP:
+                            stopping = True
+                            break
+                        batch.append(operation)
+                    self._commit(conn, batch)
+                    batch = []
+            finally:
+                conn.close()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._stop(batch, error)
+
+    def _stop(self, batch, error):
+        """Close the writer and fail the operations it will never run: its last batch if unfinished, and the queue."""
+        with self._lock:
+            self._closed = True
+        stopped = RuntimeError("GroupCommitWriter stopped")
+        stopped.__cause__ = error
+        for operation in batch:
+            _fail(operation.future, stopped)
+        while True:
+            try:
+                operation = self._take(timeout=0)
+            except queue.Empty:
+                break
+            if operation is not _STOP:
+                _fail(operation.future, stopped)
+
+    def _begin(self, conn):
+        """BEGIN IMMEDIATE, retried with backoff while another connection holds the write lock."""
+        delay = BUSY_BACKOFF_S
+        for retries_left in range(BUSY_RETRIES, -1, -1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if e.sqlite_errorcode != sqlite3.SQLITE_BUSY or not retries_left:
+                    raise
+            time.sleep(delay)
+            delay *= 2
+
+    def _commit(self, conn, batch):
+        """Run batch in one transaction, one savepoint per operation, and resolve its futures once committed."""
+        outcomes = []
+        goal_ids = set()
+        try:
+            self._begin(conn)
+            for operation in batch:
+                if not operation.future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT operation")
+                try:
+                    result = operation.op(conn, *operation.args, **operation.kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO operation")
+                    outcomes.append((operation, None, e))
+                else:
+                    goal_ids.update(operation.goal_ids)
+                    outcomes.append((operation, result, None))
+                finally:
+                    conn.execute("RELEASE operation")
+            db.commit_goal_writes(conn, sorted(goal_ids))
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for operation in batch:
+                _fail(operation.future, e)
+            return
+
+        self.ops += len(outcomes)
+        self.batches += 1
+        metrics.GROUP_COMMIT_OPS.observe(len(outcomes))
+        for operation, result, error in outcomes:
+            if error is None and operation.on_commit is not None:
+                try:
+                    result = operation.on_commit(result)
+                except Exception as e:
+                    error = e
+            if error is None:
+                operation.future.set_result(result)
+            else:
+                operation.future.set_exception(error)
+
+
+def _fail(future, error):
+    """Set error on future unless it is already resolved or was cancelled before it ran."""
+    if future.running() or (not future.done() and future.set_running_or_notify_cancel()):
+        future.set_exception(error)
+
+
+def _contribution_logged(result):
+    contribution_id, goal_amount = result
+    metrics.CONTRIBUTIONS_LOGGED.labels("writer").inc()
+    metrics.CONTRIBUTION_AMOUNT.labels("writer").inc(goal_amount)
+    return contribution_id
@@ -0,0 +1,126 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker.async_db import AsyncDB
+from test_db import DatabaseTestCase, make_goal
+
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000)
+    SELECT SUM(i) FROM n
+"""
+
+
+class TestAsyncDB(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("Car", "Trip"):
+            db.insert_goal(make_goal(name))
+        with db.console.capture():
+            db.log_contribution(1, 500, "2024-01-05")
+
+    def run_async(self, scenario, **options):
+        async def main():
+            async with AsyncDB(**options) as adb:
+                return await scenario(adb)
+        with db.console.capture():
+            return asyncio.run(main())
+
+    def test_reads_mirror_the_db_api_on_per_thread_connections(self):
+        async def scenario(adb):
+            pages = await asyncio.gather(*(adb.fetch_goals_page(limit=10) for _ in range(20)))
+            goal = await adb.fetch_goal_by_id(1, row_factory=db.goal_row)
+            return pages, goal, await adb.get_goal_total_contributions(1), len(adb._connections)
+
+        pages, goal, total, connections = self.run_async(scenario, readers=2)
+        self.assertEqual(pages, [db.fetch_goals_page(limit=10)] * 20)
+        self.assertEqual((goal.goal_name, total), ("Car", 500))
+        self.assertLessEqual(connections, 2)
+        self.assertEqual(AsyncDB.fetch_goals_page.__doc__, db.fetch_goals_page.__doc__)
+
+    def test_writes_run_one_at_a_time_in_order(self):
+        threads = set()
+
+        def log(amount):
+            threads.add(threading.current_thread().name)
+            db.log_contribution(2, amount, "2024-02-01")
+
+        async def scenario(adb):
+            await asyncio.gather(*(adb.run_write(log, amount) for amount in range(1, 21)))
+            await adb.update_goal(2, "notes", "Rebalanced")
+            return await adb.fetch_contributions(2), await adb.fetch_goal_by_id(2, row_factory=db.goal_row)
+
+        contributions, goal = self.run_async(scenario)
+        self.assertEqual([row[1] for row in sorted(contributions)], list(range(1, 21)))
+        self.assertEqual(len(threads), 1)
+        self.assertEqual(goal.notes, "Rebalanced")
+
+    def test_contributions_are_group_committed_before_later_writes(self):
+        def count_committed():
+            conn = sqlite3.connect(db.DB_FILE)
+            try:
+                return conn.execute("SELECT COUNT(*) FROM contributions").fetchone()[0]
+            finally:
+                conn.close()
+
+        async def scenario(adb):
+            logged = [asyncio.ensure_future(adb.log_contribution(2, amount, "2024-02-01")) for amount in range(1, 11)]
+            await asyncio.sleep(0)  # Let every call reach the write thread's queue
+            seen = await adb.run_write(count_committed)
+            return await asyncio.gather(*logged), seen, adb._group_commit.batches
+
+        ids, seen, batches = self.run_async(scenario)
+        self.assertEqual(ids, list(range(2, 12)))
+        self.assertEqual(seen, 11)
+        self.assertLess(batches, 10)
+        self.assertEqual(db.get_goal_total_contributions(2), 55)
+
+    def test_timeout_interrupts_a_running_read(self):
+        errors = []
+
+        def slow(conn):
+            try:
+                return conn.execute(SLOW_QUERY).fetchone()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+                raise
+
+        async def scenario(adb):
+            start = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                await adb.run_read(slow, timeout=0.05)
+            elapsed = time.perf_counter() - start
+            return elapsed, await adb.count_goals()
+
+        elapsed, count = self.run_async(scenario, readers=1)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(errors, ["interrupted"])
+        self.assertEqual(count, 2)  # The interrupted thread's connection still works
+
+    def test_cancelled_calls_that_have_not_started_never_run(self):
+        started, release, ran = threading.Event(), threading.Event(), []
+
+        def blocker(conn):
+            started.set()
+            release.wait(5)
+
+        async def scenario(adb):
+            first = asyncio.ensure_future(adb.run_read(blocker))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            queued = asyncio.ensure_future(adb.run_read(lambda conn: ran.append(True)))
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+            release.set()
+            await first
+
+        self.run_async(scenario, readers=1)
+        self.assertEqual(ran, [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
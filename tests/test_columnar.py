@@ -0,0 +1,127 @@
+import os
+import unittest
+
+import numpy as np
+
+from financial_goals_tracker import columnar
+from financial_goals_tracker import db
+from financial_goals_tracker.columnar import ColumnarLedger
+from test_db import DatabaseTestCase, make_goal
+
+
+class LedgerTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("Car", "Trip", "House"):
+            db.insert_goal(make_goal(name))
+        with db.console.capture():
+            db.log_contribution(2, 700, "2024-02-01", "Liquid Fund", 20)
+            db.log_contribution(1, 500, "2024-01-05")
+            db.log_contribution(2, 300, "2024-01-15")
+            db.log_contribution(1, 250, "2024-01-05")
+            db.log_contribution(1, 100, "2024-03-10")
+
+
+class TestColumnarLedger(LedgerTestCase):
+    def test_chunked_load_sorts_by_goal_and_day(self):
+        ledger = ColumnarLedger.load(chunk_size=2)
+        self.assertEqual(len(ledger), 5)
+        self.assertEqual(ledger.goal_ids.tolist(), [1, 1, 1, 2, 2])
+        self.assertEqual(ledger.amounts.tolist(), [500, 250, 100, 300, 700])
+        self.assertEqual(ledger.navs.tolist(), [0, 0, 0, 0, 20])
+        self.assertEqual((ledger.goals.tolist(), ledger.offsets.tolist()), ([1, 2], [0, 3, 5]))
+        self.assertEqual(ledger.nbytes, 32 * 5 + 8 * 2 + 8 * 3)
+
+    def test_totals_match_the_goals_table(self):
+        ledger = ColumnarLedger.load()
+        goal_ids, totals = ledger.totals()
+        self.assertEqual(goal_ids.tolist(), [1, 2])
+        self.assertEqual(totals.tolist(), [db.get_goal_total_contributions(1), db.get_goal_total_contributions(2)])
+        self.assertEqual(ledger.total(3), 0)
+        self.assertEqual(len(ledger.goal(3)), 0)
+
+    def test_series_match_the_database(self):
+        ledger = ColumnarLedger.load()
+        days, amounts = ledger.daily(1)
+        expected_days, expected_amounts = db.fetch_contribution_series(1)
+        self.assertEqual(days.tolist(), expected_days.tolist())
+        self.assertEqual(amounts.tolist(), expected_amounts.tolist())
+        self.assertEqual(ledger.cumulative(1)[1].tolist(), [750, 850])
+        self.assertEqual(len(ledger.daily(3)[0]), 0)
+
+    def test_between_and_goal_subsets(self):
+        ledger = ColumnarLedger.load()
+        january = ledger.between("2024-01-01", "2024-01-31")
+        self.assertEqual(january.totals()[1].tolist(), [750, 300])
+        self.assertEqual(ledger.between(start="2024-02-01").goals.tolist(), [1, 2])
+        self.assertEqual(len(ledger.between(end="2023-12-31")), 0)
+        self.assertEqual(ColumnarLedger.load([2]).amounts.tolist(), [300, 700])
+        self.assertEqual(len(ColumnarLedger.load([])), 0)
+
+
+class TestLedgerSnapshot(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.db_path + ".ledger"
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        super().tearDown()
+
+    def test_snapshot_maps_the_ledger_without_copying(self):
+        self.assertIsNone(columnar.open_snapshot(self.path))
+        version = columnar.write_snapshot(self.path, chunk_size=2)
+        self.assertEqual(version, db.get_data_version())
+        self.assertEqual(os.path.getsize(self.path), columnar.SNAPSHOT_HEADER_SIZE + 32 * 5 + 8 * 5)
+
+        mapped, loaded = columnar.open_snapshot(self.path), ColumnarLedger.load()
+        for name in ("goal_ids", "days", "amounts", "navs", "goals", "offsets"):
+            self.assertEqual(getattr(mapped, name).tolist(), getattr(loaded, name).tolist())
+        self.assertFalse(mapped.amounts.flags.owndata)
+        self.assertFalse(mapped.amounts.flags.writeable)
+        self.assertEqual(mapped.totals()[1].tolist(), [850, 1000])
+        self.assertEqual(memoryview(mapped.days).tolist(), loaded.days.tolist())
+
+    def test_data_changes_make_the_snapshot_stale(self):
+        columnar.write_snapshot(self.path)
+        with db.console.capture():
+            db.log_contribution(3, 400, "2024-04-01")
+        self.assertIsNone(columnar.open_snapshot(self.path))
+
+        ledger = columnar.load_snapshot(self.path)
+        self.assertEqual(ledger.goals.tolist(), [1, 2, 3])
+        self.assertEqual(columnar.snapshot_version(self.path), db.get_data_version())
+
+        rates = self.db_path + ".rates.csv"
+        with open(rates, "w") as f:
+            f.write("date,ccy,rate\n2024-01-01,USD,80\n")
+        try:
+            db.load_fx_rates(rates)
+        finally:
+            os.remove(rates)
+        self.assertIsNone(columnar.open_snapshot(self.path))
+
+    def test_empty_ledger_and_bad_files(self):
+        conn = db.connect_db()
+        conn.execute("DELETE FROM contributions")
+        conn.commit()
+        conn.close()
+        columnar.write_snapshot(self.path)
+        ledger = columnar.open_snapshot(self.path)
+        self.assertEqual((len(ledger), ledger.totals()[1].tolist(), ledger.total(1)), (0, [], 0))
+        self.assertEqual(ledger.daily(1)[0].dtype, np.dtype("datetime64[D]"))
+
+        with open(self.path, "r+b") as f:
+            f.truncate(columnar.SNAPSHOT_HEADER_SIZE + 4)
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            columnar.open_snapshot(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot")
+        self.assertIsNone(columnar.snapshot_version(self.path))
+        with self.assertRaisesRegex(ValueError, "not a ledger snapshot"):
+            columnar.open_snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,659 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+
+import numpy as np
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import instrumentation
+from financial_goals_tracker import synthetic
+
+
+def make_goal(name, target=100000, horizon=5, cagr=12.0, mode="SIP", sip=1500, start_date="2024-01-01", notes=""):
+    return {
+        "goal_name": name,
+        "target_amount": target,
+        "time_horizon": horizon,
+        "cagr": cagr,
+        "investment_mode": mode,
+        "initial_investment": 0,
+        "sip_amount": sip,
+        "start_date": start_date,
+        "notes": notes
+    }
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class giving every test a fresh database file."""
+
+    def setUp(self):
+        self._original_db_file = db.DB_FILE
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.remove(self.db_path)
+        db.DB_FILE = self.db_path
+        db.initialize_db()
+
+    def tearDown(self):
+        db.DB_FILE = self._original_db_file
+        for suffix in ("", "-wal", "-shm", ".ledger"):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+
+class TestPagination(DatabaseTestCase):
+    def test_goal_pages_cover_every_goal_once(self):
+        for i in range(7):
+            db.insert_goal(make_goal(f"Goal {i}"))
+
+        pages = list(db.iter_goal_pages(page_size=3))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = [goal[0] for page in pages for goal in page]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_goal_page_sums_contributions(self):
+        db.insert_goal(make_goal("Car"))
+        db.log_contribution(1, 1000, "2024-01-05")
+        db.log_contribution(1, 500, "2024-02-05")
+
+        page = db.fetch_goals_page(limit=10)
+
+        self.assertEqual(page[0][11], 1500)
+
+    def test_contribution_pages_break_date_ties_by_id(self):
+        db.insert_goal(make_goal("House"))
+        for amount in range(1, 6):
+            db.log_contribution(1, amount, "2024-03-01")
+        db.log_contribution(1, 10, "2024-04-01")
+
+        pages = list(db.iter_contribution_pages(1, page_size=2))
+        rows = [row for page in pages for row in page]
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2])
+        self.assertEqual(rows[0][2], "2024-04-01")
+        self.assertEqual([row[1] for row in rows[1:]], [5, 4, 3, 2, 1])
+
+    def test_empty_tables_yield_single_empty_page(self):
+        self.assertEqual(list(db.iter_goal_pages()), [[]])
+        self.assertEqual(list(db.iter_contribution_pages(1)), [[]])
+
+
+class TestGoalRows(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=200000, sip=2500, notes="hatchback"))
+        db.insert_goal(make_goal("Trip", target=0, sip=0, mode="Lumpsum"))
+        db.log_contribution(1, 5000, "2024-01-05", "Nifty Index Fund", 100)
+
+    def test_every_listing_uses_the_canonical_projection(self):
+        listings = [db.fetch_goals(), db.fetch_all_goals(), db.fetch_goals_page(), db.GoalQuery().fetch(),
+                    [db.fetch_goal_by_id(1), db.fetch_goal_by_id(2)]]
+        for rows in listings:
+            by_id = {row[0]: row for row in rows}
+            self.assertEqual(len(by_id[1]), len(db.GOAL_COLUMNS))
+            self.assertEqual(by_id[1][db.GOAL_COLUMNS.index("sip_amount")], 2500)
+            self.assertEqual(by_id[1][db.GOAL_COLUMNS.index("contributions_total")], 5000)
+            self.assertEqual(by_id[1][db.GOAL_COLUMNS.index("currency")], "INR")
+        self.assertEqual([row[:len(db.GOAL_COLUMNS)] for row in db.search_goals("hatchback")], [db.fetch_goals_page()[1]])
+
+    def test_row_factory_builds_goals_matching_the_tuples(self):
+        goal = db.fetch_goal_by_id(1, row_factory=db.goal_row)
+        self.assertIsInstance(goal, db.Goal)
+        self.assertEqual(goal, db.fetch_goal_by_id(1))
+        self.assertEqual((goal.goal_name, goal.sip_amount, goal.notes), ("Car", 2500, "hatchback"))
+        self.assertEqual(goal.progress, 2.5)
+        self.assertIsNone(db.fetch_goal_by_id(3, row_factory=db.goal_row))
+        self.assertFalse(hasattr(goal, "__dict__"))
+
+        pages = list(db.iter_goal_pages(page_size=1, row_factory=db.goal_row))
+        self.assertEqual([[goal.goal_name for goal in page] for page in pages], [["Trip"], ["Car"]])
+        self.assertEqual(pages[0][0].progress, 0)
+        trip, = db.GoalQuery().mode("Lumpsum").fetch(db.goal_row)
+        self.assertEqual(trip.investment_mode, "Lumpsum")
+
+
+class TestReadCache(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car"))
+        db.insert_goal(make_goal("House"))
+        self.connections = 0
+        db.add_connection_hook(self.count_connection)
+        self.before = db.read_cache.stats()
+
+    def tearDown(self):
+        db.remove_connection_hook(self.count_connection)
+        super().tearDown()
+
+    def count_connection(self, conn):
+        self.connections += 1
+
+    def stat(self, name):
+        return db.read_cache.stats()[name] - self.before[name]
+
+    def test_repeat_lookups_skip_the_database(self):
+        for _ in range(3):
+            self.assertEqual(db.fetch_goal_by_id(1, row_factory=db.goal_row).goal_name, "Car")
+            self.assertTrue(db.goal_exists(1))
+            self.assertEqual(db.get_goal_total_contributions(1), 0)
+            self.assertEqual(len(db.fetch_basics()), len(db.get_basics_status()))
+        self.assertEqual(self.connections, 3)  # One per key
+        self.assertEqual((self.stat("misses"), self.stat("hits")), (3, 12))
+
+        conn = db.connect_db()
+        self.assertEqual(db.fetch_goal_by_id(1, conn), db.fetch_goal_by_id(1))  # conn bypasses the cache
+        conn.close()
+
+    def test_writes_invalidate_only_their_keys(self):
+        self.assertIsNone(db.fetch_goal_by_id(3))
+        db.fetch_goal_by_id(2)
+        with db.console.capture():
+            db.log_contribution(1, 500, "2024-01-05")
+        self.assertEqual(db.get_goal_total_contributions(1), 500)
+        self.assertEqual(db.fetch_goal_by_id(1, row_factory=db.goal_row).contributions_total, 500)
+
+        db.insert_goal(make_goal("Trip"))
+        self.assertEqual(db.fetch_goal_by_id(3)[1], "Trip")
+        db.update_goal(2, "goal_name", "Flat")
+        self.assertEqual(db.fetch_goal_by_id(2)[1], "Flat")
+        db.delete_goal(3)
+        self.assertFalse(db.goal_exists(3))
+        self.assertTrue(db.update_basic("Emergency Fund", 1000, 400, "test"))
+        self.assertEqual(dict((row[0], row[2]) for row in db.fetch_basics())["emergency_fund"], 400)
+        self.assertEqual(self.stat("flushes"), 0)
+
+        cached = self.connections
+        db.fetch_goal_by_id(1)
+        self.assertEqual(self.connections, cached)  # Untouched by the other goals' writes
+
+    def test_commits_elsewhere_flush_the_cache(self):
+        db.fetch_goal_by_id(1)
+        other = sqlite3.connect(self.db_path)
+        other.execute("UPDATE goals SET goal_name = 'Bike' WHERE id = 1")
+        other.commit()
+        other.close()
+        self.assertEqual(db.fetch_goal_by_id(1)[1], "Bike")
+        self.assertEqual(self.stat("flushes"), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = db.ReadCache(maxsize=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get(key, lambda: key.upper())
+        self.assertEqual(cache.get("a", lambda: "reloaded"), "A")
+        self.assertEqual(cache.get("b", lambda: "reloaded"), "reloaded")
+        self.assertEqual(cache.stats()["evictions"], 2)
+        cache.clear()
+
+
+class TestGoalQuery(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=1000, horizon=2, cagr=8.0))
+        db.insert_goal(make_goal("House", target=5000, horizon=10, cagr=12.0))
+        db.insert_goal(make_goal("Trip 100%_fun", target=2000, horizon=1, cagr=6.0, mode="Lumpsum"))
+        db.log_contribution(1, 500, "2024-01-01")
+        db.log_contribution(2, 500, "2024-01-01")
+
+    def names(self, query):
+        return [goal[1] for goal in query.fetch()]
+
+    def test_filters_combine(self):
+        query = db.GoalQuery().mode("SIP").horizon_between(min_years=3)
+        self.assertEqual(self.names(query), ["House"])
+
+    def test_progress_band_and_sort(self):
+        query = db.GoalQuery().progress_between(5, 60).order_by("progress", descending=True)
+        self.assertEqual(self.names(query), ["Car", "House"])
+
+    def test_name_filter_escapes_wildcards(self):
+        self.assertEqual(self.names(db.GoalQuery().name_contains("100%_")), ["Trip 100%_fun"])
+        self.assertEqual(self.names(db.GoalQuery().name_contains("0%x")), [])
+
+    def test_sort_limit_and_params(self):
+        query = db.GoalQuery().cagr_between(max_cagr=10).order_by("cagr").limit(1)
+        sql, params = query.compile()
+        self.assertEqual(params, [10, 1])
+        self.assertEqual(self.names(query), ["Trip 100%_fun"])
+
+    def test_invalid_sort_key(self):
+        with self.assertRaises(ValueError):
+            db.GoalQuery().order_by("target_amount; DROP TABLE goals")
+
+    def test_progress_filter_uses_expression_index(self):
+        sql, params = db.GoalQuery().progress_between(50).order_by("progress").compile()
+        conn = db.connect_db()
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        conn.close()
+        self.assertIn("idx_goals_progress", plan)
+
+
+class TestSearch(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("House Down Payment", notes="Flat in Pune"))
+        db.insert_goal(make_goal("Car", notes="Electric hatchback for the house"))
+        with db.console.capture():
+            db.log_contribution(2, 1000, "2024-01-01", "Nifty 50 Index Fund", 10.0)
+            db.log_contribution(2, 1000, "2024-02-01", "Nifty 50 Index Fund", 10.0)
+
+    def ids(self, text, **kwargs):
+        return [row[0] for row in db.search_goals(text, **kwargs)]
+
+    def test_ranks_name_matches_above_notes(self):
+        results = db.search_goals("house")
+        self.assertEqual([row[0] for row in results], [1, 2])
+        self.assertEqual(results[0][-1], f"{db.HIT_START}House{db.HIT_END} Down Payment")
+        self.assertEqual(results[1][db.GOAL_COLUMNS.index("contributions_total")], 2000)
+
+    def test_brackets_in_text_are_not_hit_markers(self):
+        db.insert_goal(make_goal("[Q3] Bonus"))
+        self.assertEqual(db.search_goals("bonus")[0][-1], f"[Q3] {db.HIT_START}Bonus{db.HIT_END}")
+
+    def test_prefix_and_exact_terms(self):
+        self.assertEqual(self.ids("hou dow"), [1])
+        self.assertEqual(self.ids("hou", prefix=False), [])
+        self.assertEqual(self.ids("pune"), [1])
+        self.assertEqual(self.ids('"; DROP'), [])
+
+    def test_index_follows_edits_and_contributions(self):
+        self.assertEqual(self.ids("nifty"), [2])
+        db.update_goal(1, "goal_name", "Villa")
+        self.assertEqual(self.ids("villa"), [1])
+
+        conn = db.connect_db()
+        conn.execute("DELETE FROM contributions WHERE id = 1")
+        conn.commit()
+        self.assertEqual(self.ids("nifty"), [2])  # One Nifty contribution left
+        conn.execute("DELETE FROM contributions WHERE id = 2")
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.ids("nifty"), [])
+
+        db.delete_goal(1)
+        self.assertEqual(self.ids("villa"), [])
+
+    def test_corrections_update_fund_names(self):
+        with db.console.capture():
+            db.log_contribution(1, 500, "2024-03-01")  # No fund
+            db.correct_contribution(3, date="2024-03-02")
+            db.correct_contribution(1, fund_name="Gold ETF")
+        self.assertEqual(self.ids("gold"), [2])
+        self.assertEqual(self.ids("nifty"), [2])
+
+        conn = db.connect_db()
+        conn.execute("DROP TRIGGER goal_search_contribution_update")
+        conn.execute("CREATE TRIGGER goal_search_contribution_update AFTER UPDATE ON contributions BEGIN SELECT 1; END")
+        conn.commit()
+        conn.close()
+        db.initialize_db()  # Replaces the outdated trigger
+        with db.console.capture():
+            db.correct_contribution(2, fund_name="Gold ETF")
+        self.assertEqual(self.ids("nifty"), [])
+
+    def test_existing_data_is_indexed_on_upgrade(self):
+        conn = db.connect_db()
+        conn.execute("DROP TABLE goal_search")
+        conn.execute("DROP TABLE goal_funds")
+        conn.commit()
+        conn.close()
+        db.initialize_db()
+        self.assertEqual(self.ids("nifty"), [2])
+
+    def test_restore_rebuilds_index(self):
+        backup_root = tempfile.mkdtemp()
+        try:
+            db.import_all_data(db.export_all_data(backup_root))
+        finally:
+            shutil.rmtree(backup_root)
+        self.assertEqual(self.ids("nifty"), [2])
+        self.assertEqual(self.ids("house"), [1, 2])
+
+    def test_like_fallback_agrees(self):
+        self.assertEqual([row[0] for row in db.search_goals_like("nifty")], self.ids("nifty"))
+
+
+class TestLedgerJournal(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=100000))
+
+    def log(self, amount, nav=None):
+        with db.console.capture():
+            db.log_contribution(1, amount, "2024-01-01", "Index Fund" if nav else None, nav)
+
+    def test_corrections_reversals_and_edits_are_journaled(self):
+        self.log(1000, nav=10.0)
+        self.log(500)
+        db.correct_contribution(1, amount=1200, nav=12.0)
+        db.reverse_contribution(2, reason="Bounced")
+        db.update_goal(1, "target_amount", 120000)
+
+        events = db.fetch_ledger_events(1)
+        self.assertEqual([event[1] for event in events],
+                         ["contribution", "contribution", "correction", "reversal", "goal_edit"])
+        self.assertEqual(events[2][3], 200)  # Correction journals the change
+        self.assertEqual(events[3][7], "Bounced")
+        self.assertEqual((events[4][5], events[4][6], events[4][7]), ("target_amount", "100000.0", "120000.0"))
+
+        state = db.goal_ledger_state(1)
+        self.assertEqual(state["total"], 1200)
+        self.assertEqual(state["units"], 100)
+        self.assertEqual(state["progress"], 1.0)
+        self.assertEqual(db.get_goal_total_contributions(1), 1200)
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+    def test_snapshots_bound_the_replayed_tail(self):
+        conn = db.connect_db()
+        conn.executemany("INSERT INTO contributions (goal_id, amount, date) VALUES (1, ?, '2024-01-01')",
+                         [(i,) for i in range(1, db.SNAPSHOT_INTERVAL * 2 + 11)])
+        conn.execute("UPDATE goals SET contributions_total = (SELECT SUM(amount) FROM contributions)")
+        db.journal_contributions(conn.cursor())
+        conn.commit()
+        conn.close()
+        for _ in range(db.SNAPSHOT_INTERVAL):
+            self.log(1)
+
+        state = db.goal_ledger_state(1)
+        full = db.goal_ledger_state(1, use_snapshots=False)
+        self.assertEqual((state["total"], state["events"]), (full["total"], full["events"]))
+        self.assertLess(state["tail"], db.SNAPSHOT_INTERVAL)
+        self.assertEqual(full["tail"], db.SNAPSHOT_INTERVAL * 3 + 10)
+
+    def test_drifted_totals_are_rebuilt_from_the_journal(self):
+        self.log(1000)
+        conn = db.connect_db()
+        conn.execute("UPDATE goals SET contributions_total = 5")
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(db.verify_contribution_totals(), [(1, 5, 1000)])
+        self.assertEqual(db.rebuild_contribution_totals(), 1)
+        self.assertEqual(db.get_goal_total_contributions(1), 1000)
+
+    def test_restore_keeps_the_journal(self):
+        self.log(1000)
+        db.reverse_contribution(1)
+        backup_root = tempfile.mkdtemp()
+        try:
+            db.import_all_data(db.export_all_data(backup_root))
+        finally:
+            shutil.rmtree(backup_root)
+        self.assertEqual([event[1] for event in db.fetch_ledger_events(1)], ["contribution", "reversal"])
+        self.assertEqual(db.goal_ledger_state(1)["total"], 0)
+
+
+class TestGoalPatch(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=100000, horizon=5, cagr=12.0))
+        db.insert_goal(make_goal("House", target=500000, horizon=10, cagr=10.0))
+
+    def goal(self, goal_id):
+        return db.fetch_goal_by_id(goal_id)
+
+    def test_fields_and_derived_sip_change_together(self):
+        changed = db.patch_goal(1, {"goal_name": " New car ", "target_amount": "150000", "time_horizon": "4"})
+
+        goal = self.goal(1)
+        self.assertEqual((goal[1], goal[2], goal[3]), ("New car", 150000.0, 4))
+        self.assertEqual(goal[7], goals_calculator.calculate_sip(150000, 4, 12.0))
+        self.assertEqual(changed["sip_amount"], goal[7])
+        edits = [event[5] for event in db.fetch_ledger_events(1) if event[1] == "goal_edit"]
+        self.assertEqual(edits, ["goal_name", "target_amount", "time_horizon", "sip_amount"])
+        self.assertEqual(self.goal(2)[7], 1500)  # Other goals untouched
+
+    def test_invalid_change_rolls_back_everything(self):
+        for changes in ({"target_amount": 150000, "cagr": "abc"}, {"time_horizon": 0},
+                        {"start_date": "2024-13-01"}, {"contributions_total": 0}, {"cagr": "nan"},
+                        {"target_amount": "inf"}, {"time_horizon": "inf"}, {"time_horizon": "2.7"},
+                        {"sip_amount": 10 ** 400}):
+            with self.assertRaises(ValueError):
+                db.patch_goal(1, changes)
+        self.assertEqual(self.goal(1)[2], 100000)
+        self.assertEqual(db.fetch_ledger_events(1), [])
+
+    def test_mode_switch_and_explicit_values(self):
+        db.patch_goal(1, {"investment_mode": "Lumpsum"})
+        goal = self.goal(1)
+        self.assertEqual((goal[5], goal[6], goal[7]), ("Lumpsum", goals_calculator.calculate_lumpsum(100000, 5, 12.0), 0))
+
+        db.patch_goal(1, {"investment_mode": "SIP + Lumpsum", "initial_investment": 20000})
+        goal = self.goal(1)
+        lumpsum, sip = goals_calculator.calculate_mixed(100000, 5, 12.0, lumpsum_amount=20000)
+        self.assertEqual((goal[5], goal[6], goal[7]), ("Lumpsum + SIP", lumpsum, sip))
+
+        db.patch_goal(1, {"cagr": 8, "sip_amount": 999})  # Explicit values win over the re-plan
+        self.assertEqual(self.goal(1)[7], 999)
+        db.update_goal(1, "target_amount", 90000)  # Single-field updates never re-plan
+        self.assertEqual(self.goal(1)[7], 999)
+
+    def test_bulk_replan(self):
+        patched = db.patch_goals(None, {"cagr": 9}, replan=True)
+
+        self.assertEqual(sorted(patched), [1, 2])
+        self.assertEqual(self.goal(1)[7], goals_calculator.calculate_sip(100000, 5, 9))
+        self.assertEqual(self.goal(2)[7], goals_calculator.calculate_sip(500000, 10, 9))
+        self.assertEqual(db.patch_goals([2], {"cagr": 9}), {})  # No-op patches journal nothing
+        with self.assertRaises(ValueError):
+            db.patch_goals(None, {"cagr": float("nan")}, replan=True)  # What replan --cagr nan passes
+        self.assertEqual([self.goal(goal_id)[4] for goal_id in (1, 2)], [9, 9])
+
+
+class TestCurrencies(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_rates("date,ccy,rate\n2024-01-01,USD,80\n2024-06-01,USD,84\n2024-01-01,EUR,90\n")
+        self.assertEqual(db.load_fx_rates(self.rates_path), 3)
+        db.insert_goal(make_goal("House"))
+        db.insert_goal(dict(make_goal("College", target=50000, sip=500), currency="usd"))
+
+    def tearDown(self):
+        os.remove(self.rates_path)
+        super().tearDown()
+
+    def write_rates(self, text):
+        self.rates_path = self.db_path + ".rates.csv"
+        with open(self.rates_path, "w") as f:
+            f.write(text)
+
+    def log(self, *args, **kwargs):
+        with db.console.capture():
+            db.log_contribution(*args, **kwargs)
+
+    def test_contributions_count_in_the_goal_currency_as_of_their_date(self):
+        self.log(2, 1000, "2024-02-10")  # USD, the goal's own currency
+        self.log(2, 8400, "2024-07-01", currency="INR")  # 100 USD at June's rate
+        self.log(2, 90, "2024-03-01", currency="EUR")  # 90 EUR = 8100 INR = 101.25 USD
+
+        self.assertAlmostEqual(db.get_goal_total_contributions(2), 1201.25)
+        self.assertAlmostEqual(db.goal_ledger_state(2)["total"], 1201.25)
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+        db.reverse_contribution(2)
+        self.assertAlmostEqual(db.get_goal_total_contributions(2), 1101.25)
+
+    def test_portfolio_rows_convert_goals_to_the_base_currency(self):
+        self.log(1, 5000, "2024-02-10")
+        self.log(2, 100, "2024-02-10")
+
+        rows = db.fetch_portfolio_rows(as_of="2024-07-01")
+        self.assertEqual(rows[0][2:], (100000, 5, 12.0, 1500, 5000))
+        self.assertEqual(rows[1][2:], (50000 * 84, 5, 12.0, 500 * 84, 100 * 84))
+        in_usd = db.fetch_portfolio_rows(currency="USD", as_of="2024-03-01")
+        self.assertEqual(in_usd[0][2], 100000 / 80)
+        self.assertEqual(in_usd[1][2], 50000)
+
+    def test_missing_and_bad_rates_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.log(2, 1000, "2023-12-31", currency="INR")  # Before the first USD rate
+        with self.assertRaises(ValueError):
+            db.fetch_portfolio_rows(currency="GBP")
+        self.assertEqual(db.get_goal_total_contributions(2), 0)
+
+        self.write_rates("date,ccy,rate\n2024-07-01,USD,85\n2024-07-02,USD,-1\n")
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            db.load_fx_rates(self.rates_path)
+        self.assertEqual(db.fx_rate("USD", "2024-12-31"), 84)  # Nothing loaded
+
+    def test_rates_committed_elsewhere_are_picked_up(self):
+        self.assertEqual(db.fx_rate("USD", "2024-07-01"), 84)
+        other = sqlite3.connect(self.db_path)  # As another process's fx-load would
+        other.execute("INSERT INTO fx_rates (date, ccy, rate) VALUES ('2024-07-01', 'USD', 80)")
+        other.commit()
+        other.close()
+
+        self.assertEqual(db.fx_rate("USD", "2024-07-01"), 80)
+        self.log(2, 16000, "2024-07-01", currency="INR")
+        self.assertEqual(db.fetch_goal_by_id(2, row_factory=db.goal_row).contributions_total, 200)
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+
+class TestDayNumbers(DatabaseTestCase):
+    def log(self, *args):
+        with db.console.capture():
+            db.log_contribution(*args)
+
+    def test_day_columns_follow_their_dates(self):
+        db.insert_goal(make_goal("Car", start_date="2024-03-01"))
+        self.log(1, 500, "2024-01-02")
+        self.log(1, 700, "2024-01-02")
+        self.log(1, 300, "2023-12-31")
+        with db.console.capture():
+            db.correct_contribution(3, date="2024-02-29")
+
+        conn = db.connect_db()
+        days = conn.execute("SELECT day FROM contributions ORDER BY id").fetchall()
+        start_day = conn.execute("SELECT start_day FROM goals").fetchone()[0]
+        conn.close()
+        self.assertEqual([day for day, in days], [db.day_number("2024-01-02")] * 2 + [db.day_number("2024-02-29")])
+        self.assertEqual(np.datetime64(start_day, "D"), np.datetime64("2024-03-01"))
+
+        days, amounts = db.fetch_contribution_series(1)
+        self.assertEqual(days.tolist(), [date(2024, 1, 2), date(2024, 2, 29)])
+        self.assertEqual(amounts.tolist(), [1200, 300])
+        days, amounts = db.fetch_contribution_series(1, start="2024-02-01")
+        self.assertEqual(amounts.tolist(), [300])
+        self.assertEqual(db.fetch_contribution_series(2)[0].dtype, np.dtype("datetime64[D]"))
+
+    def test_older_databases_gain_the_day_columns(self):
+        conn = db.connect_db()
+        conn.execute("DROP TABLE contributions")
+        conn.execute("CREATE TABLE contributions (id INTEGER PRIMARY KEY, goal_id INTEGER, amount REAL, date TEXT)")
+        conn.execute("INSERT INTO contributions (goal_id, amount, date) VALUES (1, 10, '1970-01-11')")
+        conn.commit()
+        conn.close()
+        db.initialize_db()
+
+        conn = db.connect_db()
+        self.assertEqual(conn.execute("SELECT day FROM contributions").fetchone(), (10,))
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM contributions WHERE day BETWEEN 5 AND 15").fetchall()
+        conn.close()
+        self.assertIn("idx_contributions_day", str(plan))
+
+
+class TestConnectionHooks(DatabaseTestCase):
+    def test_hooks_see_every_new_connection_until_removed(self):
+        statements = []
+        hook = lambda conn: conn.set_trace_callback(statements.append)
+        db.add_connection_hook(hook)
+        try:
+            db.insert_goal(make_goal("Car"))
+            db.fetch_goals_page(limit=10)
+        finally:
+            db.remove_connection_hook(hook)
+        db.fetch_goals_page()
+
+        self.assertTrue(any("INSERT INTO goals" in sql for sql in statements))
+        self.assertEqual(sum("FROM goals" in sql for sql in statements), 1)
+
+
+class TestInstrumentation(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        instrumentation.reset()
+        instrumentation.enable(slow_query_ms=0)
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+        instrumentation.slow_ms = instrumentation.DEFAULT_SLOW_MS
+        super().tearDown()
+
+    def test_counts_latency_and_rows_per_statement(self):
+        for name in ("Car", "House", "Trip"):
+            db.insert_goal(make_goal(name))
+        db.fetch_goals_page(limit=10)
+
+        stats = instrumentation.snapshot()["statements"]
+        inserts = [entry for sql, entry in stats.items() if sql.startswith("INSERT INTO goals")]
+        self.assertEqual(inserts[0]["count"], 3)
+        self.assertEqual(sum(inserts[0]["histogram"]), 3)
+        page = [entry for sql, entry in stats.items() if "FROM goals" in sql and "LIMIT" in sql]
+        self.assertEqual(page[0]["rows"], 3)
+
+    def test_slow_queries_are_logged_with_plan(self):
+        db.fetch_goals_page(limit=10)
+        slow = [entry for entry in instrumentation.snapshot()["slow_queries"] if "LIMIT" in entry["sql"]]
+        self.assertTrue(slow)
+        self.assertTrue(any("goals" in step for step in slow[0]["plan"]))
+
+    def test_disabled_connections_are_plain(self):
+        instrumentation.disable()
+        conn = db.connect_db()
+        self.assertIs(type(conn), sqlite3.Connection)
+        conn.close()
+
+    def test_dump_merges_into_existing_file(self):
+        db.fetch_goals_page(limit=10)
+        path = self.db_path + ".stats.json"
+        try:
+            instrumentation.dump_stats(path)
+            instrumentation.dump_stats(path)
+            stats = instrumentation.load_stats(path)["statements"]
+        finally:
+            os.remove(path)
+        page = [entry for sql, entry in stats.items() if "LIMIT" in sql]
+        self.assertEqual(page[0]["count"], 2)
+
+
+class TestSyntheticData(DatabaseTestCase):
+    def snapshot(self):
+        conn = db.connect_db()
+        rows = conn.execute("SELECT goal_id, amount, date, fund_name, nav FROM contributions ORDER BY id").fetchall()
+        conn.close()
+        return rows
+
+    def test_same_seed_same_data(self):
+        synthetic.generate(goals=20, contributions=500, basics_history=10, seed=7)
+        first = self.snapshot()
+        self.tearDown()
+        self.setUp()
+        synthetic.generate(goals=20, contributions=500, basics_history=10, seed=7)
+
+        self.assertEqual(len(first), 500)
+        self.assertEqual(first, self.snapshot())
+
+    def test_totals_and_dates_are_consistent(self):
+        synthetic.generate(goals=20, contributions=1000, basics_history=10, batch_size=300)
+        conn = db.connect_db()
+        mismatched = conn.execute("""
+            SELECT COUNT(*) FROM goals
+            WHERE ABS(contributions_total - (SELECT COALESCE(SUM(amount), 0) FROM contributions WHERE goal_id = goals.id)) > 0.01
+        """).fetchone()[0]
+        early = conn.execute("""
+            SELECT COUNT(*) FROM contributions c JOIN goals g ON g.id = c.goal_id WHERE c.date < g.start_date
+        """).fetchone()[0]
+        conn.close()
+
+        self.assertEqual(mismatched, 0)
+        self.assertEqual(early, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
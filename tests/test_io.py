@@ -0,0 +1,89 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker import export
+from test_db import DatabaseTestCase, make_goal
+
+
+class TestStreamingExport(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.output_dir = tempfile.mkdtemp()
+        db.insert_goal(make_goal("Car"))
+        db.insert_goal(make_goal("House"))
+        db.log_contribution(1, 100, "2024-01-01", "Index Fund", 25.5)
+        db.log_contribution(1, 200, "2024-02-01")
+        db.log_contribution(2, 300, "2024-03-01")
+
+    def path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def test_csv_includes_fund_and_nav(self):
+        count = export.export_contributions(self.path("c.csv"))
+        with open(self.path("c.csv"), newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(count, 3)
+        self.assertEqual(rows[0], export.CONTRIBUTION_HEADERS)
+        self.assertEqual(rows[1][6:], ["Index Fund", "25.5"])
+        self.assertEqual(rows[1][4], "INR")
+
+    def test_gzip_jsonl_with_filters(self):
+        path = self.path("c.jsonl.gz")
+        count = export.export_contributions(path, "jsonl", compress=True, goal_ids=[1], start_date="2024-01-15")
+        with gzip.open(path, "rt") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(count, 1)
+        self.assertEqual(records[0]["amount"], 200)
+        self.assertEqual(records[0]["goal_name"], "Car")
+
+    def test_progress_reports_every_chunk(self):
+        calls = []
+        export.export_goals(self.path("g.csv"), chunk_size=1, progress=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls, [(1, 2), (2, 2)])
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            export.export_goals(self.path("g.xml"), "xml")
+
+
+class TestBackupRoundTrip(DatabaseTestCase):
+    def test_restore_matches_backup(self):
+        db.insert_goal(make_goal("Car", notes=""))
+        db.log_contribution(1, 100, "2024-01-01", "Index Fund", 25.5)
+        db.log_contribution(1, 200, "2024-02-01")
+        backup_dir = db.export_all_data(tempfile.mkdtemp())
+
+        db.log_contribution(1, 999, "2024-03-01")
+        db.import_all_data(backup_dir)
+
+        self.assertEqual(db.get_goal_total_contributions(1), 300)
+        self.assertEqual(db.fetch_contributions_page(1)[1][3:], ("Index Fund", 25.5, "INR"))
+        self.assertEqual(len(db.fetch_basics()), 3)
+
+    def test_restores_backup_with_fewer_columns(self):
+        backup_dir = tempfile.mkdtemp()
+        with open(os.path.join(backup_dir, "contributions.csv"), "w") as f:
+            f.write("id,goal_id,amount,date\n1,1,50.0,2024-01-01\n")
+
+        db.import_all_data(backup_dir)
+
+        self.assertEqual(db.fetch_contributions_page(1), [(1, 50.0, "2024-01-01", None, None, None)])
+
+    def test_rejects_unknown_columns(self):
+        db.insert_goal(make_goal("Car"))
+        backup_dir = tempfile.mkdtemp()
+        with open(os.path.join(backup_dir, "goals.csv"), "w") as f:
+            f.write('id,"goal_name) SELECT 1; --"\n1,Car\n')
+
+        with self.assertRaisesRegex(ValueError, "unknown columns"):
+            db.import_all_data(backup_dir)
+        self.assertEqual(db.count_goals(), 1)  # Nothing restored, nothing cleared
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
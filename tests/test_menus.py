@@ -40,9 +40,9 @@ class TestMenuSystem(unittest.TestCase):
     def test_main_menu_basic_navigation(self, mock_ask, mock_print):
         """Test main menu navigation through all options"""
         # Test each menu option
-        for choice in range(1, 13):  # 12 menu options
+        for choice in range(1, 16):  # 15 menu options
             mock_ask.return_value = str(choice)
-            if choice == 12:  # Exit option
+            if choice == 15:  # Exit option
                 main_menu()
                 mock_print.assert_any_call("[bold red]Exiting program.[/bold red]")
 
@@ -71,6 +71,7 @@ class TestMenuSystem(unittest.TestCase):
         """Test adding a new goal"""
         mock_inputs = [
             "Test Goal 2",  # name
+            "INR",         # currency
             "500000",      # target
             "3",          # time horizon
             "10",         # CAGR
@@ -83,8 +84,8 @@ class TestMenuSystem(unittest.TestCase):
         db.insert_goal(goal_data)
         
         # Verify goal was added
-        goal = db.fetch_goal_by_name("Test Goal 2")
-        self.assertIsNotNone(goal)
+        goals = [goal for goal in map(db.Goal._make, db.fetch_all_goals()) if goal.goal_name == "Test Goal 2"]
+        self.assertEqual([goal.currency for goal in goals], ["INR"])
 
     @patch('rich.prompt.Prompt.ask')
     def test_edit_goal(self, mock_ask):
@@ -108,7 +109,7 @@ class TestMenuSystem(unittest.TestCase):
     @patch('rich.prompt.Prompt.ask')
     def test_log_contribution(self, mock_ask):
         """Test logging a contribution"""
-        mock_ask.side_effect = ["1", "10000", "", "Test Fund", "10.5", "yes"]
+        mock_ask.side_effect = ["1", "INR", "10000", "", "Test Fund", "10.5", "yes"]
         log_contribution_menu()
         
         # Verify contribution was logged
@@ -0,0 +1,140 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker import metrics
+from test_db import DatabaseTestCase, make_goal
+
+
+def sample(name, labels=""):
+    """Return the value of one sample line from the default registry."""
+    prefix = f"{name}{labels} "
+    for line in metrics.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_sums_across_threads(self):
+        counter = metrics.Counter("jobs_total", "Jobs.", registry=self.registry)
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.get(), 4000)
+        self.assertIn("jobs_total 4000", self.registry.render())
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram("wait_seconds", "Waits.", ["queue"], buckets=(0.1, 1),
+                                      registry=self.registry)
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.labels("io").observe(value)
+
+        text = self.registry.render()
+        self.assertIn('wait_seconds_bucket{queue="io",le="0.1"} 1', text)
+        self.assertIn('wait_seconds_bucket{queue="io",le="1"} 3', text)
+        self.assertIn('wait_seconds_bucket{queue="io",le="+Inf"} 4', text)
+        self.assertIn('wait_seconds_sum{queue="io"} 4.05', text)
+        self.assertIn('wait_seconds_count{queue="io"} 4', text)
+
+    def test_failing_gauge_function_is_omitted(self):
+        gauge = metrics.Gauge("broken", "Broken.", registry=self.registry)
+        gauge.set_function(lambda: 1 / 0)
+        self.assertNotIn("\nbroken ", "\n" + self.registry.render())
+
+    def test_textfile_is_replaced_atomically(self):
+        metrics.Counter("runs_total", "Runs.", registry=self.registry).inc(2)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "tracker.prom")
+            self.registry.write_textfile(path)
+            self.assertEqual(os.listdir(directory), ["tracker.prom"])
+            with open(path) as f:
+                self.assertIn("runs_total 2", f.read())
+        finally:
+            shutil.rmtree(directory)
+
+
+    def test_textfile_counters_accumulate_across_registries(self):
+        def run(jobs, wait, gauge):
+            registry = metrics.Registry()  # A fresh registry per run, as in a new process
+            counter = metrics.Counter("jobs_total", "Jobs.", ["queue"], registry=registry)
+            histogram = metrics.Histogram("wait_seconds", "Waits.", buckets=(1,), registry=registry)
+            metrics.Gauge("depth", "Depth.", registry=registry).set(gauge)
+            for queue in jobs:
+                counter.labels(queue).inc()
+            histogram.observe(wait)
+            return registry, counter
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "tracker.prom")
+            run(["io", "io"], 0.5, 7)[0].write_textfile(path)
+            registry, counter = run(["cpu"], 2, 3)
+            registry.write_textfile(path)
+            counter.labels("cpu").inc()
+            registry.write_textfile(path)  # Adds only what changed since this registry last wrote
+
+            families = metrics.read_textfile(path)
+            self.assertEqual(families["jobs_total"], {'jobs_total{queue="cpu"}': 2, 'jobs_total{queue="io"}': 2})
+            self.assertEqual(families["wait_seconds"], {'wait_seconds_bucket{le="1"}': 1, 'wait_seconds_bucket{le="+Inf"}': 2,
+                                                        "wait_seconds_sum": 2.5, "wait_seconds_count": 2})
+            self.assertEqual(families["depth"], {"depth": 3})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_separate_runs_accumulate_in_the_textfile(self):
+        script = ("import sys; from financial_goals_tracker import metrics; "
+                  "metrics.CONTRIBUTIONS_LOGGED.labels('manual').inc(); metrics.write_textfile(sys.argv[1])")
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(metrics.__file__)))
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "tracker.prom")
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", script, path], check=True, cwd=directory, env=env)
+            samples = metrics.read_textfile(path)["fgt_contributions_logged_total"]
+            self.assertEqual(samples['fgt_contributions_logged_total{source="manual"}'], 2)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestPackageMetrics(DatabaseTestCase):
+    def test_goals_contributions_and_restore_are_reported(self):
+        logged = sample("fgt_contributions_logged_total", '{source="manual"}') or 0
+        restored = sample("fgt_restore_rows_total") or 0
+        db.insert_goal(make_goal("Car"))
+        db.insert_goal(make_goal("House"))
+        db.log_contribution(1, 5000, "2024-01-01")
+
+        self.assertEqual(sample("fgt_goals"), 2)
+        self.assertEqual(sample("fgt_contributions_logged_total", '{source="manual"}'), logged + 1)
+
+        backup_root = tempfile.mkdtemp()
+        try:
+            db.import_all_data(db.export_all_data(backup_root))
+        finally:
+            shutil.rmtree(backup_root)
+        # 2 goals + 1 contribution + 3 basics rows + 1 ledger event
+        self.assertEqual(sample("fgt_restore_rows_total"), restored + 7)
+        self.assertGreater(sample("fgt_restore_rows_per_second"), 0)
+        self.assertGreaterEqual(sample("fgt_backup_duration_seconds_count"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+from financial_goals_tracker import columnar
+from financial_goals_tracker import db
+from financial_goals_tracker import milestones
+from test_db import DatabaseTestCase, make_goal
+
+AS_OF = date(2024, 6, 1)
+
+
+def future_value(total, sip, cagr, months):
+    rate = cagr / 1200
+    return total * (1 + rate) ** months + sip * (1 + rate) * ((1 + rate) ** months - 1) / rate
+
+
+class TestCrossings(unittest.TestCase):
+    def test_binary_search_ignores_later_reversals(self):
+        # Running total 10, 30, 20, 60: 25 was crossed at index 1 and stays crossed
+        indexes = milestones.crossing_indexes([10, 20, -10, 40], [25, 30, 50, 100])
+        self.assertEqual(indexes.tolist(), [1, 1, 3, 4])
+
+    def test_projected_months_solve_the_sip_formula(self):
+        months = milestones.projected_months(5000, 1000, 12.0, [5000, 50000, 250000])
+        self.assertEqual(months[0], 0)
+        for n, amount in zip(months[1:].astype(int), (50000, 250000)):
+            self.assertGreaterEqual(future_value(5000, 1000, 12.0, n), amount)
+            self.assertLess(future_value(5000, 1000, 12.0, n - 1), amount)
+
+        self.assertEqual(milestones.projected_months(0, 1000, 0, 25000), 25)  # No growth
+        self.assertTrue(np.isinf(milestones.projected_months(0, 0, 12.0, 25000)))
+
+
+class TestStoredMilestones(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=100000, sip=1000, cagr=0))
+        db.insert_goal(make_goal("Trip", target=10000, sip=0, mode="Lumpsum"))
+        with db.console.capture():
+            db.log_contribution(1, 20000, "2024-01-15")
+            db.log_contribution(1, 40000, "2024-03-15")
+
+    def test_batch_stores_crossed_and_projected_dates(self):
+        self.assertEqual(milestones.compute_milestones(as_of=AS_OF), 2)
+
+        rows, current = db.fetch_goal_milestones(1, as_of=AS_OF)
+        self.assertTrue(current)
+        self.assertEqual(rows, [(25, 25000.0, "2024-03-15", None), (50, 50000.0, "2024-03-15", None),
+                                (75, 75000.0, None, "2025-09-01"), (100, 100000.0, None, "2027-10-01")])
+        self.assertEqual([row[3] for row in db.fetch_goal_milestones(2)[0]], [None] * 4)  # No SIP: never
+
+    def test_batch_reads_the_ledger_snapshot(self):
+        milestones.compute_milestones(as_of=AS_OF)
+        self.assertEqual(columnar.snapshot_version(), db.get_data_version())
+
+        with db.console.capture():
+            db.log_contribution(1, 40000, "2024-05-15")
+        milestones.compute_milestones(as_of=AS_OF)  # The stale snapshot is rewritten first
+        self.assertEqual(columnar.snapshot_version(), db.get_data_version())
+        self.assertEqual(db.fetch_goal_milestones(1, as_of=AS_OF)[0][2][2], "2024-05-15")
+
+    def test_new_ledger_events_make_a_goal_stale(self):
+        milestones.compute_milestones(as_of=AS_OF)
+        with db.console.capture():
+            db.log_contribution(1, 20000, "2024-05-15")
+
+        self.assertFalse(db.fetch_goal_milestones(1, as_of=AS_OF)[1])
+        self.assertTrue(db.fetch_goal_milestones(2, as_of=AS_OF)[1])
+        rows = milestones.goal_milestones(1, as_of=AS_OF)
+        self.assertEqual(rows[2][2], "2024-05-15")
+        self.assertTrue(db.fetch_goal_milestones(1, as_of=AS_OF)[1])
+
+    def test_projections_from_an_earlier_month_or_past_their_date_are_stale(self):
+        milestones.compute_milestones(as_of=AS_OF)
+        self.assertTrue(db.fetch_goal_milestones(1, as_of=date(2024, 6, 30))[1])
+        self.assertFalse(db.fetch_goal_milestones(2, as_of=date(2024, 7, 1))[1])
+
+        _, heads = db.fetch_milestone_inputs([1])
+        db.store_goal_milestones([(1, 75, 75000.0, None, "2024-06-10", heads[1], "2024-06-01")], [1])
+        self.assertTrue(db.fetch_goal_milestones(1, as_of=date(2024, 6, 10))[1])
+        self.assertFalse(db.fetch_goal_milestones(1, as_of=date(2024, 6, 11))[1])
+        rows = milestones.goal_milestones(1, as_of=date(2024, 6, 11))
+        self.assertEqual(rows[2][3], "2025-09-11")  # Recomputed from June 11th
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from financial_goals_tracker import pipeline
+
+
+def count_rows(chunk):
+    path, start, end = chunk
+    reader, lines = pipeline.read_chunk(path, start, end)
+    rows = list(reader)
+    return len(rows), rows
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", newline="") as f:
+            f.writelines(f"{i},row {i}\n" for i in range(1000))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_chunks_end_on_line_boundaries_and_cover_the_file(self):
+        chunks = list(pipeline.line_chunks(self.path, chunk_bytes=100, start=7))
+        self.assertEqual(chunks[0][0], 7)
+        self.assertEqual(chunks[-1][1], os.path.getsize(self.path))
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for (start, end), (next_start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, next_start)
+            self.assertEqual(data[end - 1:end], b"\n")
+
+    def test_rows_reach_the_writer_in_file_order(self):
+        written = []
+        chunks = [(self.path, start, end) for start, end in pipeline.line_chunks(self.path, chunk_bytes=500)]
+        stats = pipeline.run(chunks, count_rows, lambda rows: [int(row[0]) for row in rows], written.extend,
+                             workers=2)
+
+        self.assertEqual(written, list(range(1000)))
+        self.assertEqual((stats["parse"].rows, stats["write"].rows), (1000, 1000))
+
+    def test_slow_writer_applies_backpressure(self):
+        in_flight, peak = [0], [0]
+        lock = threading.Lock()
+
+        def sequence(rows):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            return rows
+
+        def write(batch):
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+
+        chunks = [(self.path, start, end) for start, end in pipeline.line_chunks(self.path, chunk_bytes=200)]
+        stats = pipeline.run(chunks, count_rows, sequence, write, workers=2, queue_size=1)
+        # One batch being written, one queued, one blocked on the queue
+        self.assertLessEqual(peak[0], 3)
+        self.assertGreater(stats["sequence"].waited_s, 0)
+
+    def test_writer_errors_are_raised(self):
+        def write(batch):
+            raise RuntimeError("disk full")
+
+        chunks = [(self.path, start, end) for start, end in pipeline.line_chunks(self.path, chunk_bytes=200)]
+        with self.assertRaisesRegex(RuntimeError, "disk full"):
+            pipeline.run(chunks, count_rows, lambda rows: rows, write, workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker import goals_calculator
+from financial_goals_tracker import metrics
+from financial_goals_tracker import projections
+from test_db import DatabaseTestCase, make_goal
+
+
+def stored_projections():
+    conn = db.connect_db()
+    try:
+        return conn.execute("SELECT goal_id, event_id FROM goal_projections ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+
+class TestProjectionCache(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=100000, sip=1000))
+        db.insert_goal(make_goal("Trip", target=10000, sip=0, mode="Lumpsum"))
+        with db.console.capture():
+            db.log_contribution(1, 20000, "2024-01-15")
+
+    def tearDown(self):
+        projections.disable_background_rebuild()
+        projections.rebuilder.join()
+        super().tearDown()
+
+    def test_projection_matches_the_calculator_and_is_reused(self):
+        future_value, shortfall, required_sip = goals_calculator.project_future_values(20000, 1000, 100000, 5, 12.0)
+        projection = projections.goal_projection(1)
+        self.assertEqual(projection, projections.Projection(1, 20000, 1000, 100000, float(future_value),
+                                                            float(shortfall), float(required_sip)))
+        self.assertEqual(projection.on_track, shortfall <= 0)
+        self.assertEqual(stored_projections(), [(1, 1)])
+
+        before = metrics.PROJECTION_CACHE_LOOKUPS.labels("hit").get()
+        self.assertEqual(projections.goal_projection(1), projection)
+        self.assertEqual(metrics.PROJECTION_CACHE_LOOKUPS.labels("hit").get(), before + 1)
+        self.assertIsNone(projections.goal_projection(99))
+
+    def test_any_input_change_gives_a_new_key(self):
+        inputs = db.fetch_projection_inputs([1])[0]
+        key = projections.projection_key(inputs)
+        self.assertNotEqual(projections.projection_key(inputs, {"cagr": 8}), key)
+        self.assertNotEqual(projections.projection_key(inputs[:-1] + (inputs[-1] + 1,)), key)
+
+        projections.goal_projection(1)
+        db.update_goal(1, "cagr", 10.0)
+        self.assertNotEqual(projections.projection_key(db.fetch_projection_inputs([1])[0]), key)
+        self.assertEqual(projections.goal_projection(1).future_value,
+                         float(goals_calculator.project_future_values(20000, 1000, 100000, 5, 10.0)[0]))
+        # The row from before the edit can never be looked up again
+        self.assertEqual([row[0] for row in stored_projections()], [1])
+
+        scenario = projections.goal_projection(1, {"cagr": 0})
+        self.assertEqual(scenario.future_value, 20000 + 1000 * 60)
+        self.assertEqual(len(stored_projections()), 2)
+
+    def test_writes_rebuild_in_the_background(self):
+        projections.enable_background_rebuild()
+        with db.console.capture():
+            db.log_contribution(1, 5000, "2024-02-15")
+            db.log_contribution(2, 1000, "2024-02-15")
+        projections.rebuilder.join()
+        self.assertEqual(sorted(stored_projections()), [(1, 2), (2, 3)])
+
+        before = metrics.PROJECTION_CACHE_LOOKUPS.labels("hit").get()
+        self.assertEqual(projections.goal_projection(1).total_contributions, 25000)
+        self.assertEqual(metrics.PROJECTION_CACHE_LOOKUPS.labels("hit").get(), before + 1)
+
+        db.delete_goal(2)
+        projections.rebuilder.join()
+        self.assertEqual(stored_projections(), [(1, 2)])
+
+    def test_eviction_keeps_the_newest_rows(self):
+        projections.refresh_projections()
+        projections.refresh_projections(assumptions={"cagr": 8})
+        rows = projections._project(db.fetch_projection_inputs(), {"cagr": 4})
+        db.store_projections(rows, max_rows=3)
+        self.assertEqual(stored_projections(), [(2, 0), (1, 1), (2, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
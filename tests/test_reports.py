@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker import portfolio
+from test_db import DatabaseTestCase, make_goal
+
+
+class TestPortfolioReport(DatabaseTestCase):
+    def test_projection_matches_single_goal_formula(self):
+        db.insert_goal(make_goal("Car", target=1000000, horizon=5, cagr=12.0, sip=10000))
+        db.log_contribution(1, 50000, "2024-01-01")
+
+        report = portfolio.build_report()
+
+        monthly_rate = 0.01
+        months = 60
+        fv_sip = 10000 * (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate)
+        expected = 50000 * 1.12 ** 5 + fv_sip
+        self.assertAlmostEqual(report.future_values[0], expected, places=4)
+        self.assertAlmostEqual(report.shortfalls[0], 1000000 - expected, places=4)
+        self.assertGreater(report.required_sips[0], 0)
+
+    def test_zero_cagr_and_milestones(self):
+        db.insert_goal(make_goal("Trip", target=1000, horizon=1, cagr=0, sip=0))
+        db.insert_goal(make_goal("Phone", target=1000, horizon=1, cagr=0, sip=0))
+        db.log_contribution(1, 600, "2024-01-01")
+        db.log_contribution(2, 1000, "2024-01-01")
+
+        report = portfolio.build_report()
+
+        self.assertEqual(report.milestones.tolist(), [50, 100])
+        self.assertAlmostEqual(report.required_sips[0], 400 / 12)
+        self.assertEqual(report.on_track.tolist(), [False, True])
+        self.assertEqual(report.summary()["milestones"]["50%"], 2)
+
+    def test_exports(self):
+        db.insert_goal(make_goal("Car"))
+        report = portfolio.build_report()
+        directory = tempfile.mkdtemp()
+
+        json_path = os.path.join(directory, "report.json")
+        portfolio.export_json(report, json_path)
+        with open(json_path) as f:
+            data = json.load(f)
+        self.assertEqual(data["summary"]["goals"], 1)
+        self.assertEqual(data["goals"][0]["goal_name"], "Car")
+
+        csv_path = os.path.join(directory, "report.csv")
+        portfolio.export_csv(report, csv_path)
+        with open(csv_path) as f:
+            self.assertEqual(f.readline().strip(), ",".join(portfolio.REPORT_FIELDS))
+
+    def test_empty_portfolio(self):
+        report = portfolio.build_report()
+        self.assertEqual(len(report), 0)
+        self.assertEqual(report.summary()["goals"], 0)
+
+    def test_ten_thousand_goals_under_a_second(self):
+        rows = [(i, f"Goal {i}", 100000 + i, 1 + i % 20, 8 + i % 7, 1000 + i % 500, i * 3.0)
+                for i in range(1, 10001)]
+
+        start = time.perf_counter()
+        report = portfolio.build_report(rows)
+        report.summary()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(report), 10000)
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
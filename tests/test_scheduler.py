@@ -0,0 +1,63 @@
+import unittest
+from datetime import date
+
+from financial_goals_tracker import db
+from financial_goals_tracker import scheduler
+from test_db import DatabaseTestCase, make_goal
+
+
+class TestSipCalendar(unittest.TestCase):
+    def test_clamps_to_month_end(self):
+        due = scheduler.sip_calendar("2024-01-31", 1, date(2024, 4, 30))
+        self.assertEqual([d.isoformat() for d in due],
+                         ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"])
+
+    def test_stops_at_time_horizon(self):
+        self.assertEqual(len(scheduler.sip_calendar("2020-01-01", 1, date(2024, 1, 1))), 12)
+
+
+class TestCatchUp(DatabaseTestCase):
+    def test_logs_missed_months_once(self):
+        db.insert_goal(make_goal("Car", sip=1000, start_date="2024-01-10"))
+        db.insert_goal(make_goal("Trip", mode="Lumpsum", sip=0, start_date="2024-01-10"))
+        db.log_contribution(1, 1000, "2024-02-15")  # February already paid by hand
+        written = []
+        db.add_goal_write_hook(written.append)
+        self.addCleanup(db.remove_goal_write_hook, written.append)
+
+        logged = scheduler.run_catch_up(date(2024, 4, 10))
+        rerun = scheduler.run_catch_up(date(2024, 4, 10))
+
+        self.assertEqual(written, [[1]])
+        self.assertEqual([row[2] for row in logged], ["2024-01-10", "2024-03-10", "2024-04-10"])
+        self.assertEqual(rerun, [])
+        self.assertEqual(db.get_goal_total_contributions(1), 4000)
+        self.assertEqual(db.get_goal_total_contributions(2), 0)
+        self.assertEqual(db.verify_contribution_totals(), [])
+        self.assertEqual(db.goal_ledger_state(1)["events"], 4)
+
+    def test_dry_run_writes_nothing(self):
+        db.insert_goal(make_goal("Car", sip=500, start_date="2024-01-01"))
+
+        planned = scheduler.run_catch_up(date(2024, 2, 1), dry_run=True)
+
+        self.assertEqual(len(planned), 2)
+        self.assertEqual(db.get_goal_total_contributions(1), 0)
+
+    def test_thousands_of_goals_in_one_run(self):
+        conn = db.connect_db()
+        conn.executemany("""
+            INSERT INTO goals (goal_name, target_amount, time_horizon, cagr, investment_mode, sip_amount, start_date)
+            VALUES (?, 100000, 5, 12, 'SIP', 1000, '2023-01-01')
+        """, [(f"Goal {i}",) for i in range(2000)])
+        conn.commit()
+        conn.close()
+
+        logged = scheduler.run_catch_up(date(2023, 12, 31))
+
+        self.assertEqual(len(logged), 2000 * 12)
+        self.assertEqual(scheduler.plan_catch_up(date(2023, 12, 31)), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker.server import GOAL_FIELDS, GoalsAPIServer
+from test_db import DatabaseTestCase, make_goal
+
+
+async def fetch(port, path, etag=None):
+    """Send one GET and return (status, headers, decoded JSON body or None)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+    if etag:
+        request += f"If-None-Match: {etag}\r\n"
+    writer.write((request + "\r\n").encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode().split("\r\n")
+    headers = {name.lower(): value.strip() for name, _, value in (h.partition(":") for h in header_lines)}
+    return int(status_line.split()[1]), headers, json.loads(body) if body else None
+
+
+class TestGoalsAPIServer(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Car", target=100000, sip=1000))
+        db.log_contribution(1, 5000, "2024-01-01", "Index Fund", 10.0)
+
+    def run_with_server(self, scenario):
+        async def main():
+            server = GoalsAPIServer(port=0, workers=2)
+            await server.start()
+            try:
+                return await scenario(server.port)
+            finally:
+                await server.close()
+        return asyncio.run(main())
+
+    def test_goal_endpoints(self):
+        async def scenario(port):
+            return [await fetch(port, path) for path in
+                    ("/goals", "/goals/1", "/goals/1/contributions", "/goals/1/progress",
+                     "/goals/1/projection", "/portfolio")]
+
+        goals, goal, contributions, progress, projection, summary = self.run_with_server(scenario)
+
+        self.assertEqual(goals[2]["goals"][0]["goal_name"], "Car")
+        self.assertEqual(list(goals[2]["goals"][0]), GOAL_FIELDS)
+        self.assertEqual(goal[2]["total_contributions"], 5000)
+        self.assertEqual(goal[2]["currency"], "INR")
+        self.assertEqual(contributions[2]["contributions"][0]["fund_name"], "Index Fund")
+        self.assertEqual(progress[2]["progress"], 5.0)
+        self.assertIn("future_value", projection[2])
+        self.assertEqual(summary[2]["summary"]["goals"], 1)
+
+    def test_etag_revalidation_tracks_data_version(self):
+        async def scenario(port):
+            first = await fetch(port, "/goals/1/progress")
+            etag = first[1]["etag"]
+            unchanged = await fetch(port, "/goals/1/progress", etag)
+            db.log_contribution(1, 1000, "2024-02-01")
+            changed = await fetch(port, "/goals/1/progress", etag)
+            return unchanged, changed
+
+        unchanged, changed = self.run_with_server(scenario)
+
+        self.assertEqual(unchanged[0], 304)
+        self.assertEqual(changed[0], 200)
+        self.assertEqual(changed[2]["total_contributions"], 6000)
+
+    def test_errors(self):
+        async def scenario(port):
+            return (await fetch(port, "/goals/99"), await fetch(port, "/nowhere"),
+                    await fetch(port, "/goals?limit=abc"), await fetch(port, "/goals?limit=0"),
+                    await fetch(port, "/goals/1/contributions?limit=-5"))
+
+        missing, unknown, bad, empty, negative = self.run_with_server(scenario)
+
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(unknown[0], 404)
+        self.assertEqual([bad[0], empty[0], negative[0]], [400, 400, 400])
+
+    def test_refuses_non_loopback_host(self):
+        with self.assertRaises(ValueError):
+            GoalsAPIServer(host="0.0.0.0")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,148 @@
+import csv
+import os
+import unittest
+
+from financial_goals_tracker import db
+from financial_goals_tracker import statements
+from test_db import DatabaseTestCase, make_goal
+
+STATEMENT = """Statement for folio 1234
+Txn Date;Scheme;Amount;Txn ID
+05-01-2024;Nifty 50 Index Fund;"5,000.00";T1
+05-01-2024;Liquid Fund;(250.00);T2
+06-01-2024;Gold ETF;1000;T3
+07-01-2024;Nifty 50 Index Fund;abc;T4
+31-02-2024;Liquid Fund;100;T5
+08-01-2024;Nifty 50 Index Fund;2000;T6
+"""
+
+CONFIG = {
+    "columns": {"date": "Txn Date", "amount": "Amount", "fund": "Scheme", "reference": "Txn ID"},
+    "date_format": "%d-%m-%Y",
+    "delimiter": ";",
+    "skip_lines": 1,
+    "rules": [{"match": "nifty|index", "goal_id": 1}, {"match": "liquid", "goal_id": 2}],
+}
+
+
+class StatementTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.insert_goal(make_goal("Retirement"))
+        db.insert_goal(make_goal("Emergency"))
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        super().tearDown()
+
+    def write(self, suffix, text):
+        path = self.db_path + suffix
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        self.paths.append(path)
+        return path
+
+    def totals(self):
+        return [db.get_goal_total_contributions(goal_id) for goal_id in (1, 2)]
+
+
+class TestStatementImport(StatementTestCase):
+    def test_reimport_is_idempotent(self):
+        path = self.write(".csv", STATEMENT)
+        mapping = statements.StatementMapping.from_dict(CONFIG)
+        written = []
+        db.add_goal_write_hook(written.append)
+        self.addCleanup(db.remove_goal_write_hook, written.append)
+
+        first = statements.import_statement(path, mapping, batch_size=2)
+        self.assertEqual((first.rows, first.imported, first.duplicates, first.errors), (6, 3, 0, 3))
+        self.assertEqual(sorted(set(sum(written, []))), [1, 2])
+        self.assertEqual(self.totals(), [7000, -250])
+
+        second = statements.import_statement(path, mapping, batch_size=2)
+        self.assertEqual((second.imported, second.duplicates, second.errors), (0, 3, 3))
+        self.assertEqual(self.totals(), [7000, -250])
+        self.assertEqual(db.verify_contribution_totals(), [])
+        self.assertEqual(len(db.fetch_ledger_events(1)), 2)
+
+    def test_errors_are_reported_with_their_line(self):
+        path = self.write(".csv", STATEMENT)
+        errors_path = self.db_path + ".errors.csv"
+        self.paths.append(errors_path)
+        statements.import_statement(path, statements.StatementMapping.from_dict(CONFIG), errors_path)
+
+        with open(errors_path, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["line", "error", "Txn Date", "Scheme", "Amount", "Txn ID"])
+        self.assertEqual([(row[0], row[-1]) for row in rows[1:]], [("5", "T3"), ("6", "T4"), ("7", "T5")])
+        self.assertIn("No rule maps fund 'Gold ETF'", rows[1][1])
+        self.assertIn("Invalid amount", rows[2][1])
+        self.assertIn("Invalid date", rows[3][1])
+
+    def test_parallel_import_matches_serial(self):
+        lines = STATEMENT.splitlines(keepends=True)
+        path = self.write(".csv", "".join(lines[:2]) + "".join(lines[2:]) * 40)  # Repeats span chunks
+        columns = {key: name for key, name in CONFIG["columns"].items() if key != "reference"}
+        mapping = statements.StatementMapping.from_dict(dict(CONFIG, columns=columns, default_goal_id=2))
+        serial_errors, parallel_errors = self.db_path + ".serial.csv", self.db_path + ".parallel.csv"
+        self.paths += [serial_errors, parallel_errors]
+
+        serial = statements.import_statement(path, mapping, serial_errors, dry_run=True)
+        parallel = statements.import_statement(path, mapping, parallel_errors, workers=2, chunk_bytes=64,
+                                               batch_size=7)
+        self.assertEqual((parallel.rows, parallel.imported, parallel.errors), (serial.rows, 160, serial.errors))
+        self.assertEqual(parallel.stages["write"].rows, 160)
+        with open(serial_errors) as a, open(parallel_errors) as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertEqual(statements.import_statement(path, mapping).duplicates, 160)
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+    def test_default_goal_and_dry_run(self):
+        path = self.write(".csv", STATEMENT)
+        mapping = statements.StatementMapping.from_dict(dict(CONFIG, default_goal_id=2))
+
+        result = statements.import_statement(path, mapping, dry_run=True)
+        self.assertEqual((result.imported, result.errors), (0, 2))
+        self.assertEqual(self.totals(), [0, 0])
+
+        statements.import_statement(path, mapping)
+        self.assertEqual(self.totals(), [7000, 750])
+
+    def test_identical_rows_without_reference_are_kept(self):
+        path = self.write(".csv", "date,amount\n2024-01-05,500\n2024-01-05,500\n2024-01-06,500\n")
+        mapping = statements.StatementMapping.from_dict({"columns": {"date": "date", "amount": "amount"},
+                                                         "default_goal_id": 1})
+
+        self.assertEqual(statements.import_statement(path, mapping).imported, 3)
+        self.assertEqual(statements.import_statement(path, mapping).duplicates, 3)
+        self.assertEqual(self.totals()[0], 1500)
+
+    def test_foreign_currency_rows_are_converted(self):
+        rates = self.write(".rates.csv", "date,ccy,rate\n2024-01-01,USD,80\n")
+        db.load_fx_rates(rates)
+        path = self.write(".csv", "date,amount,currency\n2024-01-05,10,USD\n2023-12-01,10,USD\n2024-01-06,100,\n")
+        mapping = statements.StatementMapping.from_dict({"columns": {"date": "date", "amount": "amount",
+                                                                     "currency": "currency"},
+                                                         "default_goal_id": 1})
+
+        result = statements.import_statement(path, mapping)
+        self.assertEqual((result.imported, result.errors), (2, 1))  # No USD rate in 2023
+        self.assertEqual(self.totals()[0], 900)
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+    def test_invalid_mapping(self):
+        with self.assertRaises(ValueError):
+            statements.StatementMapping.from_dict({"columns": {"date": "d"}})
+        with self.assertRaises(ValueError):
+            statements.StatementMapping.from_dict(dict(CONFIG, negative=True))
+        path = self.write(".csv", "day,amount\n")
+        with self.assertRaisesRegex(ValueError, "no column"):
+            statements.import_statement(path, statements.StatementMapping.from_dict({
+                "columns": {"date": "date", "amount": "amount"}, "default_goal_id": 1}))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
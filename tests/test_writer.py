@@ -0,0 +1,127 @@
+import sqlite3
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from financial_goals_tracker import db
+from financial_goals_tracker.writer import GroupCommitWriter
+from test_db import DatabaseTestCase, make_goal
+
+
+def fail(conn, goal_id):
+    conn.execute("UPDATE goals SET notes = 'half done' WHERE id = ?", (goal_id,))
+    raise ValueError("rejected")
+
+
+class TestGroupCommitWriter(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("Car", "Trip"):
+            db.insert_goal(make_goal(name))
+
+    def test_concurrent_contributions_share_commits(self):
+        with GroupCommitWriter(max_batch=16, max_delay_ms=50) as writer:
+            with ThreadPoolExecutor(max_workers=8) as callers:
+                futures = list(callers.map(lambda i: writer.log_contribution(i % 2 + 1, 100, "2024-01-05"),
+                                           range(40)))
+            ids = [future.result(timeout=10) for future in futures]
+
+        self.assertEqual(writer.ops, 40)
+        self.assertLess(writer.batches, 40)
+        self.assertEqual(sorted(ids), [row[0] for row in sorted(db.fetch_all_contributions())])
+        self.assertEqual([db.get_goal_total_contributions(goal_id) for goal_id in (1, 2)], [2000, 2000])
+        self.assertEqual(db.verify_contribution_totals(), [])
+
+    def test_a_failing_operation_fails_only_its_own_future(self):
+        with GroupCommitWriter(max_delay_ms=50) as writer:
+            first = writer.log_contribution(1, 500, "2024-01-05")
+            failed = writer.submit(fail, 2, goal_ids=[2])
+            last = writer.log_contribution(2, 300, "2024-01-06")
+            with self.assertRaisesRegex(ValueError, "rejected"):
+                failed.result(timeout=10)
+            self.assertEqual((first.result(timeout=10), last.result(timeout=10)), (1, 2))
+
+        self.assertEqual(writer.batches, 1)
+        self.assertEqual(db.fetch_goal_by_id(2, row_factory=db.goal_row).notes, "")
+        self.assertEqual(db.get_goal_total_contributions(2), 300)
+
+    def test_futures_resolve_only_after_the_commit(self):
+        seen = []
+
+        def count_committed():
+            other = sqlite3.connect(db.DB_FILE)
+            try:
+                return other.execute("SELECT COUNT(*) FROM contributions").fetchone()[0]
+            finally:
+                other.close()
+
+        with GroupCommitWriter(max_delay_ms=50) as writer:
+            future = writer.log_contribution(1, 500, "2024-01-05")
+            future.add_done_callback(lambda f: seen.append(count_committed()))
+            future.result(timeout=10)
+        self.assertEqual(seen, [1])
+
+    def test_batch_closes_on_size_and_close_flushes(self):
+        release = threading.Event()
+
+        def blocked(conn):
+            release.wait(5)
+
+        writer = GroupCommitWriter(max_batch=3, max_delay_ms=1000)
+        writer.submit(blocked)  # Holds the writer until the rest are queued
+        futures = [writer.log_contribution(1, amount, "2024-01-05") for amount in range(1, 8)]
+        release.set()
+        writer.close()
+
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(writer.ops, 8)
+        self.assertEqual(writer.batches, 3)
+        with self.assertRaises(RuntimeError):
+            writer.log_contribution(1, 100, "2024-01-05")
+
+    def test_a_locked_database_is_retried(self):
+        connect = db.connect_db
+
+        def connect_without_busy_wait(**kwargs):
+            conn = connect(**kwargs)
+            conn.execute("PRAGMA busy_timeout = 0")  # Fail BEGIN at once, so only the writer's retries wait
+            return conn
+
+        other = sqlite3.connect(db.DB_FILE, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.1, other.commit).start()
+        with patch.object(db, "connect_db", connect_without_busy_wait):
+            with GroupCommitWriter() as writer:
+                future = writer.log_contribution(1, 500, "2024-01-05")
+                self.assertEqual(future.result(timeout=10), 1)
+        other.close()
+
+    def test_queued_operations_fail_when_the_writer_thread_dies(self):
+        release, errors = threading.Event(), []
+
+        def connect_fails(**kwargs):
+            release.wait(5)
+            raise sqlite3.OperationalError("unable to open database file")
+
+        with patch.object(db, "connect_db", connect_fails), \
+                patch.object(threading, "excepthook", lambda args: errors.append(args.exc_value)):
+            writer = GroupCommitWriter(queue_size=1)
+            queued = writer.log_contribution(1, 500, "2024-01-05")
+            blocked = ThreadPoolExecutor(max_workers=1)
+            waiting = blocked.submit(writer.log_contribution, 2, 300, "2024-01-05")  # Waits for room in the queue
+            release.set()
+            writer.close()
+
+        with self.assertRaisesRegex(RuntimeError, "stopped") as caught:
+            queued.result(timeout=10)
+        self.assertIsInstance(caught.exception.__cause__, sqlite3.OperationalError)
+        with self.assertRaisesRegex(RuntimeError, "closed"):
+            waiting.result(timeout=10)
+        blocked.shutdown()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(db.fetch_all_contributions(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)